@@ -24,6 +24,44 @@ def add_common_arguments(parser):
         default=False,
         help="Use SSL for the connection."
     )
+    group.add_argument(
+        "--target", "-tg",
+        type=str,
+        required=False,
+        default="cluster",
+        choices=["cluster", "standalone", "sentinel"],
+        help="Specify the topology of the target: a cluster, a single node or proxy (standalone), or a Sentinel-managed primary whose Sentinel is --fqdn:--port (default: cluster)."
+    )
+    group.add_argument(
+        "--read-from-replicas", "-rr",
+        type=str,
+        required=False,
+        default=False,
+        help="Send read commands to replicas, for cluster and sentinel targets (default: False)."
+    )
+    group.add_argument(
+        "--sentinel-service", "-ss",
+        type=str,
+        required=False,
+        default="mymaster",
+        help="Specify the service name monitored by Sentinel (default: mymaster)."
+    )
+    group.add_argument(
+        "--protocol", "-pr",
+        type=int,
+        required=False,
+        default=2,
+        choices=[2, 3],
+        help="Specify the RESP protocol version (default: 2)."
+    )
+    group.add_argument(
+        "--parser", "-ps",
+        type=str,
+        required=False,
+        default="auto",
+        choices=["auto", "python", "hiredis"],
+        help="Specify the response parser of standalone and sentinel targets; auto uses hiredis when it is installed (default: auto)."
+    )
     group.add_argument(
         "--query-timeout", "-q",
         type=int,
@@ -38,6 +76,14 @@ def add_common_arguments(parser):
         default=0.5,
         help="Specify the cache hit rate as a float between 0 and 1 (default: 0.5)."
     )
+    group.add_argument(
+        "--hit-rate-mode", "-hm",
+        type=str,
+        required=False,
+        default="open",
+        choices=["open", "closed"],
+        help="Specify how --hit-rate is applied: open draws hit or miss keys with that probability, closed adjusts the mix until the measured hit rate matches it (default: open)."
+    )
     group.add_argument(
         "--duration", "-d",
         type=int,
@@ -66,6 +112,64 @@ def add_common_arguments(parser):
         default=1,
         help="Specify the size of the keys in KB (default: 1)."
     )
+    group.add_argument(
+        "--value-size-dist", "-vd",
+        type=str,
+        required=False,
+        default="fixed",
+        choices=["fixed", "uniform", "lognormal", "histogram"],
+        help="Specify the value size distribution: fixed, uniform, lognormal or histogram (default: fixed)."
+    )
+    group.add_argument(
+        "--value-size-min", "-vmin",
+        type=float,
+        required=False,
+        default=0,
+        help="Specify the minimum value size in KB for the uniform and lognormal distributions (default: 0)."
+    )
+    group.add_argument(
+        "--value-size-max", "-vmax",
+        type=float,
+        required=False,
+        default=None,
+        help="Specify the maximum value size in KB for the lognormal distribution (default: 16 x --value-size)."
+    )
+    group.add_argument(
+        "--value-size-sigma", "-vs",
+        type=float,
+        required=False,
+        default=0.5,
+        help="Specify the sigma of the lognormal value size distribution (default: 0.5)."
+    )
+    group.add_argument(
+        "--value-size-file", "-vf",
+        type=str,
+        required=False,
+        default=None,
+        help="Specify a CSV file of '<size_in_bytes>,<weight>' rows for the histogram distribution."
+    )
+    group.add_argument(
+        "--payload", "-pl",
+        type=str,
+        required=False,
+        default="repeated",
+        choices=["repeated", "text", "random"],
+        help="Specify the content of the values: one repeated byte, compressible text or incompressible random bytes (default: repeated)."
+    )
+    group.add_argument(
+        "--codec", "-cd",
+        type=str,
+        required=False,
+        default="raw",
+        help="Specify how values are encoded: raw, zlib, lz4, zstd, msgpack, pickle or <serializer>+<compressor> such as msgpack+zstd (default: raw)."
+    )
+    group.add_argument(
+        "--bytes-mode", "-bm",
+        type=str,
+        required=False,
+        default=False,
+        help="Use bytes keys and values end to end and return responses as bytes without decoding them (default: False)."
+    )
     group.add_argument(
         "--ttl", "-t",
         type=int,
@@ -73,12 +177,170 @@ def add_common_arguments(parser):
         default=60,
         help="Specify the time-to-live for the keys in seconds (default: 60)."
     )
+    group.add_argument(
+        "--target-rps", "-R",
+        type=float,
+        required=False,
+        default=None,
+        help="Specify a global target of cache lookups per second to run open-loop with coordinated-omission correction (default: closed loop)."
+    )
+    group.add_argument(
+        "--shape", "-sh",
+        type=str,
+        required=False,
+        default="none",
+        choices=["none", "step", "ramp", "spike", "sine"],
+        help="Specify how the number of users changes over --duration, peaking at --connections (default: none, constant)."
+    )
+    group.add_argument(
+        "--shape-steps", "-sn",
+        type=int,
+        required=False,
+        default=5,
+        help="Specify the number of steps of the step shape and of --find-max (default: 5)."
+    )
+    group.add_argument(
+        "--shape-base", "-sb",
+        type=float,
+        required=False,
+        default=0.1,
+        help="Specify the lowest fraction of --connections of the spike and sine shapes (default: 0.1)."
+    )
+    group.add_argument(
+        "--shape-period", "-sp",
+        type=float,
+        required=False,
+        default=60,
+        help="Specify the period in seconds of the sine shape (default: 60)."
+    )
+    group.add_argument(
+        "--find-max", "-fm",
+        type=str,
+        required=False,
+        default=False,
+        help="Raise the users in --shape-steps steps until the p99 or error-rate SLO is broken and report the maximum sustainable throughput (default: False)."
+    )
+    group.add_argument(
+        "--slo-p99", "-slo",
+        type=float,
+        required=False,
+        default=10,
+        help="Specify the highest acceptable p99 latency in milliseconds for --find-max (default: 10)."
+    )
+    group.add_argument(
+        "--slo-error-rate", "-sle",
+        type=float,
+        required=False,
+        default=0.01,
+        help="Specify the highest acceptable ratio of failed requests for --find-max (default: 0.01)."
+    )
+    group.add_argument(
+        "--batch-size", "-b",
+        type=int,
+        required=False,
+        default=1,
+        help="Specify the number of commands pipelined per task (default: 1, no pipelining)."
+    )
+    group.add_argument(
+        "--processes", "-P",
+        type=int,
+        required=False,
+        default=None,
+        help="Specify the number of worker processes of loadtest local (default: all cores)."
+    )
+    group.add_argument(
+        "--engine", "-e",
+        type=str,
+        required=False,
+        default="locust",
+        choices=["locust", "asyncio"],
+        help="Specify the load engine of loadtest local: locust or asyncio; asyncio reports no Cluster (MOVED/ASK, refresh) events (default: locust)."
+    )
+    group.add_argument(
+        "--inflight", "-i",
+        type=int,
+        required=False,
+        default=1,
+        help="Specify the number of in-flight requests per connection for the asyncio engine, sent as one pipeline (default: 1)."
+    )
+    group.add_argument(
+        "--key-length", "-kl",
+        type=int,
+        required=False,
+        default=0,
+        help="Specify the length in characters the miss-path keys are padded to (default: 0, unpadded)."
+    )
+    group.add_argument(
+        "--node-breakdown", "-nb",
+        type=str,
+        required=False,
+        default="off",
+        choices=["off", "node", "slot"],
+        help="Specify whether GET/SET latency is also reported per slot-owning primary (node) or per primary and slot range (slot) (default: off)."
+    )
+    group.add_argument(
+        "--server-metrics-interval", "-smi",
+        type=float,
+        required=False,
+        default=0,
+        help="Specify the interval in seconds at which INFO is sampled from every cluster node; 0 disables sampling (default: 0)."
+    )
+    group.add_argument(
+        "--memory-report", "-mr",
+        type=str,
+        required=False,
+        default=False,
+        help="Track the keys written and expired per TTL, sample MEMORY USAGE and INFO memory, and report the projected steady-state memory and eviction pressure (default: False)."
+    )
+    group.add_argument(
+        "--timeseries", "-ts",
+        type=str,
+        required=False,
+        default="none",
+        choices=["none", "csv", "jsonl", "parquet"],
+        help="Specify the format of the per-interval stats written during the run; parquet requires pyarrow (default: none)."
+    )
+    group.add_argument(
+        "--report", "-rp",
+        type=str,
+        required=False,
+        default="console",
+        help="Specify where the stats of every interval are reported: a comma separated list of console and jsonl (JSON lines on stdout), or none (default: console)."
+    )
+    group.add_argument(
+        "--report-interval", "-ri",
+        type=float,
+        required=False,
+        default=5,
+        help="Specify the reporting interval in seconds, also used for --timeseries rows (default: 5)."
+    )
+    group.add_argument(
+        "--workload", "-w",
+        type=str,
+        required=False,
+        default=None,
+        help="Specify a YAML or JSON workload file with a weighted mix of operations; replaces the GET/SET scenario (default: none)."
+    )
     group.add_argument(
         "--connections-pool", "-l",
         type=int,
         required=False,
         default=1000000,
-        help="Specify the number of connections in the pool (default: 1000000)."
+        help="Specify the number of connections in the pool of every node; load tests cap it at the number of users (default: 1000000)."
+    )
+    group.add_argument(
+        "--warmup-connections", "-wc",
+        type=int,
+        required=False,
+        default=0,
+        help="Specify the number of connections opened to every primary before the load starts (default: 0, disabled)."
+    )
+    group.add_argument(
+        "--topology-refresh-interval", "-tr",
+        type=float,
+        required=False,
+        default=1.0,
+        help="Specify the minimum interval in seconds between two reloads of the cluster slot map (default: 1)."
     )
     group.add_argument(
         "--retry-count", "-rc",
@@ -89,17 +351,74 @@ def add_common_arguments(parser):
     )
     group.add_argument(
         "--retry-wait", "-rw",
-        type=int,
+        type=float,
         required=False,
         default=2,
-        help="Specify the wait time between retries in seconds (default: 2)."
+        help="Specify the base wait time between retries in seconds; retry n waits a random time up to retry-wait x 2^(n-1) (default: 2)."
+    )
+    group.add_argument(
+        "--retry-budget", "-rb",
+        type=float,
+        required=False,
+        default=10,
+        help="Specify the maximum number of retries per second and process; 0 for no limit (default: 10)."
+    )
+    group.add_argument(
+        "--breaker-threshold", "-bt",
+        type=int,
+        required=False,
+        default=0,
+        help="Specify the number of failures within one second that open the circuit breaker; 0 disables it (default: 0)."
     )
     group.add_argument(
         "--set-keys", "-s",
         type=int,
         required=False,
         default=1000,
-        help="Specify the number of keys to set in the cache (default: 1000). ※init redis only parameter"
+        help="Specify the number of keys to set in the cache (default: 1000). Also the keyspace of the hit path."
+    )
+    group.add_argument(
+        "--key-distribution", "-kd",
+        type=str,
+        required=False,
+        default="uniform",
+        choices=["uniform", "zipfian", "scrambled_zipfian", "hotspot", "latest", "sequential"],
+        help="Specify the popularity distribution of the hit-path keys (default: uniform)."
+    )
+    group.add_argument(
+        "--zipf-theta", "-zt",
+        type=float,
+        required=False,
+        default=0.99,
+        help="Specify the skew of the zipfian, scrambled_zipfian and latest distributions, between 0 and 1 (default: 0.99)."
+    )
+    group.add_argument(
+        "--hotspot-fraction", "-hf",
+        type=float,
+        required=False,
+        default=0.2,
+        help="Specify the fraction of keys that are hot for the hotspot distribution (default: 0.2)."
+    )
+    group.add_argument(
+        "--hotspot-op-fraction", "-ho",
+        type=float,
+        required=False,
+        default=0.8,
+        help="Specify the fraction of requests sent to hot keys for the hotspot distribution (default: 0.8)."
+    )
+    group.add_argument(
+        "--preload-batch-size", "-pb",
+        type=int,
+        required=False,
+        default=1000,
+        help="Specify the number of keys written per pipeline during init (default: 1000). ※init redis only parameter"
+    )
+    group.add_argument(
+        "--preload-concurrency", "-pc",
+        type=int,
+        required=False,
+        default=8,
+        help="Specify the number of pipelines in flight during init (default: 8). ※init redis only parameter"
     )
     group.add_argument(
         "--cluster-mode", "-cm",
@@ -129,3 +448,51 @@ def add_common_arguments(parser):
         default=1,
         help="Specify the number of workers to connect to the master node (default: 1)."
     )
+
+def add_replay_arguments(parser):
+    """
+    arguments for loadtest replay
+    """
+    group = parser.add_argument_group("Replay Arguments")
+    group.add_argument(
+        "--trace", "-T",
+        type=str,
+        required=True,
+        help="Specify the trace file: MONITOR output or a binary trace from loadtest replay convert."
+    )
+    group.add_argument(
+        "--speed", "-S",
+        type=float,
+        required=False,
+        default=1.0,
+        help="Specify the replay speed relative to the recorded timing; 0 replays as fast as possible (default: 1.0)."
+    )
+    group.add_argument(
+        "--shard-index", "-si",
+        type=int,
+        required=False,
+        default=0,
+        help="Specify the trace shard replayed by this worker, starting at 0 (default: 0)."
+    )
+    group.add_argument(
+        "--shard-count", "-sc",
+        type=int,
+        required=False,
+        default=1,
+        help="Specify the number of workers the trace is split across (default: 1)."
+    )
+    # A replay ends with its trace unless --duration is given.
+    parser.set_defaults(duration=0)
+
+def add_selfbench_arguments(parser):
+    """
+    arguments for selfbench
+    """
+    group = parser.add_argument_group("Selfbench Arguments")
+    group.add_argument(
+        "--iterations", "-it",
+        type=int,
+        required=False,
+        default=100000,
+        help="Specify the number of operations timed per stage (default: 100000)."
+    )
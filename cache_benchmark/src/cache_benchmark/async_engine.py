@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import random
+import time
+from locust.stats import RequestStats
+from cache_benchmark.histogram import LatencyHistogram
+from cache_benchmark.keygen import get_key_chooser, get_miss_key_generator, key_bytes, key_name
+from cache_benchmark.locust_cache import value_length
+from cache_benchmark.payload import get_payload_pool
+
+
+class AsyncLoadEngine:
+    """
+    Asyncio load engine running the cache scenario without Locust users.
+
+    Every simulated connection is a coroutine on one shared asyncio cluster client.
+    With ``inflight`` above 1 it sends its commands ``inflight`` at a time in one
+    pipeline, so that many requests are in flight on its connection to a node;
+    at most ``connections x inflight`` requests are in flight in total. As in the
+    Locust engine with --batch-size, every command is recorded with the latency of
+    its whole pipeline and the pipeline itself as "get_batch"/"set_batch" of type
+    "RedisBatch". Results are
+    recorded into a Locust ``RequestStats`` object, which keeps the CSV output
+    identical to the Locust runners, and into one latency histogram per request name.
+    """
+
+    def __init__(self, config, cache_conn, connections=1, inflight=1):
+        """
+        Args:
+            config (BenchmarkConfig): Benchmark config.
+            cache_conn: Asyncio cluster client.
+            connections (int): Number of simulated connections.
+            inflight (int): Number of requests kept in flight per connection.
+        """
+        self.config = config
+        self.cache_conn = cache_conn
+        self.connections = max(1, int(connections))
+        self.inflight = max(1, int(inflight))
+        self.concurrency = self.connections * self.inflight
+        self.hit_rate = config.hit_rate
+        self.ttl = config.ttl
+        self.payloads = get_payload_pool(
+            config.value_size_dist,
+            config.value_size,
+            config.value_size_min,
+            config.value_size_max,
+            config.value_size_sigma,
+            config.value_size_file,
+            config.payload_content,
+        )
+        self.keys = get_key_chooser(
+            config.key_distribution,
+            config.set_keys,
+            config.zipf_theta,
+            config.hotspot_fraction,
+            config.hotspot_op_fraction,
+        )
+        self.key_name = key_bytes if config.bytes_mode else key_name
+        self.miss_keys = get_miss_key_generator(config.key_length, binary=config.bytes_mode)
+        self.stats = RequestStats()
+        self.histograms = {}
+
+    def _record(self, name, start_time, exception, length=0, request_type="Redis", end_time=None):
+        response_time = ((end_time or time.perf_counter()) - start_time) * 1000
+        self.stats.log_request(request_type, name, response_time, length)
+        if exception is not None:
+            self.stats.log_error(request_type, name, exception)
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record_ms(response_time)
+
+    async def _get(self, key, name):
+        start_time = time.perf_counter()
+        try:
+            result = await self.cache_conn.get(key)
+            exception = None
+        except Exception as e:
+            logging.error(f"Error during cache hit: {e}")
+            result = None
+            exception = e
+        self._record(f"get_value_{name}", start_time, exception, value_length(result))
+        return result
+
+    async def _set(self, key, name):
+        value = self.payloads.next()
+        start_time = time.perf_counter()
+        try:
+            result = await self.cache_conn.set(key, value, ex=self.ttl)
+            exception = None
+        except Exception as e:
+            logging.error(f"Error during cache set: {e}")
+            result = None
+            exception = e
+        self._record(f"set_value_{name}", start_time, exception, value_length(value))
+        return result
+
+    def _next_request(self):
+        """
+        Returns:
+            tuple: (key, name, index) of the next GET; index is None for miss keys.
+        """
+        if random.random() < self.hit_rate:
+            index = self.keys.next_index()
+            return self.key_name(index), "default", index
+        return self.miss_keys.next_key(), "dummy", None
+
+    async def _pipeline(self, command, requests):
+        """
+        Sends one command per request in a single pipeline.
+
+        Args:
+            command (str): "get" or "set".
+            requests (list): (key, name, index) of every command.
+
+        Returns:
+            list: Result of every command, None for failed commands.
+        """
+        pipe = self.cache_conn.pipeline(transaction=False)
+        values = []
+        for key, _, _ in requests:
+            if command == "get":
+                pipe.get(key)
+            else:
+                values.append(self.payloads.next())
+                pipe.set(key, values[-1], ex=self.ttl)
+        start_time = time.perf_counter()
+        batch_exception = None
+        try:
+            results = await pipe.execute(raise_on_error=False)
+        except Exception as e:
+            logging.error(f"Error during cache {command} pipeline: {e}")
+            batch_exception = e
+            results = [e] * len(requests)
+        end_time = time.perf_counter()
+        lengths = [value_length(value) for value in values] or [value_length(result) for result in results]
+        self._record(f"{command}_batch", start_time, batch_exception, sum(lengths), "RedisBatch", end_time)
+        for (_, name, _), result, length in zip(requests, results, lengths):
+            exception = result if isinstance(result, Exception) else None
+            self._record(f"{command}_value_{name}", start_time, exception, length, end_time=end_time)
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    async def _worker(self, deadline):
+        while time.perf_counter() < deadline:
+            if self.inflight == 1:
+                key, name, index = self._next_request()
+                if await self._get(key, name) is None and await self._set(key, name) and index is not None:
+                    self.keys.inserted(index)
+                continue
+            requests = [self._next_request() for _ in range(self.inflight)]
+            results = await self._pipeline("get", requests)
+            missed = [request for request, result in zip(requests, results) if result is None]
+            if missed:
+                results = await self._pipeline("set", missed)
+                for (_, _, index), result in zip(missed, results):
+                    if result and index is not None:
+                        self.keys.inserted(index)
+
+    async def run(self, duration):
+        """
+        Runs the scenario for the given duration.
+
+        Args:
+            duration (float): Test duration in seconds.
+
+        Returns:
+            RequestStats: Recorded stats.
+        """
+        deadline = time.perf_counter() + duration
+        logging.info(f"Starting asyncio load test with {self.connections} connections and {self.inflight} "
+                     f"in-flight requests per connection...")
+        try:
+            await asyncio.gather(*(self._worker(deadline) for _ in range(self.connections)))
+        finally:
+            close = getattr(self.cache_conn, "aclose", None) or getattr(self.cache_conn, "close", None)
+            if close is not None:
+                await close()
+        logging.info("Load test completed.")
+        for name, histogram in sorted(self.histograms.items()):
+            logging.info(f"{name}: count={histogram.total_count} p50={histogram.percentile(50) / 1000:.3f}ms "
+                         f"p99={histogram.percentile(99) / 1000:.3f}ms max={histogram.max_value / 1000:.3f}ms")
+        return self.stats
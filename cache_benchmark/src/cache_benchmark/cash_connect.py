@@ -2,31 +2,243 @@ from redis.cluster import RedisCluster, ClusterDownError, ClusterNode
 from redis.exceptions import TimeoutError, ConnectionError
 from valkey.cluster import ValkeyCluster as ValkeyCluster, ClusterNode as ValleyClusterNode, ClusterDownError as ValkeyClusterDownError
 from valkey.exceptions import ConnectionError as ValkeyConnectionError, TimeoutError as ValkeyTimeoutError
-from distutils.util import strtobool
-import os
+from redis.asyncio.cluster import RedisCluster as AsyncRedisCluster
+from valkey.asyncio.cluster import ValkeyCluster as AsyncValkeyCluster
+from redis.asyncio import Redis as AsyncRedis
+from valkey.asyncio import Valkey as AsyncValkey
+from redis import BlockingConnectionPool, Connection, Redis, SSLConnection, Sentinel
+from redis._parsers import _HiredisParser, _RESP2Parser, _RESP3Parser
+from redis.utils import HIREDIS_AVAILABLE
+from valkey import (
+    BlockingConnectionPool as ValkeyBlockingConnectionPool,
+    Connection as ValkeyConnection,
+    SSLConnection as ValkeySSLConnection,
+    Sentinel as ValkeySentinel,
+    Valkey,
+)
+from valkey._parsers import _LibvalkeyParser, _RESP2Parser as _ValkeyRESP2Parser, _RESP3Parser as _ValkeyRESP3Parser
+from valkey.utils import LIBVALKEY_AVAILABLE
 import logging
 
+TARGETS = ("cluster", "standalone", "sentinel")
+PARSERS = ("auto", "python", "hiredis")
+READ_COMMANDS = frozenset(("get", "mget", "exists", "ttl", "strlen", "hget", "hgetall", "zrange", "zscore"))
+
+
+class ReplicaReadClient:
+    """
+    Sends read commands to a replica and everything else to the primary.
+
+    Pipelines are routed when executed: a pipeline of read commands only runs on the
+    replica, any other pipeline on the primary.
+    """
+
+    def __init__(self, primary, replica):
+        """
+        Args:
+            primary (Redis | Valkey): Client of the primary.
+            replica (Redis | Valkey): Client of the replicas.
+        """
+        self.primary = primary
+        self.replica = replica
+
+    def __getattr__(self, name):
+        return getattr(self.replica if name in READ_COMMANDS else self.primary, name)
+
+    def pipeline(self, transaction=False):
+        return ReplicaReadPipeline(self, transaction)
+
+
+class ReplicaReadPipeline:
+    def __init__(self, client, transaction=False):
+        self.client = client
+        self.transaction = transaction
+        self.commands = []
+
+    def __getattr__(self, name):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def execute(self, raise_on_error=True):
+        reads = all(name in READ_COMMANDS for name, _, _ in self.commands)
+        pipe = (self.client.replica if reads else self.client.primary).pipeline(transaction=self.transaction)
+        for name, args, kwargs in self.commands:
+            getattr(pipe, name)(*args, **kwargs)
+        self.commands = []
+        return pipe.execute(raise_on_error=raise_on_error)
+
+
 class CacheConnect:
-    def redis_connect(self):
+    def __init__(self, config):
+        """
+        Args:
+            config (BenchmarkConfig): Benchmark config holding the connection settings.
+        """
+        self.config = config
+
+    def connect(self, max_connections=None, connect_callback=None):
+        """
+        Initializes a connection for the cache type of the config.
+
+        Args:
+            max_connections (int): Connection pool size of every node, --connections-pool when None.
+            connect_callback (callable): Called with every new connection once it is established.
+
+        Returns:
+            RedisCluster | ValkeyCluster | Redis | Valkey | ReplicaReadClient: Connection object
+            for the target of the config, None on failure.
+        """
+        if self.config.target == "standalone":
+            return self.standalone_connect(max_connections, connect_callback)
+        if self.config.target == "sentinel":
+            return self.sentinel_connect(max_connections, connect_callback)
+        if self.config.parser != "auto":
+            logging.warning("--parser is ignored for cluster targets; hiredis is used whenever it is installed.")
+        if self.config.cache_type == "valkey_cluster":
+            return self.valkey_connect(max_connections, connect_callback)
+        return self.redis_connect(max_connections, connect_callback)
+
+    def parser_class(self):
+        """
+        Returns:
+            type: Response parser of --parser, None for the client default.
+        """
+        valkey = self.config.cache_type == "valkey_cluster"
+        if self.config.parser == "hiredis":
+            if not (LIBVALKEY_AVAILABLE if valkey else HIREDIS_AVAILABLE):
+                raise ValueError(
+                    "--parser hiredis requires {}.".format("libvalkey (pip install libvalkey)" if valkey else "hiredis (pip install hiredis)"))
+            return _LibvalkeyParser if valkey else _HiredisParser
+        if self.config.parser == "python":
+            if int(self.config.protocol) == 3:
+                return _ValkeyRESP3Parser if valkey else _RESP3Parser
+            return _ValkeyRESP2Parser if valkey else _RESP2Parser
+        return None
+
+    def decode_responses(self):
+        """
+        Returns:
+            bool: Whether the client decodes responses to str; --bytes-mode and the
+            --codec values keep them as bytes.
+        """
+        return not self.config.bytes_mode and self.config.codec == "raw"
+
+    def _node_kwargs(self, max_connections, connect_callback):
+        """
+        Returns:
+            dict: Connection pool arguments shared by the standalone and Sentinel clients.
+        """
+        kwargs = {
+            "decode_responses": self.decode_responses(),
+            "socket_timeout": self.config.query_timeout,
+            "max_connections": int(max_connections or self.config.connections_pool),
+            "protocol": int(self.config.protocol),
+        }
+        parser_class = self.parser_class()
+        if parser_class is not None:
+            kwargs["parser_class"] = parser_class
+        if connect_callback is not None:
+            def on_connect(connection):
+                connection.on_connect()
+                connect_callback(connection)
+            kwargs["valkey_connect_func" if self.config.cache_type == "valkey_cluster" else "redis_connect_func"] = on_connect
+        return kwargs
+
+    def standalone_connect(self, max_connections=None, connect_callback=None):
+        """
+        Initializes a connection to a single node or a proxy (twemproxy, Envoy, ...).
+
+        Greenlets share a blocking connection pool: once every connection is in use,
+        the next command waits up to --query-timeout for a free one instead of failing.
+
+        Args:
+            max_connections (int): Connection pool size, --connections-pool when None.
+            connect_callback (callable): Called with every new connection once it is established.
+
+        Returns:
+            Redis | Valkey: Client, None on failure.
+        """
+        if not self.config.host or not self.config.port:
+            logging.error("Host and port must be set.")
+            return None
+        valkey = self.config.cache_type == "valkey_cluster"
+        logging.info(f"Connecting to standalone {'Valkey' if valkey else 'Redis'} at {self.config.host}:{self.config.port} SSL={self.config.ssl}.")
+        try:
+            kwargs = self._node_kwargs(max_connections, connect_callback)
+            if self.config.ssl:
+                kwargs["connection_class"] = ValkeySSLConnection if valkey else SSLConnection
+                kwargs["ssl_cert_reqs"] = None
+            else:
+                kwargs["connection_class"] = ValkeyConnection if valkey else Connection
+            pool_class = ValkeyBlockingConnectionPool if valkey else BlockingConnectionPool
+            pool = pool_class(host=self.config.host, port=int(self.config.port), timeout=self.config.query_timeout, **kwargs)
+            conn = (Valkey if valkey else Redis)(connection_pool=pool)
+            conn.ping()
+        except Exception as e:
+            logging.warning(f"Unexpected error during standalone initialization: {e}")
+            conn = None
+        return conn
+
+    def sentinel_connect(self, max_connections=None, connect_callback=None):
+        """
+        Initializes a connection to the primary of a Sentinel-managed service.
+
+        --fqdn and --port address a Sentinel. With --read-from-replicas, read commands
+        go to the replicas of the service and writes to the primary.
+
+        Args:
+            max_connections (int): Connection pool size, --connections-pool when None.
+            connect_callback (callable): Called with every new connection once it is established.
+
+        Returns:
+            Redis | Valkey | ReplicaReadClient: Client, None on failure.
+        """
+        if not self.config.host or not self.config.port:
+            logging.error("Host and port must be set.")
+            return None
+        valkey = self.config.cache_type == "valkey_cluster"
+        service = self.config.sentinel_service
+        logging.info(f"Connecting to Sentinel service {service} via {self.config.host}:{self.config.port} SSL={self.config.ssl}.")
+        try:
+            kwargs = self._node_kwargs(max_connections, connect_callback)
+            if self.config.ssl:
+                kwargs.update(ssl=True, ssl_cert_reqs=None)
+            sentinel = (ValkeySentinel if valkey else Sentinel)(
+                [(self.config.host, int(self.config.port))],
+                sentinel_kwargs={"socket_timeout": self.config.query_timeout},
+            )
+            client_class = Valkey if valkey else Redis
+            conn = sentinel.master_for(service, client_class, **kwargs)
+            conn.ping()
+            if self.config.read_from_replicas:
+                conn = ReplicaReadClient(conn, sentinel.slave_for(service, client_class, **kwargs))
+        except Exception as e:
+            logging.warning(f"Unexpected error during Sentinel initialization: {e}")
+            conn = None
+        return conn
+
+    def redis_connect(self, max_connections=None, connect_callback=None):
         """
         Initializes a connection to the Redis cluster.
-        
+
+        Args:
+            max_connections (int): Connection pool size of every node, --connections-pool when None.
+            connect_callback (callable): Called with every new connection once it is established.
+
         Returns:
             RedisCluster: Redis cluster connection object.
         """
-        redis_host = os.environ.get("REDIS_HOST")
-        redis_port = os.environ.get("REDIS_PORT")
-        connections_pool = os.environ.get("CONNECTIONS_POOL")
-        ssl = os.environ.get("SSL")
-        query_timeout = os.environ.get("QUERY_TIMEOUT")
-        logging.info(redis_host)
-        logging.info(redis_port)
-        logging.info(connections_pool)
-        logging.info(ssl)
+        redis_host = self.config.host
+        redis_port = self.config.port
+        connections_pool = max_connections or self.config.connections_pool
+        ssl = self.config.ssl
+        query_timeout = self.config.query_timeout
         logging.info(f"Connecting to Redis cluster at {redis_host}:{redis_port} with {connections_pool} connections SSL={ssl}.")
 
         if not redis_host or not redis_port or not connections_pool:
-            logging.error("Environment variables REDIS_HOST, REDIS_PORT, and CONNECTIONS_POOL must be set.")
+            logging.error("Host, port and connections pool must be set.")
             return None
 
         startup_nodes = [
@@ -35,11 +247,14 @@ class CacheConnect:
         try:
             conn = RedisCluster(
                 startup_nodes=startup_nodes,
-                decode_responses=True,
+                decode_responses=self.decode_responses(),
                 timeout=query_timeout,
-                ssl=bool(strtobool(ssl)),
+                ssl=ssl,
                 max_connections=int(connections_pool),
                 ssl_cert_reqs=None,
+                read_from_replicas=self.config.read_from_replicas,
+                protocol=int(self.config.protocol),
+                redis_connect_func=connect_callback,
             )
         except ClusterDownError as e:
             logging.warning(f"Cluster is down. Retrying...: {e}")
@@ -55,21 +270,25 @@ class CacheConnect:
             conn = None
         return conn
 
-    def valkey_connect(self):
+    def valkey_connect(self, max_connections=None, connect_callback=None):
         """
         Initializes a connection to the Valley cluster.
 
+        Args:
+            max_connections (int): Connection pool size of every node, --connections-pool when None.
+            connect_callback (callable): Called with every new connection once it is established.
+
         Returns:
             ValkeyCluster: Valley cluster connection object.
         """
-        redis_host = os.environ.get("REDIS_HOST")
-        redis_port = os.environ.get("REDIS_PORT")
-        connections_pool = os.environ.get("CONNECTIONS_POOL")
-        ssl = os.environ.get("SSL")
-        query_timeout = os.environ.get("QUERY_TIMEOUT")
+        redis_host = self.config.host
+        redis_port = self.config.port
+        connections_pool = max_connections or self.config.connections_pool
+        ssl = self.config.ssl
+        query_timeout = self.config.query_timeout
         logging.info(f"Connecting to Valley cluster at {redis_host}:{redis_port} with {connections_pool} connections.")
         if not redis_host or not redis_port or not connections_pool:
-            logging.error("Environment variables REDIS_HOST, REDIS_PORT, and CONNECTIONS_POOL must be set.")
+            logging.error("Host, port and connections pool must be set.")
             return None
         startup_nodes = [
             ValleyClusterNode(redis_host, int(redis_port))
@@ -77,11 +296,14 @@ class CacheConnect:
         try:
             conn = ValkeyCluster(
                 startup_nodes=startup_nodes,
-                decode_responses=True,
+                decode_responses=self.decode_responses(),
                 timeout=query_timeout,
-                ssl=bool(strtobool(ssl)),
+                ssl=ssl,
                 max_connections=int(connections_pool),
                 ssl_cert_reqs=None,
+                read_from_replicas=self.config.read_from_replicas,
+                protocol=int(self.config.protocol),
+                valkey_connect_func=connect_callback,
             )
         except ValkeyClusterDownError as e:
             logging.warning(f"Cluster is down. Retrying...: {e}")
@@ -96,3 +318,66 @@ class CacheConnect:
             logging.warning(f"Unexpected error during Valley initialization: {e}")
             conn = None
         return conn
+
+    def async_connect(self):
+        """
+        Builds an asyncio client for the cache type and target of the config.
+
+        The client connects lazily on its first command.
+
+        Returns:
+            redis.asyncio.cluster.RedisCluster | valkey.asyncio.cluster.ValkeyCluster | redis.asyncio.Redis | valkey.asyncio.Valkey:
+            Asyncio client, None on failure.
+        """
+        if not self.config.host or not self.config.port:
+            logging.error("Host and port must be set.")
+            return None
+        if self.config.target == "sentinel":
+            logging.error("The asyncio engine supports cluster and standalone targets only.")
+            return None
+        if self.config.target == "standalone":
+            cluster_class = AsyncValkey if self.config.cache_type == "valkey_cluster" else AsyncRedis
+        elif self.config.cache_type == "valkey_cluster":
+            cluster_class = AsyncValkeyCluster
+        else:
+            cluster_class = AsyncRedisCluster
+        logging.info(f"Connecting asyncio client to {self.config.host}:{self.config.port} SSL={self.config.ssl}.")
+        try:
+            conn = cluster_class(
+                host=self.config.host,
+                port=int(self.config.port),
+                decode_responses=self.decode_responses(),
+                socket_timeout=self.config.query_timeout,
+                ssl=self.config.ssl,
+                max_connections=int(self.config.connections_pool),
+                ssl_cert_reqs=None,
+                protocol=int(self.config.protocol),
+            )
+        except Exception as e:
+            logging.warning(f"Unexpected error during asyncio client initialization: {e}")
+            conn = None
+        return conn
+
+    def node_connect(self, host, port, max_connections=2):
+        """
+        Builds a client for a single node with its own small connection pool, for
+        side traffic such as INFO polling that must not queue behind the load.
+
+        Args:
+            host (str): Node host.
+            port (int): Node port.
+            max_connections (int): Size of the connection pool.
+
+        Returns:
+            Redis | Valkey: Node client.
+        """
+        client_class = Valkey if self.config.cache_type == "valkey_cluster" else Redis
+        return client_class(
+            host=host,
+            port=int(port),
+            decode_responses=True,
+            socket_timeout=self.config.query_timeout,
+            ssl=self.config.ssl,
+            max_connections=max_connections,
+            ssl_cert_reqs=None,
+        )
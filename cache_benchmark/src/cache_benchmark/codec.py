@@ -0,0 +1,270 @@
+import bisect
+import functools
+import json
+import logging
+import pickle
+import random
+import time
+import zlib
+from cache_benchmark.payload import get_payload_pool, make_vocabulary
+
+try:
+    import lz4.frame
+except ImportError:
+    lz4 = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+SERIALIZERS = ("msgpack", "pickle")
+COMPRESSORS = ("zlib", "lz4", "zstd")
+OPTIONAL_MODULES = {"msgpack": msgpack, "lz4": lz4, "zstd": zstandard}
+PACKAGES = {"msgpack": "msgpack", "lz4": "lz4", "zstd": "zstandard"}
+
+
+def parse_codec(value):
+    """
+    Parses a --codec value: ``raw``, a serializer, a compressor, or a serializer and a
+    compressor joined with ``+`` such as ``msgpack+zstd``.
+
+    Args:
+        value (str): Option value.
+
+    Returns:
+        tuple: (serializer, compressor), either None when not used.
+    """
+    parts = [part.strip() for part in str(value or "raw").lower().split("+") if part.strip()]
+    if parts in ([], ["raw"]):
+        return None, None
+    serializers = [part for part in parts if part in SERIALIZERS]
+    compressors = [part for part in parts if part in COMPRESSORS]
+    if len(serializers) > 1 or len(compressors) > 1 or len(serializers) + len(compressors) != len(parts):
+        raise ValueError(f"Invalid codec {value!r}, expected raw, one of {', '.join(SERIALIZERS + COMPRESSORS)} "
+                         f"or <serializer>+<compressor>.")
+    for part in parts:
+        if part in OPTIONAL_MODULES and OPTIONAL_MODULES[part] is None:
+            raise ValueError(f"The {part} codec requires {PACKAGES[part]} (pip install {PACKAGES[part]}).")
+    return (serializers or [None])[0], (compressors or [None])[0]
+
+
+def format_codec(value):
+    """
+    Validates a --codec value.
+
+    Returns:
+        str: Normalized codec name, e.g. ``msgpack+zstd`` or ``raw``.
+    """
+    serializer, compressor = parse_codec(value)
+    return "+".join(part for part in (serializer, compressor) if part) or "raw"
+
+
+class ValueCodec:
+    """
+    Encodes values before SET and decodes them after GET, like an application storing
+    serialized and compressed objects.
+
+    The time spent encoding and decoding is reported as requests of type "Codec"
+    (``encode_<codec>`` / ``decode_<codec>``), so the client CPU cost is measured apart
+    from the GET/SET latency; the response length of ``encode_<codec>`` is the size
+    stored in the cache.
+    """
+
+    def __init__(self, name):
+        """
+        Args:
+            name (str): --codec value, see ``parse_codec``.
+        """
+        self.serializer, self.compressor = parse_codec(name)
+        self.name = format_codec(name)
+        self.encode_name = f"encode_{self.name}"
+        self.decode_name = f"decode_{self.name}"
+        self.dumps = self.loads = self.compress = self.decompress = None
+        if self.serializer == "msgpack":
+            self.dumps, self.loads = msgpack.packb, msgpack.unpackb
+        elif self.serializer == "pickle":
+            self.dumps, self.loads = functools.partial(pickle.dumps, protocol=pickle.HIGHEST_PROTOCOL), pickle.loads
+        if self.compressor == "zlib":
+            self.compress, self.decompress = zlib.compress, zlib.decompress
+        elif self.compressor == "lz4":
+            self.compress, self.decompress = lz4.frame.compress, lz4.frame.decompress
+        elif self.compressor == "zstd":
+            self.compress = zstandard.ZstdCompressor().compress
+            self.decompress = zstandard.ZstdDecompressor().decompress
+
+    def encode(self, value):
+        """
+        Args:
+            value: Object for serializing codecs, bytes-like otherwise.
+
+        Returns:
+            bytes: Value to store.
+        """
+        if self.dumps is not None:
+            value = self.dumps(value)
+        if self.compress is not None:
+            value = self.compress(value)
+        return value
+
+    def decode(self, data):
+        """
+        Args:
+            data (bytes): Stored value.
+
+        Returns:
+            Decoded object or bytes.
+        """
+        if self.decompress is not None:
+            data = self.decompress(data)
+        if self.loads is not None:
+            data = self.loads(data)
+        return data
+
+    def _fire(self, task, name, start_time, length, exception=None):
+        task.user.environment.events.request.fire(
+            request_type="Codec",
+            name=name,
+            response_time=(time.perf_counter() - start_time) * 1000,
+            response_length=length,
+            context={},
+            exception=exception,
+        )
+
+    def timed_encode(self, task, value):
+        """
+        Encodes a value and reports the time it took.
+
+        Returns:
+            bytes: Value to store.
+        """
+        start_time = time.perf_counter()
+        data = self.encode(value)
+        self._fire(task, self.encode_name, start_time, len(data))
+        return data
+
+    def timed_decode(self, task, data):
+        """
+        Decodes a stored value and reports the time it took.
+
+        Returns:
+            Decoded value, None when the value cannot be decoded (e.g. written by another codec).
+        """
+        start_time = time.perf_counter()
+        try:
+            value = self.decode(data)
+        except Exception as e:
+            self._fire(task, self.decode_name, start_time, len(data), e)
+            return None
+        self._fire(task, self.decode_name, start_time, len(data))
+        return value
+
+
+class ObjectPool:
+    """
+    Preallocated objects for the serializing codecs: lists of user-like records whose
+    JSON size approximates the sizes of a payload size table.
+
+    The records are built once and shared by all objects, so drawing an object on the
+    request path allocates nothing; only serializing it costs CPU, like in an application.
+    """
+
+    def __init__(self, sizes, seed=0):
+        """
+        Args:
+            sizes (list): Table of value sizes in bytes; objects are drawn uniformly from it.
+            seed (int): Seed of the record generator.
+        """
+        rng = random.Random(seed)
+        words = make_vocabulary(rng)
+        records = []
+        cumulative = []
+        total = 0
+        while total < max(sizes):
+            record = {
+                "id": rng.randrange(10 ** 9),
+                "name": f"{rng.choice(words)} {rng.choice(words)}",
+                "email": f"{rng.choice(words)}@{rng.choice(words)}.com",
+                "score": round(rng.random() * 100, 2),
+                "active": rng.random() < 0.5,
+                "tags": [rng.choice(words) for _ in range(rng.randint(1, 4))],
+                "bio": " ".join(rng.choice(words) for _ in range(rng.randint(3, 12))),
+            }
+            records.append(record)
+            total += len(json.dumps(record))
+            cumulative.append(total)
+        objects = {size: records[:bisect.bisect_left(cumulative, size) + 1] for size in set(sizes)}
+        self.sizes = sizes
+        self._table = [objects[size] for size in sizes]
+        self._fixed = self._table[0] if len(objects) == 1 else None
+
+    def next(self):
+        """
+        Returns:
+            list: Object drawn from the size table.
+        """
+        if self._fixed is not None:
+            return self._fixed
+        return random.choice(self._table)
+
+
+@functools.lru_cache(maxsize=None)
+def get_object_pool(sizes):
+    """
+    Args:
+        sizes (tuple): Table of value sizes in bytes.
+
+    Returns:
+        ObjectPool: Process-wide object pool for the size table.
+    """
+    return ObjectPool(list(sizes))
+
+
+@functools.lru_cache(maxsize=None)
+def get_value_codec(name):
+    """
+    Returns:
+        ValueCodec: Process-wide codec of --codec, None for raw values.
+    """
+    if parse_codec(name) == (None, None):
+        return None
+    return ValueCodec(name)
+
+
+@functools.lru_cache(maxsize=None)
+def get_value_pool(codec, distribution="fixed", value_size=1, value_size_min=0, value_size_max=None,
+                   sigma=0.5, histogram_file=None, content="repeated"):
+    """
+    Returns the process-wide source of the values to SET: the payload pool, or an
+    object pool with the same size table for serializing codecs.
+
+    Args:
+        codec (ValueCodec): Codec of --codec, None for raw values.
+        Other arguments: See ``get_payload_pool``.
+
+    Returns:
+        PayloadPool | ObjectPool: Pool with ``next()``.
+    """
+    pool = get_payload_pool(distribution, value_size, value_size_min, value_size_max, sigma, histogram_file, content)
+    if codec is None:
+        return pool
+    if codec.serializer is not None:
+        pool = get_object_pool(tuple(pool.sizes))
+    logging.info(f"Value codec {compression_summary(codec, pool)}.")
+    return pool
+
+
+def compression_summary(codec, pool, samples=64):
+    """
+    Returns:
+        str: Mean source and encoded size of the first ``samples`` values of a pool.
+    """
+    values = [pool.next() for _ in range(samples)]
+    source = sum(len(codec.dumps(value)) if codec.dumps else len(value) for value in values) / samples
+    encoded = sum(len(codec.encode(value)) for value in values) / samples
+    return f"{codec.name}: {source:,.0f} B serialized, {encoded:,.0f} B stored ({source / max(encoded, 1):.2f}x)"
@@ -0,0 +1,163 @@
+from dataclasses import asdict, dataclass, fields
+from distutils.util import strtobool
+from cache_benchmark.codec import format_codec
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    """
+    Immutable benchmark settings, parsed once from the command line.
+
+    The object is attached to the Locust ``Environment`` as ``benchmark_config`` and
+    shipped from the master to its workers, so the request path only reads attributes.
+    """
+    cache_type: str = "redis_cluster"
+    host: str = "localhost"
+    port: int = 6379
+    ssl: bool = False
+    target: str = "cluster"
+    read_from_replicas: bool = False
+    sentinel_service: str = "mymaster"
+    protocol: int = 2
+    parser: str = "auto"
+    query_timeout: int = 1
+    hit_rate: float = 0.5
+    hit_rate_mode: str = "open"
+    value_size: int = 1
+    value_size_dist: str = "fixed"
+    value_size_min: float = 0
+    value_size_max: float = None
+    value_size_sigma: float = 0.5
+    value_size_file: str = None
+    payload_content: str = "repeated"
+    codec: str = "raw"
+    bytes_mode: bool = False
+    ttl: int = 60
+    batch_size: int = 1
+    users: int = 1
+    target_rps: float = 0
+    shape: str = "none"
+    shape_steps: int = 5
+    shape_base: float = 0.1
+    shape_period: float = 60
+    find_max: bool = False
+    slo_p99: float = 10
+    slo_error_rate: float = 0.01
+    connections_pool: int = 1000000
+    warmup_connections: int = 0
+    topology_refresh_interval: float = 1.0
+    retry_count: int = 3
+    retry_wait: float = 2
+    retry_budget: float = 10
+    breaker_threshold: int = 0
+    set_keys: int = 1000
+    key_distribution: str = "uniform"
+    zipf_theta: float = 0.99
+    hotspot_fraction: float = 0.2
+    hotspot_op_fraction: float = 0.8
+    key_length: int = 0
+    node_breakdown: str = "off"
+    server_metrics_interval: float = 0
+    memory_report: bool = False
+    report: str = "console"
+    report_interval: float = 5
+    timeseries_format: str = "none"
+    workload_file: str = None
+    workload: str = None
+
+    @classmethod
+    def from_args(cls, args, cache_type="redis_cluster"):
+        """
+        Builds the config from parsed command-line arguments.
+
+        The codec is validated here, and --target-rps is rejected together with --shape
+        or --find-max: the open-loop rate is fixed, while a shape varies the load. The
+        --workload file is only recorded; its definition is loaded by the caller into
+        ``workload`` as canonical JSON text.
+
+        Args:
+            args (Namespace): Command-line arguments.
+            cache_type (str): Cache client to use, redis_cluster or valkey_cluster.
+
+        Returns:
+            BenchmarkConfig: Parsed config.
+        """
+        config = cls(
+            cache_type=cache_type,
+            host=args.fqdn,
+            port=int(args.port),
+            ssl=bool(strtobool(str(args.ssl))),
+            target=args.target,
+            read_from_replicas=bool(strtobool(str(args.read_from_replicas))),
+            sentinel_service=args.sentinel_service,
+            protocol=int(args.protocol),
+            parser=args.parser,
+            query_timeout=int(args.query_timeout),
+            hit_rate=float(args.hit_rate),
+            hit_rate_mode=args.hit_rate_mode,
+            value_size=int(args.value_size),
+            value_size_dist=args.value_size_dist,
+            value_size_min=float(args.value_size_min),
+            value_size_max=float(args.value_size_max) if args.value_size_max else None,
+            value_size_sigma=float(args.value_size_sigma),
+            value_size_file=args.value_size_file or None,
+            payload_content=args.payload,
+            codec=format_codec(args.codec),
+            bytes_mode=bool(strtobool(str(args.bytes_mode))),
+            ttl=int(args.ttl),
+            batch_size=int(args.batch_size),
+            users=int(args.connections),
+            target_rps=float(args.target_rps or 0),
+            shape=args.shape,
+            shape_steps=int(args.shape_steps),
+            shape_base=float(args.shape_base),
+            shape_period=float(args.shape_period),
+            find_max=bool(strtobool(str(args.find_max))),
+            slo_p99=float(args.slo_p99),
+            slo_error_rate=float(args.slo_error_rate),
+            connections_pool=int(args.connections_pool),
+            warmup_connections=int(args.warmup_connections),
+            topology_refresh_interval=float(args.topology_refresh_interval),
+            retry_count=int(args.retry_count),
+            retry_wait=float(args.retry_wait),
+            retry_budget=float(args.retry_budget),
+            breaker_threshold=int(args.breaker_threshold),
+            set_keys=int(args.set_keys),
+            key_distribution=args.key_distribution,
+            zipf_theta=float(args.zipf_theta),
+            hotspot_fraction=float(args.hotspot_fraction),
+            hotspot_op_fraction=float(args.hotspot_op_fraction),
+            key_length=int(args.key_length),
+            node_breakdown=args.node_breakdown,
+            server_metrics_interval=float(args.server_metrics_interval or 0),
+            memory_report=bool(strtobool(str(args.memory_report))),
+            report=args.report,
+            report_interval=float(args.report_interval),
+            timeseries_format=args.timeseries,
+            workload_file=args.workload or None,
+        )
+        if config.target_rps and (config.shape != "none" or config.find_max):
+            raise ValueError("--target-rps fixes the request rate and cannot be combined with --shape or --find-max, "
+                             "which vary the load.")
+        return config
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: Plain representation that can be sent through Locust messages.
+        """
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Rebuilds a config received from the master, ignoring unknown keys.
+
+        Args:
+            data (dict): Output of ``to_dict``.
+
+        Returns:
+            BenchmarkConfig: Rebuilt config.
+        """
+        names = {field.name for field in fields(cls)}
+        return cls(**{key: value for key, value in data.items() if key in names})
@@ -0,0 +1,353 @@
+import base64
+import csv
+import json
+import logging
+import math
+import struct
+import time
+import zlib
+
+# HdrHistogram V2 encoding cookies (word size bit 0x10 set, as written by the Java/C/Python libraries).
+V2_ENCODING_COOKIE = 0x1c849303 | 0x10
+V2_COMPRESSED_ENCODING_COOKIE = 0x1c849304 | 0x10
+V2_HEADER = struct.Struct(">iiiiqqd")
+EXPORT_PERCENTILES = (50, 90, 99, 99.9, 99.99)
+
+
+class LatencyHistogram:
+    """
+    HdrHistogram-compatible latency histogram with microsecond resolution.
+
+    Values are kept in the same bucket layout as HdrHistogram (log2 buckets split into
+    linear sub-buckets), so recording is O(1), memory is bounded by the trackable range
+    and histograms with the same settings can be merged by adding their counts.
+    """
+
+    def __init__(self, lowest=1, highest=60_000_000, significant_figures=3):
+        """
+        Args:
+            lowest (int): Lowest discernible value in microseconds.
+            highest (int): Highest trackable value in microseconds; larger values are clamped.
+            significant_figures (int): Number of significant decimal digits kept per value.
+        """
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_figures = significant_figures
+        largest_single_unit = 2 * 10 ** significant_figures
+        sub_bucket_count_magnitude = int(math.ceil(math.log2(largest_single_unit)))
+        self.sub_bucket_half_count_magnitude = max(sub_bucket_count_magnitude, 1) - 1
+        self.unit_magnitude = int(math.floor(math.log2(lowest)))
+        self.sub_bucket_count = 1 << (self.sub_bucket_half_count_magnitude + 1)
+        self.sub_bucket_half_count = self.sub_bucket_count // 2
+        self.sub_bucket_mask = (self.sub_bucket_count - 1) << self.unit_magnitude
+        smallest_untrackable = self.sub_bucket_count << self.unit_magnitude
+        bucket_count = 1
+        while smallest_untrackable <= highest:
+            smallest_untrackable <<= 1
+            bucket_count += 1
+        self.bucket_count = bucket_count
+        self.counts_len = (bucket_count + 1) * self.sub_bucket_half_count
+        self.counts = [0] * self.counts_len
+        self.total_count = 0
+        self.min_value = None
+        self.max_value = 0
+        self.sum_value = 0
+
+    def _counts_index(self, value):
+        bucket_index = (value | self.sub_bucket_mask).bit_length() - self.unit_magnitude \
+            - self.sub_bucket_half_count_magnitude - 1
+        sub_bucket_index = value >> (bucket_index + self.unit_magnitude)
+        return ((bucket_index + 1) << self.sub_bucket_half_count_magnitude) \
+            + sub_bucket_index - self.sub_bucket_half_count
+
+    def _value_from_index(self, index):
+        bucket_index = (index >> self.sub_bucket_half_count_magnitude) - 1
+        sub_bucket_index = (index & (self.sub_bucket_half_count - 1)) + self.sub_bucket_half_count
+        if bucket_index < 0:
+            sub_bucket_index -= self.sub_bucket_half_count
+            bucket_index = 0
+        return sub_bucket_index << (bucket_index + self.unit_magnitude), bucket_index
+
+    def _highest_equivalent_value(self, index):
+        value, bucket_index = self._value_from_index(index)
+        return value + (1 << (bucket_index + self.unit_magnitude)) - 1
+
+    def record(self, value, count=1):
+        """
+        Records a value in microseconds.
+
+        Args:
+            value (int): Value in microseconds.
+            count (int): Number of occurrences of the value.
+        """
+        value = min(max(int(value), 0), self.highest)
+        self.counts[self._counts_index(value)] += count
+        self.total_count += count
+        self.sum_value += value * count
+        if self.min_value is None or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+
+    def record_ms(self, milliseconds):
+        """
+        Records a latency given in milliseconds, the unit of Locust request events.
+
+        Args:
+            milliseconds (float): Latency in milliseconds.
+        """
+        self.record(milliseconds * 1000)
+
+    def merge(self, other):
+        """
+        Adds the counts of another histogram with the same settings.
+
+        Args:
+            other (LatencyHistogram): Histogram to merge into this one.
+        """
+        if other.counts_len != self.counts_len:
+            raise ValueError("Histograms with different settings can not be merged.")
+        counts = self.counts
+        for index, count in enumerate(other.counts):
+            if count:
+                counts[index] += count
+        self.total_count += other.total_count
+        self.sum_value += other.sum_value
+        if other.min_value is not None and (self.min_value is None or other.min_value < self.min_value):
+            self.min_value = other.min_value
+        self.max_value = max(self.max_value, other.max_value)
+
+    def mean(self):
+        """
+        Returns:
+            float: Mean of the recorded values in microseconds.
+        """
+        return self.sum_value / self.total_count if self.total_count else 0.0
+
+    def percentile(self, percentile):
+        """
+        Returns the value at the given percentile.
+
+        Args:
+            percentile (float): Percentile between 0 and 100.
+
+        Returns:
+            int: Highest value equivalent to the percentile, in microseconds.
+        """
+        if not self.total_count:
+            return 0
+        if percentile <= 0:
+            return self.min_value
+        target = max(1, int(math.ceil(percentile / 100.0 * self.total_count)))
+        running = 0
+        for index, count in enumerate(self.counts):
+            running += count
+            if running >= target:
+                return min(self._highest_equivalent_value(index), self.max_value)
+        return self.max_value
+
+    def encode(self):
+        """
+        Encodes the histogram in the HdrHistogram V2 compressed format.
+
+        Returns:
+            str: Base64 text readable by HdrHistogram tools and ``decode``.
+        """
+        payload = bytearray()
+        last_index = max((index for index, count in enumerate(self.counts) if count), default=-1)
+        zeros = 0
+        for count in self.counts[:last_index + 1]:
+            if count == 0:
+                zeros += 1
+                continue
+            if zeros:
+                _write_zigzag(payload, -zeros)
+                zeros = 0
+            _write_zigzag(payload, count)
+        header = V2_HEADER.pack(V2_ENCODING_COOKIE, len(payload), 0, self.significant_figures,
+                                self.lowest, self.highest, 1.0)
+        compressed = zlib.compress(header + bytes(payload))
+        return base64.b64encode(struct.pack(">ii", V2_COMPRESSED_ENCODING_COOKIE, len(compressed)) + compressed).decode()
+
+    @classmethod
+    def decode(cls, encoded):
+        """
+        Rebuilds a histogram from the output of ``encode``.
+
+        Args:
+            encoded (str): Base64 HdrHistogram V2 compressed histogram.
+
+        Returns:
+            LatencyHistogram: Decoded histogram.
+        """
+        data = base64.b64decode(encoded)
+        cookie, length = struct.unpack_from(">ii", data)
+        if cookie != V2_COMPRESSED_ENCODING_COOKIE:
+            raise ValueError("Not an HdrHistogram V2 compressed histogram.")
+        raw = zlib.decompress(data[8:8 + length])
+        cookie, payload_length, _, significant_figures, lowest, highest, _ = V2_HEADER.unpack_from(raw)
+        if cookie != V2_ENCODING_COOKIE:
+            raise ValueError("Not an HdrHistogram V2 histogram.")
+        histogram = cls(lowest, highest, significant_figures)
+        position = V2_HEADER.size
+        end = position + payload_length
+        index = 0
+        while position < end:
+            value, position = _read_zigzag(raw, position)
+            if value < 0:
+                index -= value
+                continue
+            histogram.counts[index] = value
+            histogram.total_count += value
+            recorded = histogram._value_from_index(index)[0]
+            histogram.sum_value += recorded * value
+            if histogram.min_value is None:
+                histogram.min_value = recorded
+            histogram.max_value = histogram._highest_equivalent_value(index)
+            index += 1
+        if histogram.total_count:
+            histogram.max_value = min(histogram.max_value, highest)
+        return histogram
+
+    def to_dict(self):
+        """
+        Returns:
+            dict: JSON-friendly summary with settings, percentiles and sparse counts.
+        """
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "significant_figures": self.significant_figures,
+            "unit": "us",
+            "total_count": self.total_count,
+            "min": self.min_value or 0,
+            "max": self.max_value,
+            "mean": self.mean(),
+            "percentiles": {str(p): self.percentile(p) for p in EXPORT_PERCENTILES},
+            "counts": {str(index): count for index, count in enumerate(self.counts) if count},
+        }
+
+
+def _write_zigzag(buffer, value):
+    value = (value << 1) ^ (value >> 63)
+    while value >= 0x80:
+        buffer.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def _read_zigzag(data, position):
+    shift = 0
+    value = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            break
+        shift += 7
+    return (value >> 1) ^ -(value & 1), position
+
+
+def export_histograms(histograms, prefix, start_time=None, end_time=None):
+    """
+    Exports per-operation histograms as a percentile CSV, a JSON file and an HdrHistogram log.
+
+    Writes ``<prefix>_percentiles.csv`` (milliseconds, microsecond resolution),
+    ``<prefix>_histograms.json`` and ``<prefix>.hlog``, which HdrHistogram tools such
+    as HistogramLogProcessor can read, one tagged interval per operation.
+
+    Args:
+        histograms (dict): Request name -> LatencyHistogram.
+        prefix (str): Path prefix of the written files.
+        start_time (float): Start of the run as a Unix timestamp.
+        end_time (float): End of the run as a Unix timestamp.
+    """
+    end_time = end_time or time.time()
+    start_time = start_time or end_time
+    names = sorted(histograms)
+    with open(f"{prefix}_percentiles.csv", "w", newline="") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["Request Name", "Count", "Min", "Mean"]
+                        + [f"p{p:g}" for p in EXPORT_PERCENTILES] + ["Max"])
+        for name in names:
+            histogram = histograms[name]
+            writer.writerow([name, histogram.total_count, f"{(histogram.min_value or 0) / 1000:.3f}",
+                             f"{histogram.mean() / 1000:.3f}"]
+                            + [f"{histogram.percentile(p) / 1000:.3f}" for p in EXPORT_PERCENTILES]
+                            + [f"{histogram.max_value / 1000:.3f}"])
+    with open(f"{prefix}_histograms.json", "w") as jsonfile:
+        json.dump({name: histograms[name].to_dict() for name in names}, jsonfile, indent=2)
+    with open(f"{prefix}.hlog", "w") as logfile:
+        logfile.write("#[Histogram log format version 1.3]\n")
+        logfile.write(f"#[StartTime: {start_time:.3f} (seconds since epoch), "
+                      f"{time.strftime('%a %b %d %H:%M:%S %Z %Y', time.localtime(start_time))}]\n")
+        logfile.write(f"#[BaseTime: {start_time:.3f} (seconds since epoch)]\n")
+        logfile.write('"StartTimestamp","Interval_Length","Interval_Max","Interval_Compressed_Histogram"\n')
+        for name in names:
+            histogram = histograms[name]
+            logfile.write(f"Tag={name},0.000,{end_time - start_time:.3f},{histogram.max_value / 1000:.3f},"
+                          f"{histogram.encode()}\n")
+    logging.info(f"Latency histograms saved to {prefix}_percentiles.csv, {prefix}_histograms.json and {prefix}.hlog.")
+
+
+class HistogramRecorder:
+    """
+    Records every request event of a Locust environment into per-name histograms.
+
+    On workers the histograms recorded since the last report are attached to the
+    ``report_to_master`` payload and reset; the master decodes and merges them from
+    ``worker_report``, so the master ends up with the full-run histogram of every
+    operation. The recorder is reachable as ``environment.histograms``.
+    """
+
+    def __init__(self, environment):
+        """
+        Args:
+            environment (Environment): Locust environment to record.
+        """
+        self.histograms = {}
+        self.start_time = time.time()
+        environment.histograms = self
+        environment.events.request.add_listener(self.on_request)
+        environment.events.report_to_master.add_listener(self.on_report_to_master)
+        environment.events.worker_report.add_listener(self.on_worker_report)
+
+    def histogram(self, name):
+        """
+        Returns the histogram of a request name, creating it on first use.
+        """
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def on_request(self, name, response_time, **kwargs):
+        self.histogram(name).record_ms(response_time)
+
+    def on_report_to_master(self, client_id, data, **kwargs):
+        data["hdr_histograms"] = {
+            name: {
+                "histogram": histogram.encode(),
+                "min": histogram.min_value,
+                "max": histogram.max_value,
+                "sum": histogram.sum_value,
+            }
+            for name, histogram in self.histograms.items() if histogram.total_count
+        }
+        self.histograms = {}
+
+    def on_worker_report(self, client_id, data, **kwargs):
+        for name, report in data.get("hdr_histograms", {}).items():
+            histogram = LatencyHistogram.decode(report["histogram"])
+            # The HdrHistogram encoding only carries bucket counts; restore the exact extremes and sum.
+            histogram.min_value = report["min"]
+            histogram.max_value = report["max"]
+            histogram.sum_value = report["sum"]
+            self.histogram(name).merge(histogram)
+
+    def export(self, prefix):
+        """
+        Exports the recorded histograms, see ``export_histograms``.
+        """
+        export_histograms(self.histograms, prefix, self.start_time)
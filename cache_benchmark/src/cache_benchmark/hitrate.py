@@ -0,0 +1,156 @@
+import csv
+import logging
+import time
+import gevent
+from locust.runners import WORKER_REPORT_INTERVAL, MasterRunner
+
+HIT_RATE_MODES = ("open", "closed")
+
+
+class HitRateController:
+    """
+    Measures the real hit ratio of the GETs and, in closed-loop mode, steers the
+    hit/miss key mix so that the measured ratio tracks the target.
+
+    Every GET is classified from its result through ``record``. Workers attach the
+    counts since the last report to the ``report_to_master`` payload; the master
+    merges them from ``worker_report``, runs the controller on the cluster-wide
+    ratio and broadcasts the new mix to the workers as a ``hit_rate_mix`` message.
+    A local runner does both in one process. The controller is a PI loop with
+    conditional integration, so it does not wind up while the mix is saturated
+    (e.g. when the preloaded keys have expired and even a 100% hit-key mix misses).
+    The controller is reachable as ``environment.hit_rate_controller``.
+    """
+
+    def __init__(self, environment, target, closed_loop=False, kp=0.5, ki=0.3):
+        """
+        Args:
+            environment (Environment): Locust environment.
+            target (float): Target hit ratio, --hit-rate.
+            closed_loop (bool): Adjust the mix; otherwise only measure.
+            kp (float): Proportional gain.
+            ki (float): Integral gain, per second.
+        """
+        self.environment = environment
+        self.target = target
+        self.closed_loop = closed_loop
+        self.kp = kp
+        self.ki = ki
+        self.mix = target
+        self.integral = 0.0
+        self.hits = 0
+        self.lookups = 0
+        self.total_hits = 0
+        self.total_lookups = 0
+        self.start_time = time.time()
+        self.last_step = time.perf_counter()
+        self.timeline = []
+        self.greenlet = None
+        environment.hit_rate_controller = self
+        environment.events.report_to_master.add_listener(self.on_report_to_master)
+        environment.events.worker_report.add_listener(self.on_worker_report)
+
+    def record(self, hits, lookups=1):
+        """
+        Counts the result of GET commands.
+
+        Args:
+            hits (int): Number of GETs that returned a value.
+            lookups (int): Number of GETs.
+        """
+        self.hits += hits
+        self.lookups += lookups
+
+    def on_report_to_master(self, client_id, data, **kwargs):
+        data["hit_rate"] = {"hits": self.hits, "lookups": self.lookups}
+        self.hits = 0
+        self.lookups = 0
+
+    def on_worker_report(self, client_id, data, **kwargs):
+        report = data.get("hit_rate")
+        if report:
+            self.record(report["hits"], report["lookups"])
+
+    def on_hit_rate_mix(self, msg, **kwargs):
+        self.mix = msg.data
+
+    def step(self):
+        """
+        Closes the current measurement window and, in closed-loop mode, updates the mix.
+
+        Returns:
+            float: Hit ratio measured in the window, None if there were no GETs.
+        """
+        if not self.lookups:
+            return None
+        now = time.perf_counter()
+        dt = now - self.last_step
+        self.last_step = now
+        measured = self.hits / self.lookups
+        self.total_hits += self.hits
+        self.total_lookups += self.lookups
+        if self.closed_loop:
+            error = self.target - measured
+            integral = self.integral + error * dt
+            mix = self.target + self.kp * error + self.ki * integral
+            if 0.0 <= mix <= 1.0:
+                self.integral = integral
+            self.mix = min(1.0, max(0.0, mix))
+        self.timeline.append((
+            round(time.time() - self.start_time, 3),
+            self.lookups,
+            self.hits,
+            measured,
+            self.total_hits / self.total_lookups,
+            self.target,
+            self.mix,
+        ))
+        self.hits = 0
+        self.lookups = 0
+        return measured
+
+    def start(self, runner=None):
+        """
+        Starts stepping the controller in a greenlet.
+
+        Args:
+            runner (Runner): Locust runner; a MasterRunner broadcasts the mix to its workers.
+        """
+        master = isinstance(runner, MasterRunner)
+        # The master only receives counts with the worker reports.
+        interval = WORKER_REPORT_INTERVAL if master else 1.0
+
+        def run():
+            while True:
+                gevent.sleep(interval)
+                measured = self.step()
+                if measured is None:
+                    continue
+                logging.debug(f"Hit rate: measured={measured:.4f} target={self.target:.4f} mix={self.mix:.4f}")
+                if master and self.closed_loop:
+                    runner.send_message("hit_rate_mix", self.mix)
+
+        self.greenlet = gevent.spawn(run)
+
+    def stop(self):
+        if self.greenlet is not None:
+            self.greenlet.kill()
+            self.greenlet = None
+        self.step()
+        if self.total_lookups:
+            logging.info(f"Achieved hit rate: {self.total_hits / self.total_lookups:.2%} "
+                         f"(target {self.target:.2%}, {self.total_lookups:,} GETs).")
+
+    def export(self, prefix):
+        """
+        Writes the achieved hit ratio over time to ``<prefix>_hit_rate.csv``.
+
+        Args:
+            prefix (str): Path prefix of the output file.
+        """
+        filename = f"{prefix}_hit_rate.csv"
+        with open(filename, mode="w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Elapsed (s)", "GETs", "Hits", "Hit Rate", "Cumulative Hit Rate", "Target", "Hit Key Mix"])
+            writer.writerows(self.timeline)
+        logging.info(f"Hit rate timeline saved to {filename}.")
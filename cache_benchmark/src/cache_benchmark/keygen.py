@@ -0,0 +1,372 @@
+import abc
+import functools
+import itertools
+import logging
+import os
+import random
+import socket
+import zlib
+from array import array
+from redis.crc import REDIS_CLUSTER_HASH_SLOTS, key_slot
+
+KEY_DISTRIBUTIONS = ("uniform", "zipfian", "scrambled_zipfian", "hotspot", "latest", "sequential")
+# Up to this many keys the Zipfian distribution is sampled exactly from an alias table;
+# larger keyspaces use the constant-memory approximation of Gray et al.
+ALIAS_TABLE_MAX_KEYS = 1 << 20
+ZETA_EXACT_TERMS = 10000
+FNV_OFFSET_BASIS_64 = 0xCBF29CE484222325
+FNV_PRIME_64 = 0x100000001B3
+
+
+def key_name(index):
+    """
+    Returns the cache key of a keyspace index, matching the keys written by init.
+
+    Args:
+        index (int): Index in [0, keyspace).
+
+    Returns:
+        str: Key name, key_1 for index 0.
+    """
+    return f"key_{index + 1}"
+
+
+def key_bytes(index):
+    """
+    Returns the cache key of a keyspace index as bytes, for --bytes-mode.
+
+    Args:
+        index (int): Index in [0, keyspace).
+
+    Returns:
+        bytes: Key name, b"key_1" for index 0.
+    """
+    return b"key_%d" % (index + 1)
+
+
+class AliasTable:
+    """
+    Vose alias table: O(n) construction, O(1) sampling of a discrete distribution.
+    """
+
+    def __init__(self, weights):
+        """
+        Args:
+            weights (list): Non-negative weight of every outcome.
+        """
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [weight * n / total for weight in weights]
+        self.n = n
+        self.probability = array("d", [1.0]) * n
+        self.alias = array("l", range(n))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large[-1]
+            self.probability[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            if scaled[more] < 1.0:
+                small.append(large.pop())
+
+    def sample(self, rng=random):
+        """
+        Returns:
+            int: Index of the sampled outcome.
+        """
+        column = int(rng.random() * self.n)
+        return column if rng.random() < self.probability[column] else self.alias[column]
+
+
+def zeta(n, theta):
+    """
+    Generalized harmonic number sum(i ** -theta for i in 1..n).
+
+    The first terms are summed exactly and the tail is approximated with the
+    Euler-Maclaurin formula, so very large keyspaces stay cheap to set up.
+    """
+    exact = min(n, ZETA_EXACT_TERMS)
+    total = sum(i ** -theta for i in range(1, exact + 1))
+    if n > exact:
+        total += (n ** (1 - theta) - exact ** (1 - theta)) / (1 - theta)
+        total += (n ** -theta - exact ** -theta) / 2
+    return total
+
+
+class KeyChooser(abc.ABC):
+    """
+    Chooses keyspace indexes for the hit path. Subclasses implement ``next_index``.
+    """
+
+    def __init__(self, keyspace):
+        """
+        Args:
+            keyspace (int): Number of keys, normally --set-keys.
+        """
+        self.keyspace = max(1, int(keyspace))
+
+    @abc.abstractmethod
+    def next_index(self):
+        """
+        Returns:
+            int: Next keyspace index, in [0, keyspace).
+        """
+
+    def next_key(self):
+        """
+        Returns:
+            str: Next key to request.
+        """
+        return key_name(self.next_index())
+
+    def inserted(self, index):
+        """
+        Notifies the chooser that the key at ``index`` was (re)written.
+        """
+
+
+class UniformKeyChooser(KeyChooser):
+    def next_index(self):
+        return int(random.random() * self.keyspace)
+
+
+class ZipfianKeyChooser(KeyChooser):
+    """
+    Zipfian popularity: index 0 is the most popular key.
+
+    Keyspaces up to ALIAS_TABLE_MAX_KEYS are sampled from an exact alias table;
+    larger ones use the closed-form sampler of Gray et al. ("Quickly generating
+    billion-record synthetic databases"), as YCSB does.
+    """
+
+    def __init__(self, keyspace, theta=0.99):
+        super().__init__(keyspace)
+        if not 0 < theta < 1:
+            raise ValueError("The Zipfian theta must be between 0 and 1.")
+        self.theta = theta
+        self.table = None
+        if self.keyspace <= ALIAS_TABLE_MAX_KEYS:
+            self.table = AliasTable([(i + 1) ** -theta for i in range(self.keyspace)])
+            return
+        self.zetan = zeta(self.keyspace, theta)
+        self.alpha = 1.0 / (1.0 - theta)
+        self.eta = (1 - (2.0 / self.keyspace) ** (1 - theta)) / (1 - zeta(2, theta) / self.zetan)
+        self.half_pow_theta = 1.0 + 0.5 ** theta
+
+    def next_index(self):
+        if self.table is not None:
+            return self.table.sample()
+        u = random.random()
+        uz = u * self.zetan
+        if uz < 1.0:
+            return 0
+        if uz < self.half_pow_theta:
+            return 1
+        return min(int(self.keyspace * (self.eta * u - self.eta + 1) ** self.alpha), self.keyspace - 1)
+
+
+class ScrambledZipfianKeyChooser(ZipfianKeyChooser):
+    """
+    Zipfian popularity with the hot keys spread over the keyspace (and cluster slots)
+    by an FNV-1a hash instead of being the lowest indexes.
+    """
+
+    def next_index(self):
+        index = super().next_index()
+        hashed = FNV_OFFSET_BASIS_64
+        for _ in range(8):
+            hashed = ((hashed ^ (index & 0xFF)) * FNV_PRIME_64) & 0xFFFFFFFFFFFFFFFF
+            index >>= 8
+        return hashed % self.keyspace
+
+
+class HotspotKeyChooser(KeyChooser):
+    """
+    ``hot_op_fraction`` of the requests go uniformly to the first ``hot_fraction`` of the keys.
+    """
+
+    def __init__(self, keyspace, hot_fraction=0.2, hot_op_fraction=0.8):
+        super().__init__(keyspace)
+        self.hot_keys = max(1, int(self.keyspace * hot_fraction))
+        self.cold_keys = self.keyspace - self.hot_keys
+        self.hot_op_fraction = hot_op_fraction
+
+    def next_index(self):
+        if self.cold_keys == 0 or random.random() < self.hot_op_fraction:
+            return int(random.random() * self.hot_keys)
+        return self.hot_keys + int(random.random() * self.cold_keys)
+
+
+class LatestKeyChooser(ZipfianKeyChooser):
+    """
+    Zipfian popularity by recency: the most recently written key is the most popular.
+
+    Init writes key_1..key_N in order, so key_N starts as the newest key; every
+    refill SET reported through ``inserted`` becomes the new head.
+    """
+
+    def __init__(self, keyspace, theta=0.99):
+        super().__init__(keyspace, theta)
+        self.newest = self.keyspace - 1
+
+    def next_index(self):
+        return (self.newest - super().next_index()) % self.keyspace
+
+    def inserted(self, index):
+        self.newest = index
+
+
+class SequentialKeyChooser(KeyChooser):
+    """
+    Walks the keyspace in order, wrapping around at the end.
+    """
+
+    def __init__(self, keyspace):
+        super().__init__(keyspace)
+        self.cursor = -1
+
+    def next_index(self):
+        self.cursor = (self.cursor + 1) % self.keyspace
+        return self.cursor
+
+
+@functools.lru_cache(maxsize=None)
+def get_key_chooser(distribution="uniform", keyspace=1000, theta=0.99, hot_fraction=0.2, hot_op_fraction=0.8):
+    """
+    Returns the process-wide key chooser for the given distribution, building it on first use.
+
+    Args:
+        distribution (str): One of KEY_DISTRIBUTIONS.
+        keyspace (int): Number of keys.
+        theta (float): Skew of the Zipfian based distributions.
+        hot_fraction (float): Fraction of the keys that are hot (hotspot).
+        hot_op_fraction (float): Fraction of the requests going to hot keys (hotspot).
+
+    Returns:
+        KeyChooser: Shared key chooser.
+    """
+    if distribution == "uniform":
+        chooser = UniformKeyChooser(keyspace)
+    elif distribution == "zipfian":
+        chooser = ZipfianKeyChooser(keyspace, theta)
+    elif distribution == "scrambled_zipfian":
+        chooser = ScrambledZipfianKeyChooser(keyspace, theta)
+    elif distribution == "hotspot":
+        chooser = HotspotKeyChooser(keyspace, hot_fraction, hot_op_fraction)
+    elif distribution == "latest":
+        chooser = LatestKeyChooser(keyspace, theta)
+    elif distribution == "sequential":
+        chooser = SequentialKeyChooser(keyspace)
+    else:
+        raise ValueError(f"Unknown key distribution: {distribution}")
+    logging.info(f"Key chooser ready: {distribution} distribution over {chooser.keyspace:,} keys.")
+    return chooser
+
+
+@functools.lru_cache(maxsize=None)
+def slot_hash_tags():
+    """
+    Returns one short hash tag per cluster slot, so that ``{tag}`` maps a key to that slot.
+
+    Returns:
+        list: Hash tag of every slot, indexed by slot number.
+    """
+    tags = [None] * REDIS_CLUSTER_HASH_SLOTS
+    missing = REDIS_CLUSTER_HASH_SLOTS
+    for candidate in itertools.count():
+        tag = format(candidate, "x")
+        slot = key_slot(tag.encode())
+        if tags[slot] is None:
+            tags[slot] = tag
+            missing -= 1
+            if missing == 0:
+                return tags
+
+
+class MissKeyGenerator:
+    """
+    Generates unique, never-before-seen keys for the miss path.
+
+    A key is a precomputed per-slot prefix ``{tag}m:<worker id>:`` followed by a
+    process-wide counter; consecutive keys walk the slots round-robin, so misses are
+    spread evenly over every shard. Keys are unique across greenlets (one counter per
+    process) and across processes and hosts (the worker id), and can be padded to a
+    fixed length to model key size independently of the key scheme.
+    """
+
+    def __init__(self, worker_id, key_length=0, binary=False):
+        """
+        Args:
+            worker_id (str): Identifier of the process, e.g. the Locust client id.
+            key_length (int): Pad keys to this many characters; 0 keeps them unpadded.
+            binary (bool): Generate bytes keys instead of strings.
+        """
+        worker = format(zlib.crc32(str(worker_id).encode()), "08x")
+        self.prefixes = [f"{{{tag}}}m:{worker}:" for tag in slot_hash_tags()]
+        self.key_length = int(key_length)
+        self.padding = "x" * self.key_length
+        self.count_format = "%d"
+        if binary:
+            self.prefixes = [prefix.encode() for prefix in self.prefixes]
+            self.padding = self.padding.encode()
+            self.count_format = b"%d"
+        self.counter = itertools.count()
+        longest = max(len(prefix) for prefix in self.prefixes)
+        if self.key_length and self.key_length < longest + 8:
+            logging.warning(f"--key-length {self.key_length} is shorter than the generated miss keys "
+                            f"(at least {longest + 8} characters); keys will not be padded.")
+
+    def next_key(self):
+        """
+        Returns:
+            str | bytes: New unique miss key.
+        """
+        count = next(self.counter)
+        key = self.prefixes[count % REDIS_CLUSTER_HASH_SLOTS] + self.count_format % count
+        if len(key) < self.key_length:
+            key += self.padding[len(key):]
+        return key
+
+
+def process_worker_id(environment=None):
+    """
+    Returns an identifier unique to this process, preferring the Locust worker client id.
+
+    Args:
+        environment (Environment): Locust environment, if any.
+
+    Returns:
+        str: Worker identifier.
+    """
+    runner = getattr(environment, "runner", None)
+    client_id = getattr(runner, "client_id", None)
+    if client_id:
+        return client_id
+    return f"{socket.gethostname()}-{os.getpid()}-{random.getrandbits(32):x}"
+
+
+_miss_key_generators = {}
+
+
+def get_miss_key_generator(key_length=0, environment=None, binary=False):
+    """
+    Returns the process-wide miss key generator, building it on first use.
+
+    Forked worker processes get their own generator, since the cache is keyed by pid.
+
+    Args:
+        key_length (int): Pad keys to this many characters.
+        environment (Environment): Locust environment, used for the worker id.
+        binary (bool): Generate bytes keys.
+
+    Returns:
+        MissKeyGenerator: Shared miss key generator.
+    """
+    cache_key = (os.getpid(), int(key_length), bool(binary))
+    generator = _miss_key_generators.get(cache_key)
+    if generator is None:
+        generator = _miss_key_generators[cache_key] = MissKeyGenerator(process_worker_id(environment), key_length,
+                                                                       binary)
+    return generator
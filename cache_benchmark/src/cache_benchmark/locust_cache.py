@@ -1,96 +1,316 @@
-from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_fixed
-from redis.exceptions import ClusterDownError
 import time
 import logging
-import os
+
+def value_length(value):
+    """
+    Returns the payload size reported as the response length of a request event.
+
+    Args:
+        value: GET result, SET value or list of them (MGET, ZRANGE).
+
+    Returns:
+        int: Length of a bytes, str or memoryview value, total of a list, 0 for other results.
+    """
+    if isinstance(value, (bytes, str, memoryview, bytearray)):
+        return len(value)
+    if isinstance(value, list):
+        return sum(value_length(item) for item in value)
+    return 0
 
 class LocustCache:
-    @retry(
-        stop=stop_after_attempt(int(os.environ.get("RETRY_ATTEMPTS", 3))),
-        wait=wait_fixed(int(os.environ.get("RETRY_WAIT", 5))),
-        retry=retry_if_exception_type((TimeoutError, ConnectionError, ClusterDownError)),
-    )
-    def locust_redis_get(self, cache_connection, key, name):
-        """
-        Performs a GET operation on the Redis cluster with retry logic.
+    def locust_redis_get(self, cache_connection, key, name, queue_delay=None):
+        """
+        Performs a GET operation on the Redis cluster, retried per the environment's retry policy.
         
         Args:
             self: Locust task instance.
             redis_connection (RedisCluster): Redis cluster connection object.
             key (str): Key to get from Redis.
             name (str): Name for the request event.
+            queue_delay (float): Open-loop queue delay in milliseconds; when given, a
+                coordinated-omission corrected "<name>_corrected" event is fired too.
         
         Returns:
-            str: Value from Redis.
+            str | bytes: Value from Redis, bytes with --bytes-mode.
         """
-        start_time = time.perf_counter()
-        try:
-            result = cache_connection.get(key)
-            total_time = (time.perf_counter() - start_time) * 1000
-            self.user.environment.events.request.fire(
-                request_type="Redis",
-                name="get_value_{}".format(name),
-                response_time=total_time,
-                response_length=0,
-                context={},
-                exception=None,
-            )
-        except Exception as e:
-            total_time = (time.perf_counter() - start_time) * 1000
-            self.user.environment.events.request.fire(
-                request_type="Redis",
-                name="get_value_{}".format(name),
-                response_time=total_time,
-                response_length=0,
-                context={},
-                exception=e,
-            )
-            logging.error(f"Error during cache hit: {e}")
-            result = None
+        result, exception, total_time = LocustCache._call(self, "get_value_{}".format(name), cache_connection.get, key)
+        length = value_length(result)
+        self.user.environment.events.request.fire(
+            request_type="Redis",
+            name="get_value_{}".format(name),
+            response_time=total_time,
+            response_length=length,
+            context={},
+            exception=exception,
+        )
+        if exception is not None:
+            logging.error(f"Error during cache hit: {exception}")
+        LocustCache._fire_node(self, "get_value_{}".format(name), key, total_time, exception, length)
+        if queue_delay is not None:
+            LocustCache._fire_corrected(self, "get_value_{}".format(name), total_time, queue_delay, exception)
         return result
 
-    @retry(
-        stop=stop_after_attempt(int(os.environ.get("RETRY_ATTEMPTS", 3))),
-        wait=wait_fixed(int(os.environ.get("RETRY_WAIT", 5))),
-        retry=retry_if_exception_type((TimeoutError, ConnectionError, ClusterDownError)),
-    )
-    def locust_redis_set(self, cache_connection, key, value, name, ttl):
+    def locust_redis_set(self, cache_connection, key, value, name, ttl, queue_delay=None):
         """
-        Performs a SET operation on the Redis cluster with retry logic.
+        Performs a SET operation on the Redis cluster, retried per the environment's retry policy.
         
         Args:
             self: Locust task instance.
             redis_connection (RedisCluster): Redis cluster connection object.
             key (str): Key to set in Redis.
-            value (str): Value to set in Redis.
+            value (str | bytes | memoryview): Value to set in Redis.
             name (str): Name for the request event.
             ttl (int): Time-to-live for the key in seconds.
+            queue_delay (float): Open-loop queue delay in milliseconds.
         
         Returns:
             bool: True if the operation was successful, False otherwise.
         """
+        result, exception, total_time = LocustCache._call(self, "set_value_{}".format(name), cache_connection.set, key, value, ex=int(ttl))
+        length = value_length(value)
+        self.user.environment.events.request.fire(
+            request_type="Redis",
+            name="set_value_{}".format(name),
+            response_time=total_time,
+            response_length=length,
+            context={},
+            exception=exception,
+        )
+        if exception is not None:
+            logging.error(f"Error during cache set: {exception}")
+        LocustCache._fire_node(self, "set_value_{}".format(name), key, total_time, exception, length)
+        if queue_delay is not None:
+            LocustCache._fire_corrected(self, "set_value_{}".format(name), total_time, queue_delay, exception)
+        return result
+
+    def locust_redis_pipeline_get(self, cache_connection, keys, names, queue_delay=None):
+        """
+        Performs a batch of GET operations through a single cluster pipeline.
+
+        One "get_value_<name>" event is fired per command with the latency of the whole
+        pipeline, since every command waits for the full round trip, and one "get_batch"
+        event of type "RedisBatch" for the pipeline itself.
+
+        Args:
+            self: Locust task instance.
+            cache_connection (RedisCluster): Redis cluster connection object.
+            keys (list): Keys to get from Redis.
+            names (list): Name for the request event of each key.
+            queue_delay (float): Open-loop queue delay in milliseconds.
+
+        Returns:
+            list: Values from Redis, None for missing keys and failed commands.
+        """
+        def execute():
+            pipe = cache_connection.pipeline(transaction=False)
+            for key in keys:
+                pipe.get(key)
+            return pipe.execute(raise_on_error=False)
+
+        results, batch_exception, total_time = LocustCache._call(self, "get_batch", execute)
+        if batch_exception is not None:
+            logging.error(f"Error during cache hit batch: {batch_exception}")
+            results = [batch_exception] * len(keys)
+        LocustCache._fire_batch_events(self, "get", names, results, total_time, batch_exception, queue_delay, keys)
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    def locust_redis_pipeline_set(self, cache_connection, items, names, ttl, queue_delay=None):
+        """
+        Performs a batch of SET operations through a single cluster pipeline.
+
+        Args:
+            self: Locust task instance.
+            cache_connection (RedisCluster): Redis cluster connection object.
+            items (list): (key, value) pairs to set in Redis.
+            names (list): Name for the request event of each key.
+            ttl (int): Time-to-live for the keys in seconds.
+            queue_delay (float): Open-loop queue delay in milliseconds.
+
+        Returns:
+            list: Result of each SET, None for failed commands.
+        """
+        def execute():
+            pipe = cache_connection.pipeline(transaction=False)
+            for key, value in items:
+                pipe.set(key, value, ex=int(ttl))
+            return pipe.execute(raise_on_error=False)
+
+        results, batch_exception, total_time = LocustCache._call(self, "set_batch", execute)
+        if batch_exception is not None:
+            logging.error(f"Error during cache set batch: {batch_exception}")
+            results = [batch_exception] * len(items)
+        LocustCache._fire_batch_events(self, "set", names, results, total_time, batch_exception, queue_delay,
+                                       [key for key, _ in items], [value_length(value) for _, value in items])
+        return [None if isinstance(result, Exception) else result for result in results]
+
+    def _call(self, name, command, *args, **kwargs):
+        """
+        Runs a command, handing failures to the retry policy of the environment.
+
+        A successful command costs one breaker check; the policy is only consulted
+        once the command has raised. The command is timed from its first attempt to
+        its final outcome, backoff included, as the caller waits for all of it; every
+        retry is also reported on its own as "<name>_retry" by the policy.
+
+        Args:
+            self: Locust task instance.
+            name (str): Request name of the command, for the retry events.
+            command (callable): Command to run.
+            *args: Positional arguments of the command.
+            **kwargs: Keyword arguments of the command.
+
+        Returns:
+            tuple: (result, None, response_time) on success, (None, exception, response_time)
+            on failure, with the outcome of the last attempt and the latency in milliseconds.
+        """
+        policy = self.user.environment.retry_policy
+        if policy is not None and policy.open_until:
+            exception = policy.reject()
+            if exception is not None:
+                return None, exception, 0.0
         start_time = time.perf_counter()
         try:
-            result = cache_connection.set(key, value, ex=int(ttl))
-            total_time = (time.perf_counter() - start_time) * 1000
-            self.user.environment.events.request.fire(
-                request_type="Redis",
-                name="set_value_{}".format(name),
-                response_time=total_time,
-                response_length=0,
-                context={},
-                exception=None,
-            )
+            result = command(*args, **kwargs)
+            return result, None, (time.perf_counter() - start_time) * 1000
         except Exception as e:
-            total_time = (time.perf_counter() - start_time) * 1000
-            self.user.environment.events.request.fire(
+            if policy is None:
+                return None, e, (time.perf_counter() - start_time) * 1000
+            result, exception = policy.retry(self, name, e, command, args, kwargs)
+            return result, exception, (time.perf_counter() - start_time) * 1000
+
+    def _fire_batch_events(self, command, names, results, total_time, batch_exception, queue_delay=None, keys=None,
+                           lengths=None):
+        """
+        Fires the per-batch and per-command request events for a pipeline.
+
+        Every command is reported with the latency of the whole pipeline, as it only
+        completes with the pipeline; this is the convention of the asyncio engine too,
+        so batch and non-batch runs of both engines compare directly. The batch event is
+        of type "RedisBatch", so it is not counted with the "Redis" commands. The response
+        length of every command is its payload size, and the one of the batch the total of
+        its commands. With a queue delay, the batch and every command also get their
+        coordinated-omission corrected event.
+
+        Args:
+            self: Locust task instance.
+            command (str): Command name, "get" or "set".
+            names (list): Name for the request event of each command.
+            results (list): Pipeline results, exceptions for failed commands.
+            total_time (float): Latency of the whole pipeline in milliseconds.
+            batch_exception (Exception): Error raised by the pipeline itself, if any.
+            queue_delay (float): Open-loop queue delay in milliseconds.
+            keys (list): Key of each command, for the per-node events.
+            lengths (list): Payload size of each command, the size of its result by default.
+        """
+        if lengths is None:
+            lengths = [value_length(result) for result in results]
+        fire = self.user.environment.events.request.fire
+        fire(
+            request_type="RedisBatch",
+            name="{}_batch".format(command),
+            response_time=total_time,
+            response_length=sum(lengths),
+            context={},
+            exception=batch_exception,
+        )
+        if queue_delay is not None:
+            LocustCache._fire_corrected(self, "{}_batch".format(command), total_time, queue_delay, batch_exception,
+                                        request_type="RedisBatch")
+        for name, result, length in zip(names, results, lengths):
+            fire(
                 request_type="Redis",
-                name="set_value_{}".format(name),
+                name="{}_value_{}".format(command, name),
                 response_time=total_time,
-                response_length=0,
+                response_length=length,
                 context={},
-                exception=e,
+                exception=result if isinstance(result, Exception) else None,
             )
-            logging.error(f"Error during cache set: {e}")
-            result = None
+            if queue_delay is not None:
+                LocustCache._fire_corrected(self, "{}_value_{}".format(command, name), total_time, queue_delay,
+                                            result if isinstance(result, Exception) else None)
+        if keys is not None and self.user.environment.node_tagger is not None:
+            for name, key, result, length in zip(names, keys, results, lengths):
+                LocustCache._fire_node(self, "{}_value_{}".format(command, name), key, total_time,
+                                       result if isinstance(result, Exception) else None, length)
+
+    def _fire_node(self, name, key, total_time, exception, length=0):
+        """
+        Fires the per-node event of a request when --node-breakdown is enabled.
+
+        The event is named "<name>@<host:port>" (plus the slot range in slot mode) with
+        request type "RedisNode", so every node gets its own stats and histogram.
+
+        Args:
+            self: Locust task instance.
+            name (str): Name of the request event.
+            key (str): Key of the request.
+            total_time (float): Latency in milliseconds.
+            exception (Exception): Error of the request, if any.
+            length (int): Payload size of the request in bytes.
+        """
+        tagger = self.user.environment.node_tagger
+        if tagger is None:
+            return
+        self.user.environment.events.request.fire(
+            request_type="RedisNode",
+            name="{}@{}".format(name, tagger.tag(key)),
+            response_time=total_time,
+            response_length=length,
+            context={},
+            exception=exception,
+        )
+
+    def _fire_corrected(self, name, total_time, queue_delay, exception, request_type="Redis"):
+        """
+        Fires the coordinated-omission corrected event of a request.
+
+        The corrected latency is measured from the intended send time of the open-loop
+        schedule, i.e. the uncorrected latency plus the time the request was queued.
+
+        Args:
+            self: Locust task instance.
+            name (str): Name of the uncorrected request event.
+            total_time (float): Uncorrected latency in milliseconds.
+            queue_delay (float): Queue delay in milliseconds.
+            exception (Exception): Error of the request, if any.
+            request_type (str): Request type of the uncorrected event.
+        """
+        self.user.environment.events.request.fire(
+            request_type=request_type,
+            name="{}_corrected".format(name),
+            response_time=total_time + queue_delay,
+            response_length=0,
+            context={},
+            exception=exception,
+        )
+
+    def locust_redis_command(self, name, command, *args, queue_delay=None, payload_length=None, **kwargs):
+        """
+        Runs an arbitrary cache command and records it as a request event.
+
+        Args:
+            self: Locust task instance.
+            name (str): Name for the request event.
+            command (callable): Bound client method, e.g. ``cache_connection.hgetall``.
+            *args: Positional arguments of the command.
+            queue_delay (float): Open-loop queue delay in milliseconds.
+            payload_length (int): Response length to report, the size of the result by default.
+            **kwargs: Keyword arguments of the command.
+
+        Returns:
+            object: Result of the command, None on failure.
+        """
+        result, exception, total_time = LocustCache._call(self, name, command, *args, **kwargs)
+        if exception is not None:
+            logging.error(f"Error during {name}: {exception}")
+        self.user.environment.events.request.fire(
+            request_type="Redis",
+            name=name,
+            response_time=total_time,
+            response_length=value_length(result) if payload_length is None else payload_length,
+            context={},
+            exception=exception,
+        )
+        if queue_delay is not None:
+            LocustCache._fire_corrected(self, name, total_time, queue_delay, exception)
         return result
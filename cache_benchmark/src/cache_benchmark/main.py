@@ -1,77 +1,122 @@
 import argparse
-import os
+import dataclasses
+import json
 import sys
-from cache_benchmark.utils import set_env_vars, set_env_cache_retry, generate_string, init_cache_set, locust_runner_cash_benchmark, locust_master_runner_benchmark, locust_worker_runner_benchmark
-from cache_benchmark.args import add_common_arguments
+from cache_benchmark.utils import async_runner_cash_benchmark, init_cache_set, locust_runner_cash_benchmark, locust_master_runner_benchmark, locust_worker_runner_benchmark, preload_value, replay_runner_cash_benchmark
+from cache_benchmark.args import add_common_arguments, add_replay_arguments, add_selfbench_arguments
 from cache_benchmark.cash_connect import CacheConnect
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.nodes import get_node_tagger
+from cache_benchmark.retry import RetryPolicy
+from cache_benchmark.topology import ClusterConnectionManager
 from cache_benchmark.scenario import RedisUser
+from cache_benchmark.replay import convert_trace
+from cache_benchmark.selfbench import report_selfbench, run_selfbench
+from cache_benchmark.workload import load_workload_file
 import locust
 import logging
+import yaml
 
 logger = logging.getLogger(__name__)
 logging.basicConfig(level=logging.DEBUG)
 
 @locust.events.init.add_listener
 def on_locust_init(environment, **kwargs):
-    cache = CacheConnect()
+    manager = ClusterConnectionManager(environment, environment.benchmark_config)
     if kwargs.get('cache_type'):
         if kwargs.get('cache_type') == "redis_cluster":
             logger.info("Locust environment redis_conn initialized.")
-            environment.cache_conn = cache.redis_connect()
+            environment.cache_conn = manager.connect()
         elif kwargs.get('cache_type') == "valkey_cluster":
             logger.info("Locust environment valkey_conn initialized.")
-            environment.cache_conn = cache.valkey_connect()
+            environment.cache_conn = manager.connect()
+    environment.node_tagger = get_node_tagger(environment, environment.benchmark_config.node_breakdown)
+    environment.retry_policy = RetryPolicy.from_config(environment.benchmark_config)
 
 
+def load_config(args, cache_type):
+    """
+    Builds the benchmark config and loads the --workload file into it as canonical
+    JSON text, so that the definition reaches the workers with the rest of the config.
+    """
+    try:
+        config = BenchmarkConfig.from_args(args, cache_type)
+        if config.workload_file:
+            workload = load_workload_file(config.workload_file)
+            config = dataclasses.replace(config, workload=json.dumps(workload, sort_keys=True))
+        return config
+    except (OSError, ValueError, yaml.YAMLError) as e:
+        logger.error(f"Invalid configuration: {e}")
+        sys.exit(1)
+
 def redis_load_test(args):
-    set_env_vars(args)
-    set_env_cache_retry(args)
-    locust_runner_cash_benchmark(args,RedisUser)
+    config = load_config(args, "redis_cluster")
+    if args.engine == "asyncio":
+        async_runner_cash_benchmark(args, config)
+        return
+    locust_runner_cash_benchmark(args, RedisUser, config)
 
 def valkey_load_test(args):
-    set_env_vars(args)
-    set_env_cache_retry(args)
-    locust_runner_cash_benchmark(args,RedisUser)
+    config = load_config(args, "valkey_cluster")
+    if args.engine == "asyncio":
+        async_runner_cash_benchmark(args, config)
+        return
+    locust_runner_cash_benchmark(args, RedisUser, config)
 
-def cluster_redis_load_test(args):
+def cluster_load_test(args, cache_type):
     if args.cluster_mode is None:
         logger.error("Cluster mode not provided.")
         logger.error("Please provide the --cluster-mode. master or worker")
         sys.exit(1)
     if args.cluster_mode == "master":
-        set_env_vars(args)
-        set_env_cache_retry(args)
-        locust_master_runner_benchmark(args,RedisUser)
+        config = load_config(args, cache_type)
+        locust_master_runner_benchmark(args, RedisUser, config)
     elif args.cluster_mode == "worker":
-        set_env_vars(args)
-        set_env_cache_retry(args)
-        locust_worker_runner_benchmark(args,RedisUser)
+        config = load_config(args, cache_type)
+        locust_worker_runner_benchmark(args, RedisUser, config)
     else:
         logger.error("Invalid cluster mode provided.")
         logger.error("Please provide the --cluster-mode. master or worker")
         sys.exit(1)
 
+def cluster_redis_load_test(args):
+    cluster_load_test(args, "redis_cluster")
+
+def cluster_valkey_load_test(args):
+    cluster_load_test(args, "valkey_cluster")
+
+def replay_redis_load_test(args):
+    replay_runner_cash_benchmark(args, load_config(args, "redis_cluster"))
+
+def replay_valkey_load_test(args):
+    replay_runner_cash_benchmark(args, load_config(args, "valkey_cluster"))
+
+def replay_convert(args):
+    convert_trace(args.trace, args.output)
+
+def selfbench(args):
+    config = load_config(args, "redis_cluster")
+    report_selfbench(run_selfbench(config, args.iterations))
+
 def init_valkey_load_test(args):
-    set_env_vars(args)
-    set_env_cache_retry(args)
-    cache = CacheConnect()
-    cache_client = cache.valkey_connect()
+    config = load_config(args, "valkey_cluster")
+    cache = CacheConnect(config)
+    cache_client = cache.connect()
     if cache_client is None:
         logger.error("Redis client initialization failed.")
         sys.exit(1)
-    value = generate_string(args.value_size)
-    init_cache_set(cache_client, value, int(os.environ["TTL"]))
+    value = preload_value(config)
+    init_cache_set(cache_client, value, config.ttl, config.set_keys, args.preload_batch_size, args.preload_concurrency)
 
 def init_redis_load_test(args):
-    set_env_vars(args)
-    set_env_cache_retry(args)
-    cache = CacheConnect()
-    cache_client = cache.redis_connect()
+    config = load_config(args, "redis_cluster")
+    cache = CacheConnect(config)
+    cache_client = cache.connect()
     if cache_client is None:
         logger.error("Redis client initialization failed.")
         sys.exit(1)
-    value = generate_string(args.value_size)
-    init_cache_set(cache_client, value, int(os.environ["TTL"]))
+    value = preload_value(config)
+    init_cache_set(cache_client, value, config.ttl, config.set_keys, args.preload_batch_size, args.preload_concurrency)
 
 def main():
     parser = argparse.ArgumentParser(
@@ -102,6 +147,25 @@ def main():
     # loadtest cluster valkey subcommand
     local_valkey_parser = local_subparsers.add_parser("valkey", help="Run Cluster test on Valkey locally")
     add_common_arguments(local_valkey_parser)
+    local_valkey_parser.set_defaults(func=cluster_valkey_load_test)
+    # loadtest replay subcommand
+    replay_parser = loadtest_subparsers.add_parser("replay", help="Replay a captured command trace")
+    replay_subparsers = replay_parser.add_subparsers(dest="subcommand")
+    # loadtest replay redis subcommand
+    replay_redis_parser = replay_subparsers.add_parser("redis", help="Replay a trace on Redis")
+    add_common_arguments(replay_redis_parser)
+    add_replay_arguments(replay_redis_parser)
+    replay_redis_parser.set_defaults(func=replay_redis_load_test)
+    # loadtest replay valkey subcommand
+    replay_valkey_parser = replay_subparsers.add_parser("valkey", help="Replay a trace on Valkey")
+    add_common_arguments(replay_valkey_parser)
+    add_replay_arguments(replay_valkey_parser)
+    replay_valkey_parser.set_defaults(func=replay_valkey_load_test)
+    # loadtest replay convert subcommand
+    replay_convert_parser = replay_subparsers.add_parser("convert", help="Convert MONITOR output to a binary trace")
+    replay_convert_parser.add_argument("--trace", "-T", type=str, required=True, help="Specify the MONITOR output file.")
+    replay_convert_parser.add_argument("--output", "-o", type=str, required=True, help="Specify the binary trace file to write.")
+    replay_convert_parser.set_defaults(func=replay_convert)
 
     # init subcommand
     init_parser = subparsers.add_parser("init", help="Initialization commands")
@@ -115,6 +179,12 @@ def main():
     add_common_arguments(init_valkey_parser)
     init_valkey_parser.set_defaults(func=init_valkey_load_test)
 
+    # selfbench subcommand
+    selfbench_parser = subparsers.add_parser("selfbench", help="Measure the overhead of the load generator without a cache server")
+    add_common_arguments(selfbench_parser)
+    add_selfbench_arguments(selfbench_parser)
+    selfbench_parser.set_defaults(func=selfbench, subcommand="selfbench")
+
     args = parser.parse_args()
     if args.command and args.subcommand:
         args.func(args)
@@ -0,0 +1,335 @@
+import json
+import logging
+import time
+from collections import deque
+import gevent
+from locust.runners import WORKER_REPORT_INTERVAL, MasterRunner
+from cache_benchmark.server_metrics import discover_nodes
+
+# Bytes a key costs on top of its name and value when no MEMORY USAGE sample is
+# available: dict entry, object header, SDS headers and the expires entry.
+ESTIMATED_KEY_OVERHEAD = 80
+SAMPLE_INTERVAL = 10.0
+SAMPLE_KEYS = 16
+
+
+class TtlBucket:
+    """
+    Keys written with one TTL: the writes of every interval are kept until they
+    expire, so the live keys and bytes are known at any time without tracking keys.
+    """
+
+    def __init__(self, ttl):
+        """
+        Args:
+            ttl (int): TTL of the keys in seconds.
+        """
+        self.ttl = ttl
+        self.writes = 0
+        self.bytes = 0
+        self.expired = 0
+        self.expired_bytes = 0
+        self.window = deque()
+        self.sample_keys = deque(maxlen=SAMPLE_KEYS)
+        self.memory_usage = []
+
+    def add(self, now, writes, length):
+        self.writes += writes
+        self.bytes += length
+        self.window.append((now, writes, length))
+
+    def expire(self, now):
+        while self.window and self.window[0][0] + self.ttl <= now:
+            _, writes, length = self.window.popleft()
+            self.expired += writes
+            self.expired_bytes += length
+
+    @property
+    def live_keys(self):
+        return self.writes - self.expired
+
+    def bytes_per_key(self):
+        """
+        Returns:
+            float: Mean MEMORY USAGE of the sampled keys, or their key and value size
+            plus ESTIMATED_KEY_OVERHEAD when the server was not sampled.
+        """
+        if self.memory_usage:
+            return sum(self.memory_usage) / len(self.memory_usage)
+        if not self.writes:
+            return 0.0
+        return self.bytes / self.writes + ESTIMATED_KEY_OVERHEAD
+
+
+class KeyspaceTracker:
+    """
+    Tracks the keys the benchmark writes and expires per TTL bucket, samples the
+    memory of the server, and projects the steady-state memory and eviction pressure.
+
+    Every SET is counted through ``record`` with its TTL and size. Every key written
+    is assumed to be new (the scenario only writes after a GET missed), so by Little's
+    law a TTL bucket settles at ``write rate x TTL`` live keys once the run is longer
+    than its TTL. A key costs its mean MEMORY USAGE, sampled on recently written keys.
+    Workers attach their counts to the ``report_to_master`` payload and the master
+    merges them, like the hit-rate controller. INFO of every primary is polled every
+    SAMPLE_INTERVAL seconds for used_memory, maxmemory and the evicted and expired
+    keys. The tracker is reachable as ``environment.keyspace_tracker``.
+    """
+
+    def __init__(self, environment):
+        """
+        Args:
+            environment (Environment): Locust environment.
+        """
+        self.environment = environment
+        self.pending = {}
+        self.pending_keys = {}
+        self.buckets = {}
+        self.samples = []
+        self.clients = {}
+        self.start_time = time.monotonic()
+        self.greenlet = None
+        environment.keyspace_tracker = self
+        environment.events.report_to_master.add_listener(self.on_report_to_master)
+        environment.events.worker_report.add_listener(self.on_worker_report)
+
+    def record(self, key, ttl, length):
+        """
+        Counts a SET.
+
+        Args:
+            key (str | bytes): Key written.
+            ttl (int): TTL in seconds.
+            length (int): Value size in bytes.
+        """
+        counts = self.pending.get(ttl)
+        if counts is None:
+            counts = self.pending[ttl] = [0, 0]
+            self.pending_keys[ttl] = deque(maxlen=SAMPLE_KEYS)
+        counts[0] += 1
+        counts[1] += length + len(key)
+        self.pending_keys[ttl].append(key)
+
+    def on_report_to_master(self, client_id, data, **kwargs):
+        if not self.pending:
+            return
+        data["keyspace"] = {
+            "writes": self.pending,
+            "keys": {ttl: list(keys) for ttl, keys in self.pending_keys.items()},
+        }
+        self.pending = {}
+        self.pending_keys = {}
+
+    def on_worker_report(self, client_id, data, **kwargs):
+        report = data.get("keyspace")
+        if not report:
+            return
+        for ttl, (writes, length) in report["writes"].items():
+            counts = self.pending.setdefault(int(ttl), [0, 0])
+            counts[0] += writes
+            counts[1] += length
+        for ttl, keys in report["keys"].items():
+            self.pending_keys.setdefault(int(ttl), deque(maxlen=SAMPLE_KEYS)).extend(keys)
+
+    def step(self, now=None):
+        """
+        Moves the writes counted since the previous step into their TTL buckets and
+        expires the writes older than their TTL.
+
+        Args:
+            now (float): Monotonic time of the step, the current time by default.
+        """
+        now = time.monotonic() if now is None else now
+        pending, pending_keys = self.pending, self.pending_keys
+        self.pending = {}
+        self.pending_keys = {}
+        for ttl, (writes, length) in pending.items():
+            bucket = self.buckets.get(ttl)
+            if bucket is None:
+                bucket = self.buckets[ttl] = TtlBucket(ttl)
+            bucket.add(now, writes, length)
+            bucket.sample_keys.extend(pending_keys.get(ttl, ()))
+        for bucket in self.buckets.values():
+            bucket.expire(now)
+
+    def sample(self):
+        """
+        Polls INFO on every primary and MEMORY USAGE of the recently written keys.
+        """
+        discover_nodes(self.environment, self.clients)
+        primaries = [client for role, client in self.clients.values() if role == "primary"]
+        jobs = [gevent.spawn(self._info, client) for client in primaries]
+        gevent.joinall(jobs, timeout=SAMPLE_INTERVAL)
+        infos = [job.value for job in jobs if job.successful() and job.value]
+        cache_conn = getattr(self.environment, "cache_conn", None)
+        if cache_conn is not None:
+            for bucket in self.buckets.values():
+                for key in list(bucket.sample_keys):
+                    try:
+                        usage = cache_conn.memory_usage(key)
+                    except Exception as e:
+                        logging.debug(f"MEMORY USAGE failed: {e}")
+                        break
+                    if usage:
+                        bucket.memory_usage.append(usage)
+                bucket.sample_keys.clear()
+        if not infos:
+            return
+        maxmemory = [int(info.get("maxmemory", 0)) for info in infos]
+        self.samples.append({
+            "elapsed": round(time.monotonic() - self.start_time, 3),
+            "nodes": len(infos),
+            "used_memory": sum(int(info.get("used_memory", 0)) for info in infos),
+            "used_memory_startup": sum(int(info.get("used_memory_startup", 0)) for info in infos),
+            "maxmemory": sum(maxmemory) if all(maxmemory) else 0,
+            "maxmemory_policy": infos[0].get("maxmemory_policy"),
+            "evicted_keys": sum(int(info.get("evicted_keys", 0)) for info in infos),
+            "expired_keys": sum(int(info.get("expired_keys", 0)) for info in infos),
+            "keys": sum(value.get("keys", 0) for info in infos for key, value in info.items()
+                        if key.startswith("db") and isinstance(value, dict)),
+            "tracked_live_keys": sum(bucket.live_keys for bucket in self.buckets.values()),
+        })
+
+    def _info(self, client):
+        try:
+            return client.info()
+        except Exception as e:
+            logging.debug(f"INFO failed: {e}")
+            return None
+
+    def start(self, runner=None):
+        """
+        Starts stepping the buckets and sampling the server in a greenlet.
+
+        Args:
+            runner (Runner): Locust runner; a master steps at the worker report interval.
+        """
+        self.start_time = time.monotonic()
+        interval = WORKER_REPORT_INTERVAL if isinstance(runner, MasterRunner) else 1.0
+
+        def run():
+            last_sample = None
+            while True:
+                self.step()
+                if last_sample is None or time.monotonic() - last_sample >= SAMPLE_INTERVAL:
+                    last_sample = time.monotonic()
+                    self.sample()
+                gevent.sleep(interval)
+
+        self.greenlet = gevent.spawn(run)
+
+    def stop(self):
+        if self.greenlet is not None:
+            self.greenlet.kill()
+            self.greenlet = None
+        self.step()
+        try:
+            self.sample()
+        except Exception as e:
+            logging.warning(f"Cannot sample the server memory: {e}")
+        for _, client in self.clients.values():
+            client.close()
+        self.clients = {}
+
+    def request_rate(self):
+        """
+        Returns:
+            float: Measured rate of the cache requests, excluding the corrected entries.
+        """
+        requests = sum(entry.num_requests for (name, method), entry in self.environment.stats.entries.items()
+                       if method == "Redis" and not name.endswith("_corrected"))
+        return requests / max(time.monotonic() - self.start_time, 1e-9)
+
+    def projection(self, request_rate=None, target_rps=0):
+        """
+        Projects the steady state of the keyspace from the write rate of every TTL bucket.
+
+        Args:
+            request_rate (float): Measured request rate, to scale the projection to ``target_rps``.
+            target_rps (float): Request rate to project for, --target-rps; 0 to skip.
+
+        Returns:
+            dict: Projected keys and memory per bucket and in total, and the eviction pressure.
+        """
+        elapsed = max(time.monotonic() - self.start_time, 1e-9)
+        buckets = []
+        for ttl, bucket in sorted(self.buckets.items()):
+            write_rate = bucket.writes / elapsed
+            bytes_per_key = bucket.bytes_per_key()
+            buckets.append({
+                "ttl": ttl,
+                "writes": bucket.writes,
+                "expired": bucket.expired,
+                "live_keys": bucket.live_keys,
+                "write_rate": round(write_rate, 2),
+                "bytes_per_key": round(bytes_per_key, 1),
+                "measured": bool(bucket.memory_usage),
+                "steady_keys": round(write_rate * ttl),
+                "steady_memory": round(write_rate * ttl * bytes_per_key),
+                "settled": elapsed >= ttl,
+            })
+        first = self.samples[0] if self.samples else {}
+        last = self.samples[-1] if self.samples else {}
+        baseline = last.get("used_memory_startup", 0)
+        steady_memory = baseline + sum(bucket["steady_memory"] for bucket in buckets)
+        maxmemory = last.get("maxmemory", 0)
+        result = {
+            "elapsed": round(elapsed, 3),
+            "buckets": buckets,
+            "baseline_memory": baseline,
+            "steady_keys": sum(bucket["steady_keys"] for bucket in buckets),
+            "steady_memory": steady_memory,
+            "settles_after": max((bucket["ttl"] for bucket in buckets), default=0),
+            "maxmemory": maxmemory,
+            "maxmemory_policy": last.get("maxmemory_policy"),
+            "eviction_pressure": round(steady_memory / maxmemory, 3) if maxmemory else None,
+            "observed_used_memory": last.get("used_memory"),
+            "observed_evicted_keys": last.get("evicted_keys", 0) - first.get("evicted_keys", 0),
+            "observed_expired_keys": last.get("expired_keys", 0) - first.get("expired_keys", 0),
+            "time_to_maxmemory": None,
+        }
+        if len(self.samples) > 1 and maxmemory:
+            growth = (last["used_memory"] - first["used_memory"]) / max(last["elapsed"] - first["elapsed"], 1e-9)
+            if growth > 0 and last["used_memory"] < maxmemory:
+                result["time_to_maxmemory"] = round((maxmemory - last["used_memory"]) / growth, 1)
+        if target_rps and request_rate:
+            scale = target_rps / request_rate
+            result["target_rps"] = target_rps
+            result["target_steady_memory"] = round(baseline + (steady_memory - baseline) * scale)
+            result["target_eviction_pressure"] = (
+                round(result["target_steady_memory"] / maxmemory, 3) if maxmemory else None)
+        return result
+
+    def export(self, prefix, config):
+        """
+        Logs the projection and writes it, with the server samples, to <prefix>_memory.json.
+
+        Args:
+            prefix (str): Path prefix of the result files.
+            config (BenchmarkConfig): Benchmark config, for the scenario it was measured with.
+        """
+        request_rate = self.request_rate()
+        projection = self.projection(request_rate, config.target_rps)
+        for bucket in projection["buckets"]:
+            logging.info(f"TTL {bucket['ttl']}s: {bucket['writes']:,} keys written, {bucket['expired']:,} expired, "
+                         f"{bucket['write_rate']:,} keys/s x {bucket['bytes_per_key']:,.0f} B/key "
+                         f"-> {bucket['steady_keys']:,} keys, {bucket['steady_memory'] / 2 ** 20:,.1f} MiB at steady state.")
+        message = (f"Projected steady-state memory: {projection['steady_memory'] / 2 ** 20:,.1f} MiB "
+                   f"after {projection['settles_after']}s")
+        if projection["eviction_pressure"] is not None:
+            message += f", {projection['eviction_pressure']:.0%} of maxmemory"
+            if projection["eviction_pressure"] > 1:
+                message += f" - evictions expected ({projection['maxmemory_policy']})"
+        logging.info(message + ".")
+        filename = f"{prefix}_memory.json"
+        with open(filename, mode="w") as file:
+            json.dump({
+                "hit_rate": config.hit_rate,
+                "ttl": config.ttl,
+                "value_size": config.value_size,
+                "value_size_dist": config.value_size_dist,
+                "request_rate": round(request_rate, 2) if request_rate else None,
+                "projection": projection,
+                "samples": self.samples,
+            }, file, indent=2)
+        logging.info(f"Keyspace memory report saved to {filename}.")
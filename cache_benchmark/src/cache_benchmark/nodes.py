@@ -0,0 +1,83 @@
+import logging
+import time
+from redis.crc import REDIS_CLUSTER_HASH_SLOTS, key_slot
+
+NODE_BREAKDOWNS = ("off", "node", "slot")
+SLOT_RANGE_SIZE = 1024
+# Slot ownership only changes on resharding or failover, so the routing of every slot
+# is cached and looked up again at most this often.
+ROUTING_CACHE_SECONDS = 5.0
+
+
+class NodeTagger:
+    """
+    Maps keys to the primary that owns their slot, for per-node request events.
+
+    With ``mode`` "node" a key is tagged ``host:port`` of the slot owner; with "slot"
+    the tag also carries the SLOT_RANGE_SIZE wide slot range of the key, e.g.
+    ``host:port[0-1023]``. The tag is the slot owner, not the node that served the
+    request: with --read-from-replicas the client spreads reads over the replicas of
+    the slot, and asking it for the replica would advance its load balancer, so
+    those reads are reported under their primary.
+    The connection is read from ``environment.cache_conn`` on every refresh, so a
+    reconnect after a config change is picked up.
+    """
+
+    def __init__(self, environment, mode="node"):
+        """
+        Args:
+            environment (Environment): Locust environment holding ``cache_conn``.
+            mode (str): "node" or "slot".
+        """
+        self.environment = environment
+        self.mode = mode
+        self.slot_tags = [None] * REDIS_CLUSTER_HASH_SLOTS
+        self.refreshed = time.monotonic()
+
+    def _route(self, slot):
+        try:
+            node = self.environment.cache_conn.nodes_manager.get_node_from_slot(slot).name
+        except Exception as e:
+            logging.debug(f"No node found for slot {slot}: {e}")
+            node = "unknown"
+        if self.mode == "slot":
+            start = slot - slot % SLOT_RANGE_SIZE
+            return f"{node}[{start}-{start + SLOT_RANGE_SIZE - 1}]"
+        return node
+
+    def tag(self, key):
+        """
+        Returns:
+            str: Node (and slot range) tag of the key.
+        """
+        now = time.monotonic()
+        if now - self.refreshed > ROUTING_CACHE_SECONDS:
+            self.slot_tags = [None] * REDIS_CLUSTER_HASH_SLOTS
+            self.refreshed = now
+        slot = key_slot(key.encode() if isinstance(key, str) else key)
+        tag = self.slot_tags[slot]
+        if tag is None:
+            tag = self.slot_tags[slot] = self._route(slot)
+        return tag
+
+
+def get_node_tagger(environment, mode):
+    """
+    Returns a NodeTagger for the mode, or None when the breakdown is off.
+
+    Args:
+        environment (Environment): Locust environment holding ``cache_conn``.
+        mode (str): One of NODE_BREAKDOWNS.
+
+    Returns:
+        NodeTagger: Tagger, None for "off".
+    """
+    if mode == "off":
+        return None
+    if environment.benchmark_config.target != "cluster":
+        logging.warning("--node-breakdown only applies to cluster targets and is ignored.")
+        return None
+    if environment.benchmark_config.read_from_replicas:
+        logging.warning("--node-breakdown tags requests with the primary owning their slot; reads served by "
+                        "replicas with --read-from-replicas are reported under that primary.")
+    return NodeTagger(environment, mode)
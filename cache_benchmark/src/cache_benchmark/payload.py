@@ -0,0 +1,180 @@
+import bisect
+import csv
+import functools
+import itertools
+import logging
+import math
+import random
+
+SIZE_DISTRIBUTIONS = ("fixed", "uniform", "lognormal", "histogram")
+PAYLOAD_CONTENTS = ("repeated", "text", "random")
+SAMPLE_TABLE_SIZE = 4096
+
+
+def make_vocabulary(rng, count=512):
+    """
+    Returns:
+        list: ``count`` random lowercase words of 2 to 10 letters.
+    """
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return ["".join(rng.choice(letters) for _ in range(rng.randint(2, 10))) for _ in range(count)]
+
+
+def generate_content(content, size, seed=0):
+    """
+    Generates ``size`` bytes of payload content.
+
+    Args:
+        content (str): ``repeated`` (one repeated byte, compresses to almost nothing),
+            ``text`` (random words and numbers from a small vocabulary, which compresses
+            about 2.5x with zlib, like typical text) or ``random`` (incompressible).
+        size (int): Size in bytes.
+        seed (int): Seed of the generator, so the content is reproducible between runs.
+
+    Returns:
+        bytes: Content.
+    """
+    if content == "repeated":
+        return b"A" * size
+    rng = random.Random(seed)
+    if content == "random":
+        return rng.randbytes(size)
+    if content == "text":
+        words = make_vocabulary(rng)
+        # Zipf-like word frequencies, as in natural text.
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(words))))
+        parts = []
+        length = 0
+        while length < size:
+            word = rng.choices(words, cum_weights=cum_weights)[0] if rng.random() < 0.8 else str(rng.randrange(100000))
+            parts.append(word)
+            length += len(word) + 1
+        return " ".join(parts).encode()[:size]
+    raise ValueError(f"Unknown payload content: {content}")
+
+
+def load_size_histogram(path):
+    """
+    Loads a value-size histogram from a CSV file.
+
+    Every row is ``<size_in_bytes>,<weight>``. Blank lines and lines starting with
+    ``#`` are ignored.
+
+    Args:
+        path (str): Path to the histogram file.
+
+    Returns:
+        list: (size_in_bytes, weight) tuples.
+    """
+    histogram = []
+    with open(path, newline="") as f:
+        for row in csv.reader(f):
+            if not row or row[0].strip().startswith("#"):
+                continue
+            histogram.append((int(row[0]), float(row[1]) if len(row) > 1 else 1.0))
+    if not histogram:
+        raise ValueError(f"Value size histogram {path} is empty.")
+    return histogram
+
+
+def sample_sizes(distribution, value_size, value_size_min=0, value_size_max=None, sigma=0.5,
+                 histogram_file=None, count=SAMPLE_TABLE_SIZE, seed=0):
+    """
+    Draws a table of value sizes in bytes from the given distribution.
+
+    Args:
+        distribution (str): One of fixed, uniform, lognormal or histogram.
+        value_size (float): Value size in KB (fixed size, uniform upper bound, lognormal median).
+        value_size_min (float): Lower bound in KB for uniform and lognormal.
+        value_size_max (float): Upper bound in KB for lognormal (default: 16 x value_size).
+        sigma (float): Shape parameter of the lognormal distribution.
+        histogram_file (str): CSV file used by the histogram distribution.
+        count (int): Number of samples to draw.
+        seed (int): Seed of the sampler, so a table is reproducible between runs.
+
+    Returns:
+        list: Sizes in bytes.
+    """
+    rng = random.Random(seed)
+    size = int(float(value_size) * 1024)
+    size_min = int(float(value_size_min or 0) * 1024)
+    if distribution == "fixed":
+        return [size] * count
+    if distribution == "uniform":
+        return [rng.randint(size_min, max(size, size_min)) for _ in range(count)]
+    if distribution == "lognormal":
+        size_max = int(float(value_size_max) * 1024) if value_size_max else size * 16
+        mu = math.log(max(size, 1))
+        return [min(max(int(rng.lognormvariate(mu, sigma)), size_min), size_max) for _ in range(count)]
+    if distribution == "histogram":
+        if not histogram_file:
+            raise ValueError("The histogram value size distribution requires --value-size-file.")
+        histogram = load_size_histogram(histogram_file)
+        cumulative = []
+        total = 0.0
+        for _, weight in histogram:
+            total += weight
+            cumulative.append(total)
+        return [histogram[bisect.bisect_right(cumulative, rng.random() * total)][0] for _ in range(count)]
+    raise ValueError(f"Unknown value size distribution: {distribution}")
+
+
+class PayloadPool:
+    """
+    Preallocated, immutable value payloads.
+
+    A single buffer of the largest sampled size is allocated once; every payload is a
+    read-only memoryview slice of it, so picking a value on the request path allocates
+    nothing and sizes drawn from a distribution share the same memory.
+    """
+
+    def __init__(self, sizes, content="repeated"):
+        """
+        Args:
+            sizes (list): Table of payload sizes in bytes; payloads are drawn uniformly from it.
+            content (str): One of PAYLOAD_CONTENTS, see ``generate_content``.
+        """
+        if not sizes:
+            raise ValueError("PayloadPool requires at least one size.")
+        self.sizes = sizes
+        self._buffer = memoryview(generate_content(content, max(sizes))).toreadonly()
+        views = {size: self._buffer[:size] for size in set(sizes)}
+        self._table = [views[size] for size in sizes]
+        self._fixed = self._table[0] if len(views) == 1 else None
+        self.mean_size = sum(sizes) / len(sizes)
+
+    def next(self):
+        """
+        Returns the next payload.
+
+        Returns:
+            memoryview: Payload drawn from the size table.
+        """
+        if self._fixed is not None:
+            return self._fixed
+        return random.choice(self._table)
+
+
+@functools.lru_cache(maxsize=None)
+def get_payload_pool(distribution="fixed", value_size=1, value_size_min=0, value_size_max=None,
+                     sigma=0.5, histogram_file=None, content="repeated"):
+    """
+    Returns the process-wide payload pool for the given distribution, building it on first use.
+
+    Args:
+        distribution (str): One of fixed, uniform, lognormal or histogram.
+        value_size (float): Value size in KB.
+        value_size_min (float): Lower bound in KB.
+        value_size_max (float): Upper bound in KB.
+        sigma (float): Shape parameter of the lognormal distribution.
+        histogram_file (str): CSV file used by the histogram distribution.
+        content (str): One of PAYLOAD_CONTENTS.
+
+    Returns:
+        PayloadPool: Shared payload pool.
+    """
+    sizes = sample_sizes(distribution, value_size, value_size_min, value_size_max, sigma, histogram_file)
+    pool = PayloadPool(sizes, content)
+    logging.info(f"Payload pool ready: {distribution} distribution of {content} content, mean {pool.mean_size / 1024:.2f} KB, "
+                 f"max {max(sizes) / 1024:.2f} KB.")
+    return pool
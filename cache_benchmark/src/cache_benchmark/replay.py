@@ -0,0 +1,288 @@
+import logging
+import mmap
+import os
+import re
+import struct
+import time
+import gevent
+from gevent.pool import Pool
+from locust.stats import RequestStats
+from cache_benchmark.histogram import LatencyHistogram
+
+BINARY_TRACE_MAGIC = b"CBTRACE1"
+# Every INDEX_INTERVAL records the converter stores the record offset in an index at
+# the end of the file, so a shard can seek straight to its first record.
+INDEX_INTERVAL = 4096
+RECORD_HEADER = struct.Struct("<dI")
+ARG_LENGTH = struct.Struct("<I")
+OFFSET = struct.Struct("<Q")
+TRAILER = struct.Struct("<QQ")
+MONITOR_LINE = re.compile(rb'^(\d+\.\d+) \[\d+ ([^\]]*)\] (.*)$')
+MONITOR_ARG = re.compile(rb'"((?:[^"\\]|\\.)*)"')
+MONITOR_ESCAPE = re.compile(rb'\\(x[0-9a-fA-F]{2}|.)')
+MONITOR_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"a": b"\a", b"b": b"\b"}
+# Commands that only make sense for the capturing client or would damage the target.
+SKIPPED_COMMANDS = frozenset((
+    "AUTH", "CLIENT", "CLUSTER", "CONFIG", "DEBUG", "DISCARD", "EXEC", "FLUSHALL", "FLUSHDB", "HELLO",
+    "MONITOR", "MULTI", "QUIT", "READONLY", "READWRITE", "SELECT", "SHUTDOWN", "SUBSCRIBE", "UNWATCH", "WATCH",
+))
+
+
+def _unescape(match):
+    escape = match.group(1)
+    if len(escape) == 3:
+        return bytes((int(escape[1:], 16),))
+    return MONITOR_ESCAPES.get(escape, escape)
+
+
+def parse_monitor_line(line):
+    """
+    Parses one line of MONITOR output, e.g. ``1700000000.123456 [0 10.0.0.1:5000] "GET" "key_1"``.
+
+    Args:
+        line (bytes): Line without the trailing newline.
+
+    Returns:
+        tuple: (timestamp, [arguments as bytes]), or None for lines that are not commands
+        or were issued by a Lua script (those are replayed by the script itself).
+    """
+    match = MONITOR_LINE.match(line.rstrip(b"\r"))
+    if match is None or match.group(2) == b"lua":
+        return None
+    args = [arg if b"\\" not in arg else MONITOR_ESCAPE.sub(_unescape, arg)
+            for arg in MONITOR_ARG.findall(match.group(3))]
+    if not args:
+        return None
+    return float(match.group(1)), args
+
+
+def shard_range(start, end, shard_index, shard_count):
+    """
+    Returns the part of [start, end) owned by one shard.
+    """
+    size = end - start
+    return start + size * shard_index // shard_count, start + size * (shard_index + 1) // shard_count
+
+
+class MonitorTrace:
+    """
+    MONITOR text trace, memory-mapped and parsed lazily line by line.
+
+    A shard owns the lines that start inside its byte range, so the shards of one
+    trace never overlap and each one only touches its own part of the file.
+    """
+
+    def __init__(self, path, shard_index=0, shard_count=1):
+        self.path = path
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    def first_timestamp(self):
+        for timestamp, _ in self._records(0, 1):
+            return timestamp
+        return None
+
+    def __iter__(self):
+        return self._records(self.shard_index, self.shard_count)
+
+    def _records(self, shard_index, shard_count):
+        if os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            start, end = shard_range(0, size, shard_index, shard_count)
+            position = start
+            if start > 0:
+                # The line crossing the shard boundary belongs to the previous shard.
+                newline = data.find(b"\n", start - 1)
+                position = size if newline == -1 else newline + 1
+            while position < end:
+                newline = data.find(b"\n", position)
+                if newline == -1:
+                    newline = size
+                record = parse_monitor_line(data[position:newline])
+                if record is not None:
+                    yield record
+                position = newline + 1
+
+
+class BinaryTrace:
+    """
+    Compact binary trace written by ``convert_trace``.
+
+    Layout: magic, then records of ``<dI`` (timestamp, argument count) followed by
+    ``<I`` length prefixed arguments, then the record index (one ``<Q`` offset every
+    INDEX_INTERVAL records) and a ``<QQ`` trailer (index offset, record count).
+    """
+
+    def __init__(self, path, shard_index=0, shard_count=1):
+        self.path = path
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+
+    def first_timestamp(self):
+        for timestamp, _ in self._records(0, 1):
+            return timestamp
+        return None
+
+    def __iter__(self):
+        return self._records(self.shard_index, self.shard_count)
+
+    def _records(self, shard_index, shard_count):
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            index_offset, _ = TRAILER.unpack_from(data, len(data) - TRAILER.size)
+            chunks = (len(data) - TRAILER.size - index_offset) // OFFSET.size
+            first, last = shard_range(0, chunks, shard_index, shard_count)
+            if first == last:
+                return
+            position = OFFSET.unpack_from(data, index_offset + first * OFFSET.size)[0]
+            end = OFFSET.unpack_from(data, index_offset + last * OFFSET.size)[0] if last < chunks else index_offset
+            while position < end:
+                timestamp, argc = RECORD_HEADER.unpack_from(data, position)
+                position += RECORD_HEADER.size
+                args = []
+                for _ in range(argc):
+                    length = ARG_LENGTH.unpack_from(data, position)[0]
+                    position += ARG_LENGTH.size
+                    args.append(data[position:position + length])
+                    position += length
+                yield timestamp, args
+
+
+def open_trace(path, shard_index=0, shard_count=1):
+    """
+    Opens a MONITOR or binary trace, detected from the file header.
+
+    Args:
+        path (str): Trace file.
+        shard_index (int): Shard read by this worker, in [0, shard_count).
+        shard_count (int): Number of workers sharing the trace.
+
+    Returns:
+        MonitorTrace | BinaryTrace: Iterable of (timestamp, arguments) records.
+    """
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Shard index {shard_index} is out of range for {shard_count} shards.")
+    with open(path, "rb") as f:
+        binary = f.read(len(BINARY_TRACE_MAGIC)) == BINARY_TRACE_MAGIC
+    trace_class = BinaryTrace if binary else MonitorTrace
+    return trace_class(path, shard_index, shard_count)
+
+
+def convert_trace(source, destination):
+    """
+    Converts a MONITOR trace into the compact binary format, streaming both files.
+
+    Args:
+        source (str): MONITOR output file.
+        destination (str): Binary trace file to write.
+
+    Returns:
+        int: Number of records written.
+    """
+    index = []
+    count = 0
+    with open(destination, "wb", buffering=1 << 20) as out:
+        out.write(BINARY_TRACE_MAGIC)
+        position = len(BINARY_TRACE_MAGIC)
+        for timestamp, args in MonitorTrace(source):
+            if count % INDEX_INTERVAL == 0:
+                index.append(position)
+            record = [RECORD_HEADER.pack(timestamp, len(args))]
+            for arg in args:
+                record.append(ARG_LENGTH.pack(len(arg)))
+                record.append(arg)
+            record = b"".join(record)
+            out.write(record)
+            position += len(record)
+            count += 1
+        for offset in index:
+            out.write(OFFSET.pack(offset))
+        out.write(TRAILER.pack(position, count))
+    logging.info(f"Converted {count:,} commands from {source} to {destination}.")
+    return count
+
+
+class ReplayEngine:
+    """
+    Replays a trace through a cache connection.
+
+    A single reader greenlet walks the trace and hands every command to a pool of
+    ``concurrency`` greenlets. With ``speed`` > 0 commands are sent at their recorded
+    time divided by ``speed`` (1 keeps the original timing) and also recorded as
+    ``<command>_corrected`` from their intended send time; with ``speed`` 0 the trace
+    is replayed as fast as the pool allows.
+    """
+
+    def __init__(self, cache_conn, trace, speed=1.0, concurrency=1):
+        """
+        Args:
+            cache_conn: Cache connection from CacheConnect.
+            trace: Trace returned by ``open_trace``.
+            speed (float): Replay speed factor, 0 for as fast as possible.
+            concurrency (int): Number of commands in flight.
+        """
+        self.cache_conn = cache_conn
+        self.trace = trace
+        self.speed = float(speed)
+        self.pool = Pool(max(1, int(concurrency)))
+        self.stats = RequestStats()
+        self.histograms = {}
+        self.skipped = 0
+
+    def _record(self, name, response_time, exception):
+        self.stats.log_request("Redis", name, response_time, 0)
+        if exception is not None:
+            self.stats.log_error("Redis", name, exception)
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        histogram.record_ms(response_time)
+
+    def _execute(self, name, args, intended_time):
+        start_time = time.perf_counter()
+        try:
+            self.cache_conn.execute_command(*args)
+            exception = None
+        except Exception as e:
+            logging.debug(f"Error during replay of {name}: {e}")
+            exception = e
+        end_time = time.perf_counter()
+        self._record(name, (end_time - start_time) * 1000, exception)
+        if intended_time is not None:
+            self._record(f"{name}_corrected", (end_time - min(intended_time, start_time)) * 1000, exception)
+
+    def run(self, duration=0):
+        """
+        Replays the trace until its end or until ``duration`` seconds have passed.
+
+        Args:
+            duration (float): Maximum replay time in seconds, 0 for no limit.
+
+        Returns:
+            RequestStats: Recorded stats.
+        """
+        first_timestamp = self.trace.first_timestamp()
+        start_time = time.perf_counter()
+        deadline = start_time + duration if duration else None
+        sent = 0
+        logging.info(f"Starting replay at {'maximum' if not self.speed else f'{self.speed:g}x'} speed...")
+        for timestamp, args in self.trace:
+            command = args[0].decode("utf-8", "replace").upper()
+            if command in SKIPPED_COMMANDS:
+                self.skipped += 1
+                continue
+            intended_time = None
+            if self.speed:
+                intended_time = start_time + (timestamp - first_timestamp) / self.speed
+                delay = intended_time - time.perf_counter()
+                if delay > 0:
+                    gevent.sleep(delay)
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            self.pool.spawn(self._execute, command.lower(), [command, *args[1:]], intended_time)
+            sent += 1
+        self.pool.join()
+        logging.info(f"Replay completed: {sent:,} commands sent, {self.skipped:,} skipped "
+                     f"in {time.perf_counter() - start_time:.1f}s.")
+        return self.stats
@@ -0,0 +1,126 @@
+import json
+import logging
+import sys
+import gevent
+from cache_benchmark.timeseries import IntervalStats
+
+REPORT_SINKS = ("console", "jsonl")
+
+
+def parse_report_sinks(value):
+    """
+    Parses the --report value, a comma separated list of REPORT_SINKS or "none".
+
+    Args:
+        value (str): Option value.
+
+    Returns:
+        list: Sink names.
+    """
+    names = [name.strip() for name in str(value or "none").split(",") if name.strip()]
+    if names == ["none"]:
+        return []
+    for name in names:
+        if name not in REPORT_SINKS:
+            raise ValueError(f"Unknown report sink {name!r}, expected none or a list of {', '.join(REPORT_SINKS)}.")
+    return names
+
+
+class ConsoleSink:
+    """
+    Logs every interval as a table, one line per operation.
+    """
+    filename = None
+
+    def write(self, rows):
+        lines = [f"{'Type':<10} {'Name':<40} {'reqs':>9} {'fails':>7} {'req/s':>10} {'MB/s':>8} {'avg':>8} "
+                 f"{'p50':>6} {'p99':>6} {'p99.9':>6} {'max':>6}"]
+        for row in rows:
+            lines.append(
+                f"{row['type']:<10} {row['name'][:40]:<40} {row['requests']:>9} {row['failures']:>7} "
+                f"{row['rps']:>10.1f} {row['mb_per_sec']:>8.2f} {row['avg_ms'] or 0:>8.2f} {row['p50_ms'] or 0:>6} {row['p99_ms'] or 0:>6} "
+                f"{row['p999_ms'] or 0:>6} {row['max_ms'] or 0:>6}"
+            )
+        logging.info("Interval stats (ms):\n" + "\n".join(lines))
+
+    def close(self):
+        pass
+
+
+class StdoutJsonLinesSink:
+    """
+    Writes every row as a JSON line on stdout, for log shippers and ``jq``.
+    """
+    filename = None
+
+    def write(self, rows):
+        sys.stdout.write("".join(json.dumps(row) + "\n" for row in rows))
+        sys.stdout.flush()
+
+    def close(self):
+        pass
+
+
+def open_report_sinks(names):
+    """
+    Args:
+        names (list): Sink names returned by ``parse_report_sinks``.
+
+    Returns:
+        list: Sinks.
+    """
+    return [ConsoleSink() if name == "console" else StdoutJsonLinesSink() for name in names]
+
+
+class PeriodicReporter:
+    """
+    Reports the stats of every interval to a set of sinks from a greenlet.
+
+    The per-interval rows are computed once from the cumulative Locust stats (see
+    ``IntervalStats``) and handed to every sink, e.g. the console table, JSON lines
+    on stdout and a time-series file. Nothing is registered on the request event,
+    so reporting costs nothing per request.
+    """
+
+    def __init__(self, environment, sinks, interval=5.0):
+        """
+        Args:
+            environment (Environment): Locust environment whose stats are reported.
+            sinks (list): Objects with ``write(rows)`` and ``close()``.
+            interval (float): Reporting interval in seconds.
+        """
+        self.interval_stats = IntervalStats(environment.stats)
+        self.sinks = sinks
+        self.interval = interval
+        self.greenlet = None
+
+    def report(self):
+        rows = self.interval_stats.rows()
+        if not rows:
+            return
+        for sink in self.sinks:
+            try:
+                sink.write(rows)
+            except Exception as e:
+                logging.error(f"Stats report failed: {e}")
+
+    def start(self):
+        def run():
+            while True:
+                gevent.sleep(self.interval)
+                self.report()
+
+        self.greenlet = gevent.spawn(run)
+
+    def stop(self):
+        """
+        Reports the last partial interval and closes the sinks.
+        """
+        if self.greenlet is not None:
+            self.greenlet.kill()
+            self.greenlet = None
+        self.report()
+        for sink in self.sinks:
+            sink.close()
+            if sink.filename:
+                logging.info(f"Time-series stats saved to {sink.filename}.")
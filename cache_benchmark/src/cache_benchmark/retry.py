@@ -0,0 +1,164 @@
+import logging
+import random
+import time
+from redis.exceptions import ClusterDownError, ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
+from valkey.exceptions import (
+    ClusterDownError as ValkeyClusterDownError,
+    ConnectionError as ValkeyConnectionError,
+    TimeoutError as ValkeyTimeoutError,
+)
+
+RETRYABLE_ERRORS = (
+    TimeoutError,
+    ConnectionError,
+    RedisTimeoutError,
+    RedisConnectionError,
+    ClusterDownError,
+    ValkeyTimeoutError,
+    ValkeyConnectionError,
+    ValkeyClusterDownError,
+)
+BREAKER_WINDOW = 1.0
+BREAKER_COOLDOWN = 5.0
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of sending a command while the circuit breaker is open.
+    """
+
+
+class RetryPolicy:
+    """
+    Retries failed commands with jittered exponential backoff, within a retry budget,
+    behind a circuit breaker.
+
+    The policy is only consulted once a command has raised, so a successful command
+    pays nothing but the breaker check. Retryable errors (timeouts, connection errors,
+    cluster down) are retried up to ``retry_count`` times, sleeping a uniformly random
+    time up to ``retry_wait * 2 ** (attempt - 1)`` seconds ("full jitter"), so retries
+    from many users do not arrive in waves. A token bucket refilled at ``budget``
+    retries per second caps the extra load retries can add during an outage. When
+    ``breaker_threshold`` commands fail within one second the breaker opens and
+    commands fail fast with CircuitOpenError for BREAKER_COOLDOWN seconds. Every
+    retry is reported as a request of type "Retry" named "<name>_retry".
+    """
+
+    def __init__(self, retry_count=3, retry_wait=2.0, budget=10.0, breaker_threshold=0):
+        """
+        Args:
+            retry_count (int): Maximum number of retries per command.
+            retry_wait (float): Backoff base in seconds.
+            budget (float): Retries allowed per second in this process; 0 for no limit.
+            breaker_threshold (int): Failures per second that open the breaker; 0 disables it.
+        """
+        self.retry_count = max(0, int(retry_count))
+        self.retry_wait = max(0.0, float(retry_wait))
+        self.budget = float(budget)
+        self.tokens = self.budget
+        self.refilled = time.monotonic()
+        self.breaker_threshold = int(breaker_threshold)
+        self.failures = 0
+        self.window_start = 0.0
+        self.open_until = 0.0
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Args:
+            config (BenchmarkConfig): Benchmark config.
+
+        Returns:
+            RetryPolicy: Policy of --retry-count, --retry-wait, --retry-budget and --breaker-threshold.
+        """
+        return cls(config.retry_count, config.retry_wait, config.retry_budget, config.breaker_threshold)
+
+    def backoff(self, attempt):
+        """
+        Returns:
+            float: Seconds to wait before the given retry attempt, starting at 1.
+        """
+        return random.uniform(0, self.retry_wait * 2 ** (attempt - 1))
+
+    def take_token(self):
+        """
+        Takes one retry from the budget.
+
+        Returns:
+            bool: False when the budget is exhausted.
+        """
+        if not self.budget:
+            return True
+        now = time.monotonic()
+        self.tokens = min(self.budget, self.tokens + (now - self.refilled) * self.budget)
+        self.refilled = now
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def reject(self):
+        """
+        Checks the breaker before sending a command.
+
+        Returns:
+            CircuitOpenError: Error to report while the breaker is open, None otherwise.
+        """
+        if time.monotonic() < self.open_until:
+            return CircuitOpenError(f"Circuit breaker open after {self.breaker_threshold} failures in {BREAKER_WINDOW:g}s.")
+        self.open_until = 0.0
+        logging.info("Circuit breaker closed.")
+        return None
+
+    def record_failure(self):
+        if not self.breaker_threshold:
+            return
+        now = time.monotonic()
+        if now - self.window_start > BREAKER_WINDOW:
+            self.window_start = now
+            self.failures = 0
+        self.failures += 1
+        if self.failures >= self.breaker_threshold and not self.open_until:
+            self.open_until = now + BREAKER_COOLDOWN
+            self.failures = 0
+            logging.warning(f"Circuit breaker opened for {BREAKER_COOLDOWN:g}s.")
+
+    def retry(self, task, name, exception, command, args, kwargs):
+        """
+        Retries a command that raised ``exception``.
+
+        Args:
+            task: Locust task instance, used to fire the retry events.
+            name (str): Request name of the command.
+            exception (Exception): Error of the first attempt.
+            command (callable): Command to retry.
+            args (tuple): Positional arguments of the command.
+            kwargs (dict): Keyword arguments of the command.
+
+        Returns:
+            tuple: (result, None) after a successful retry, (None, last error) otherwise.
+        """
+        attempt = 0
+        while isinstance(exception, RETRYABLE_ERRORS) and attempt < self.retry_count:
+            if self.open_until or not self.take_token():
+                break
+            attempt += 1
+            time.sleep(self.backoff(attempt))
+            start_time = time.perf_counter()
+            try:
+                result = command(*args, **kwargs)
+                exception = None
+            except Exception as e:
+                exception = e
+            task.user.environment.events.request.fire(
+                request_type="Retry",
+                name="{}_retry".format(name),
+                response_time=(time.perf_counter() - start_time) * 1000,
+                response_length=0,
+                context={},
+                exception=exception,
+            )
+            if exception is None:
+                return result, None
+        self.record_failure()
+        return None, exception
@@ -1,18 +1,56 @@
 from gevent import monkey
 monkey.patch_all()
 
-import hashlib
-import os
 import logging
 from locust import User, TaskSet, task, between
-from cache_benchmark.locust_cache import LocustCache
-from cache_benchmark.utils import generate_string
+from cache_benchmark.locust_cache import LocustCache, value_length
+from cache_benchmark.keygen import get_key_chooser, get_miss_key_generator, key_bytes, key_name
+from cache_benchmark.codec import get_value_codec, get_value_pool
+from cache_benchmark.schedule import OpenLoopSchedule
+from cache_benchmark.workload import get_compiled_workload
 import random
-import time
 
 class RedisTaskSet(TaskSet):
     total_requests = 0
     cache_hits = 0
+    def on_start(self):
+        config = self.user.environment.benchmark_config
+        self.hit_rate = config.hit_rate
+        # Always measures the hit rate; only steers the key mix with --hit-rate-mode closed.
+        self.hit_rate_controller = getattr(self.user.environment, "hit_rate_controller", None)
+        self.closed_loop = self.hit_rate_controller is not None and config.hit_rate_mode == "closed"
+        self.keyspace_tracker = getattr(self.user.environment, "keyspace_tracker", None) if config.memory_report else None
+        self.ttl = config.ttl
+        self.batch_size = config.batch_size
+        self.keys = get_key_chooser(
+            config.key_distribution,
+            config.set_keys,
+            config.zipf_theta,
+            config.hotspot_fraction,
+            config.hotspot_op_fraction,
+        )
+        # --bytes-mode sends bytes keys, so the client does not encode them on every request.
+        self.key_name = key_bytes if config.bytes_mode else key_name
+        self.miss_keys = get_miss_key_generator(config.key_length, self.user.environment, config.bytes_mode)
+        self.workload = None
+        if config.workload:
+            self.workload = get_compiled_workload(config, self.user.environment)
+        self.schedule = None
+        if config.target_rps:
+            requests_per_task = 1 if self.workload is not None else config.batch_size
+            self.schedule = OpenLoopSchedule(config.target_rps, config.users, requests_per_task)
+        self.codec = get_value_codec(config.codec)
+        self.payloads = get_value_pool(
+            self.codec,
+            config.value_size_dist,
+            config.value_size,
+            config.value_size_min,
+            config.value_size_max,
+            config.value_size_sigma,
+            config.value_size_file,
+            config.payload_content,
+        )
+
     def on_stop(self):
         if self.__class__.total_requests > 0:
             hit_rate = (self.__class__.cache_hits / self.__class__.total_requests) * 100
@@ -23,29 +61,119 @@ class RedisTaskSet(TaskSet):
             logging.info("Total Requests: 0")
             logging.info("Cache Hit Rate: N/A")
 
+    def wait_time(self):
+        if self.schedule is not None:
+            return self.schedule.wait()
+        return self.user.wait_time()
+
     @task
     def cache_scenario(self):
-        hit_rate = float(os.environ.get("HIT_RATE"))
+        queue_delay = self.schedule.advance() if self.schedule is not None else None
+        if self.workload is not None:
+            if self.user.environment.cache_conn is None:
+                logging.warning("Redis client is not initialized.")
+                return
+            self.workload.run(self, self.user.environment.cache_conn, queue_delay)
+            return
+        if self.batch_size > 1:
+            self.cache_scenario_batch(self.batch_size, queue_delay)
+            return
         self.__class__.total_requests += 1
         if self.user.environment.cache_conn is None:
             logging.warning("Redis client is not initialized.")
             return
-        if random.random() < float(hit_rate):
-            key = f"key_{random.randint(1, 1000)}"
-            result = LocustCache.locust_redis_get(self, self.user.environment.cache_conn, key, "default")
+        if random.random() < self.current_hit_rate():
+            index = self.keys.next_index()
+            key = self.key_name(index)
+            result = LocustCache.locust_redis_get(self, self.user.environment.cache_conn, key, "default", queue_delay)
+            hit = result is not None
+            if result is not None and self.codec is not None:
+                self.codec.timed_decode(self, result)
             if result is None:
-                value = generate_string(os.environ.get("VALUE_SIZE"))
-                ttl = int(os.environ.get("TTL"))
-                LocustCache.locust_redis_set(self, self.user.environment.cache_conn, key , value , "default", ttl)
+                value = self.next_value()
+                if LocustCache.locust_redis_set(self, self.user.environment.cache_conn, key , value , "default", self.ttl, queue_delay):
+                    self.record_write(key, value)
+                    self.keys.inserted(index)
         else:
-            hash_key = hashlib.sha256(str(time.time_ns()).encode()).hexdigest()
-            ttl = int(os.environ.get("TTL"))
-            result = LocustCache.locust_redis_get(self, self.user.environment.cache_conn, hash_key, "dummy")
+            hash_key = self.miss_keys.next_key()
+            result = LocustCache.locust_redis_get(self, self.user.environment.cache_conn, hash_key, "dummy", queue_delay)
+            hit = result is not None
+            if result is not None and self.codec is not None:
+                self.codec.timed_decode(self, result)
             if result is None:
-                value = generate_string(os.environ.get("VALUE_SIZE"))
-                LocustCache.locust_redis_set(self, self.user.environment.cache_conn, hash_key , value , "dummy", ttl)
+                value = self.next_value()
+                if LocustCache.locust_redis_set(self, self.user.environment.cache_conn, hash_key , value , "dummy", self.ttl, queue_delay):
+                    self.record_write(hash_key, value)
+        self.record_hits(int(hit), 1)
+
+    def next_value(self):
+        """
+        Returns the next value to SET, encoded with --codec.
+        """
+        if self.codec is None:
+            return self.payloads.next()
+        return self.codec.timed_encode(self, self.payloads.next())
+
+    def record_write(self, key, value):
+        """
+        Counts a written key for --memory-report.
+        """
+        if self.keyspace_tracker is not None:
+            self.keyspace_tracker.record(key, self.ttl, value_length(value))
+
+    def current_hit_rate(self):
+        """
+        Returns the probability of requesting a preloaded key: --hit-rate, or the
+        controller's mix in closed-loop mode.
+        """
+        if self.closed_loop:
+            return self.hit_rate_controller.mix
+        return self.hit_rate
+
+    def record_hits(self, hits, lookups):
+        self.__class__.cache_hits += hits
+        if self.hit_rate_controller is not None:
+            self.hit_rate_controller.record(hits, lookups)
+
+    def cache_scenario_batch(self, batch_size, queue_delay=None):
+        """
+        Issues batch_size GETs through one pipeline, then SETs every missed key
+        through a second pipeline.
+        """
+        self.__class__.total_requests += batch_size
+        if self.user.environment.cache_conn is None:
+            logging.warning("Redis client is not initialized.")
+            return
+        keys = []
+        names = []
+        indices = []
+        hit_rate = self.current_hit_rate()
+        for _ in range(batch_size):
+            if random.random() < hit_rate:
+                index = self.keys.next_index()
+                keys.append(self.key_name(index))
+                names.append("default")
+                indices.append(index)
+            else:
+                keys.append(self.miss_keys.next_key())
+                names.append("dummy")
+                indices.append(None)
+        results = LocustCache.locust_redis_pipeline_get(self, self.user.environment.cache_conn, keys, names, queue_delay)
+        missed = [i for i, result in enumerate(results) if result is None]
+        self.record_hits(batch_size - len(missed), batch_size)
+        if self.codec is not None:
+            for result in results:
+                if result is not None:
+                    self.codec.timed_decode(self, result)
+        if missed:
+            items = [(keys[i], self.next_value()) for i in missed]
+            results = LocustCache.locust_redis_pipeline_set(self, self.user.environment.cache_conn, items, [names[i] for i in missed], self.ttl, queue_delay)
+            for i, (key, value), result in zip(missed, items, results):
+                if result:
+                    self.record_write(key, value)
+                    if indices[i] is not None:
+                        self.keys.inserted(indices[i])
 
 class RedisUser(User):
     tasks = [RedisTaskSet]
     wait_time = between(1, 1)
-    host = os.environ.get("REDIS_HOST")
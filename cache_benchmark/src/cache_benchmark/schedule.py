@@ -0,0 +1,44 @@
+import random
+import time
+
+
+class OpenLoopSchedule:
+    """
+    Constant-throughput timeline of intended send times for one user.
+
+    Every user owns ``target_rps / users`` of the global rate, with a random phase so
+    the users of all workers interleave into one evenly spaced timeline. The schedule
+    never skips a slot: when a response is late the next request is due immediately,
+    and the time it spent waiting behind the slow one is reported as queue delay
+    (coordinated-omission correction).
+    """
+
+    def __init__(self, target_rps, users, requests_per_task=1):
+        """
+        Args:
+            target_rps (float): Global target of requests per second.
+            users (int): Total number of users sharing the target, across all workers.
+            requests_per_task (int): Requests issued by one task run.
+        """
+        self.interval = max(int(users), 1) * max(int(requests_per_task), 1) / float(target_rps)
+        self.next_intended = time.perf_counter() + random.random() * self.interval
+        self.queue_delay = 0.0
+
+    def wait(self):
+        """
+        Returns:
+            float: Seconds to sleep until the next intended send time, 0 when behind.
+        """
+        return max(0.0, self.next_intended - time.perf_counter())
+
+    def advance(self):
+        """
+        Consumes the current slot. Must be called when the task actually starts.
+
+        Returns:
+            float: Queue delay of this task in milliseconds, the time between its
+            intended and actual send time.
+        """
+        self.queue_delay = max(0.0, time.perf_counter() - self.next_intended) * 1000
+        self.next_intended += self.interval
+        return self.queue_delay
@@ -0,0 +1,181 @@
+import hashlib
+import json
+import logging
+import time
+import gevent
+from locust.env import Environment
+from locust.runners import LocalRunner
+from cache_benchmark.histogram import HistogramRecorder
+from cache_benchmark.hitrate import HitRateController
+from cache_benchmark.keygen import key_bytes, key_name
+from cache_benchmark.locust_cache import LocustCache
+from cache_benchmark.retry import RetryPolicy
+from cache_benchmark.scenario import RedisTaskSet, RedisUser
+
+
+class StubPipeline:
+    def __init__(self, connection):
+        self.connection = connection
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append((self.connection.get, (key,), {}))
+
+    def set(self, key, value, **kwargs):
+        self.commands.append((self.connection.set, (key, value), kwargs))
+
+    def execute(self, raise_on_error=True):
+        results = [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        self.commands = []
+        return results
+
+
+class StubConnection:
+    """
+    In-process stand-in for a cluster client: a dict answering GET/SET instantly.
+
+    Miss keys are never stored, so a long run does not grow the dict and the miss
+    path keeps missing like it does against a real cluster. The other commands of
+    workload files get a fixed, plausible reply without changing the dict.
+    """
+
+    def __init__(self, keys=1000, value="x", key_format=key_name):
+        self.data = {key_format(index): value for index in range(keys)}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        if key in self.data:
+            self.data[key] = value
+        return True
+
+    def pipeline(self, transaction=False):
+        return StubPipeline(self)
+
+    def mget(self, keys, *args):
+        return [self.data.get(key) for key in keys]
+
+    mget_nonatomic = mget
+
+    def hgetall(self, key):
+        return {"field_0": self.data[key]} if key in self.data else {}
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        return len(mapping or {}) + (field is not None)
+
+    def incr(self, key, amount=1):
+        return amount
+
+    def expire(self, key, time):
+        return key in self.data
+
+    def delete(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    def zadd(self, key, mapping):
+        return len(mapping)
+
+    def zrange(self, key, start, end):
+        return []
+
+    def evalsha(self, sha, numkeys, *keys_and_args):
+        return self.data.get(keys_and_args[0]) if numkeys else None
+
+    def script_load(self, script):
+        return hashlib.sha1(script.encode()).hexdigest()
+
+
+def measure(func, iterations):
+    """
+    Returns:
+        float: Mean duration of one call of ``func`` in nanoseconds.
+    """
+    start = time.perf_counter_ns()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter_ns() - start) / iterations
+
+
+def run_selfbench(config, iterations=100000, greenlets=100):
+    """
+    Measures the overhead the load generator adds to every operation.
+
+    The scenario runs against a StubConnection inside a real Locust environment
+    (stats, histogram recorder and hit-rate controller listening), so the numbers are
+    the client-side cost of one operation with the network taken out. Every stage is
+    timed on its own and reported net of the cost of the benchmark loop itself.
+
+    Args:
+        config (BenchmarkConfig): Scenario settings; connection settings are ignored.
+        iterations (int): Operations per measurement.
+        greenlets (int): Concurrent greenlets of the scheduling measurement.
+
+    Returns:
+        dict: ``stages`` in nanoseconds per operation and ``ops_per_sec_per_core``.
+    """
+    env = Environment(user_classes=[RedisUser])
+    env.benchmark_config = config
+    env.cache_conn = StubConnection(config.set_keys, key_format=key_bytes if config.bytes_mode else key_name)
+    env.node_tagger = None
+    env.retry_policy = RetryPolicy.from_config(config)
+    HistogramRecorder(env)
+    HitRateController(env, config.hit_rate, config.hit_rate_mode == "closed")
+    LocalRunner(env)
+    task = RedisTaskSet(RedisUser(env))
+    task.on_start()
+    stub = env.cache_conn
+    if task.codec is not None:
+        stub.data = dict.fromkeys(stub.data, task.codec.encode(task.payloads.next()))
+    fire = env.events.request.fire
+
+    loop = measure(lambda: None, iterations)
+    stages = {
+        "stub get": measure(lambda: stub.get("key_1"), iterations),
+        "key choice": measure(lambda: task.key_name(task.keys.next_index()), iterations),
+        "miss key": measure(task.miss_keys.next_key, iterations),
+        "payload": measure(task.payloads.next, iterations),
+        "event fire": measure(lambda: fire(request_type="Redis", name="get_value_default", response_time=0.1,
+                                           response_length=0, context={}, exception=None), iterations),
+        "retry check": measure(lambda: LocustCache._call(task, "get_value_default", stub.get, "key_1"), iterations),
+        "get wrapper": measure(lambda: LocustCache.locust_redis_get(task, stub, "key_1", "default"), iterations),
+    }
+    stages["scenario"] = measure(task.cache_scenario, iterations)
+
+    def worker(count):
+        for _ in range(count):
+            task.cache_scenario()
+            gevent.sleep(0)
+
+    start = time.perf_counter_ns()
+    gevent.joinall([gevent.spawn(worker, iterations // greenlets) for _ in range(greenlets)])
+    scheduled = (time.perf_counter_ns() - start) / (iterations // greenlets * greenlets)
+    stages = {name: max(0.0, duration - loop) for name, duration in stages.items()}
+    # The retry check was timed around the stub call.
+    stages["retry check"] = max(0.0, stages["retry check"] - stages["stub get"])
+    stages["gevent switch"] = max(0.0, scheduled - stages["scenario"] - loop)
+    stages["scenario + scheduling"] = max(0.0, scheduled)
+    return {
+        "iterations": iterations,
+        "greenlets": greenlets,
+        "stages": {name: round(duration, 1) for name, duration in stages.items()},
+        "ops_per_sec_per_core": round(1e9 / scheduled) if scheduled else None,
+    }
+
+
+def report_selfbench(results, filename="selfbench_results.json"):
+    """
+    Logs the self-benchmark table and writes the results as JSON.
+
+    Args:
+        results (dict): Output of ``run_selfbench``.
+        filename (str): JSON output file.
+    """
+    lines = [f"{'Stage':<24} {'ns/op':>10} {'us/op':>8}"]
+    for name, duration in results["stages"].items():
+        lines.append(f"{name:<24} {duration:>10.0f} {duration / 1000:>8.2f}")
+    logging.info("Load generator overhead per operation:\n" + "\n".join(lines))
+    logging.info(f"Max throughput: {results['ops_per_sec_per_core']:,} ops/sec per core.")
+    with open(filename, mode="w") as file:
+        json.dump(results, file, indent=2)
+    logging.info(f"Self-benchmark results saved to {filename}.")
@@ -0,0 +1,162 @@
+import csv
+import logging
+import time
+import gevent
+from cache_benchmark.cash_connect import CacheConnect
+
+SERVER_METRICS = (
+    "instantaneous_ops_per_sec",
+    "used_memory",
+    "evicted_keys",
+    "expired_keys",
+    "keyspace_hits",
+    "keyspace_misses",
+    "connected_clients",
+)
+HEADER = (
+    ["Timestamp", "Elapsed (s)", "Node", "Role"]
+    + list(SERVER_METRICS)
+    + ["keys", "Client Requests/s", "Client Failures/s", "Client p50 (ms)", "Client p99 (ms)"]
+)
+
+
+def discover_nodes(environment, clients):
+    """
+    Creates one small client per node of the cluster, or for the single node of
+    standalone and Sentinel targets, skipping the nodes already in ``clients``.
+
+    Args:
+        environment (Environment): Locust environment holding ``cache_conn``.
+        clients (dict): (role, client) per node name, updated in place.
+
+    Returns:
+        dict: ``clients``.
+    """
+    cache_conn = getattr(environment, "cache_conn", None)
+    if cache_conn is None:
+        return clients
+    config = environment.benchmark_config
+    cache = CacheConnect(config)
+    if config.target != "cluster":
+        pool = cache_conn.connection_pool
+        host, port = pool.get_master_address() if hasattr(pool, "get_master_address") else (config.host, config.port)
+        if f"{host}:{port}" not in clients:
+            clients[f"{host}:{port}"] = ("primary", cache.node_connect(host, port))
+        return clients
+    for node in cache_conn.get_nodes():
+        if node.name not in clients:
+            clients[node.name] = (node.server_type, cache.node_connect(node.host, node.port))
+    return clients
+
+
+class ServerMetricsSampler:
+    """
+    Polls INFO on every cluster node at a fixed interval and streams the samples,
+    next to the client-side throughput and latency of the same moment, to a CSV file.
+
+    Each node is polled through its own two-connection client, so sampling neither
+    competes for the benchmark's pool nor waits behind its requests. All nodes are
+    polled concurrently and a sample row is written per node per interval; the client
+    columns come from the Locust stats (aggregated from the workers on a master).
+    """
+
+    def __init__(self, environment, interval, filename):
+        """
+        Args:
+            environment (Environment): Locust environment holding ``cache_conn`` and the stats.
+            interval (float): Sampling interval in seconds.
+            filename (str): Output CSV file.
+        """
+        self.environment = environment
+        self.interval = interval
+        self.filename = filename
+        self.clients = {}
+        self.greenlet = None
+        self.file = None
+        self.writer = None
+        self.start_time = None
+
+    def discover(self):
+        """
+        Creates one small client per node, see ``discover_nodes``.
+
+        Returns:
+            int: Number of nodes found.
+        """
+        discover_nodes(self.environment, self.clients)
+        return len(self.clients)
+
+    def _poll(self, client):
+        try:
+            return client.info()
+        except Exception as e:
+            logging.debug(f"INFO failed: {e}")
+            return None
+
+    def sample(self):
+        """
+        Polls every node once and writes one row per node.
+        """
+        timestamp = time.time()
+        names = list(self.clients)
+        jobs = [gevent.spawn(self._poll, self.clients[name][1]) for name in names]
+        gevent.joinall(jobs, timeout=max(self.interval, 1.0))
+        total = self.environment.stats.total
+        client_columns = [
+            round(total.current_rps, 2),
+            round(total.current_fail_per_sec, 2),
+            total.get_current_response_time_percentile(0.5),
+            total.get_current_response_time_percentile(0.99),
+        ]
+        for name, job in zip(names, jobs):
+            info = job.value if job.successful() else None
+            if info is None:
+                continue
+            keys = sum(value.get("keys", 0) for key, value in info.items() if key.startswith("db") and isinstance(value, dict))
+            self.writer.writerow(
+                [round(timestamp, 3), round(timestamp - self.start_time, 3), name, self.clients[name][0]]
+                + [info.get(metric) for metric in SERVER_METRICS]
+                + [keys]
+                + client_columns
+            )
+        self.file.flush()
+
+    def start(self):
+        """
+        Starts sampling in a greenlet.
+
+        Returns:
+            bool: False if no node could be discovered.
+        """
+        try:
+            nodes = self.discover()
+        except Exception as e:
+            logging.warning(f"Cannot discover cluster nodes for server metrics: {e}")
+            nodes = 0
+        if not nodes:
+            logging.warning("No cluster nodes found; server metrics are not sampled.")
+            return False
+        self.file = open(self.filename, mode="w", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(HEADER)
+        self.start_time = time.time()
+
+        def run():
+            while True:
+                started = time.monotonic()
+                self.sample()
+                gevent.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+        self.greenlet = gevent.spawn(run)
+        logging.info(f"Sampling server metrics of {nodes} nodes every {self.interval:g}s.")
+        return True
+
+    def stop(self):
+        if self.greenlet is None:
+            return
+        self.greenlet.kill()
+        self.greenlet = None
+        self.file.close()
+        for _, client in self.clients.values():
+            client.close()
+        logging.info(f"Server metrics saved to {self.filename}.")
@@ -0,0 +1,249 @@
+import abc
+import json
+import logging
+import math
+from collections import Counter
+from locust import LoadTestShape
+from locust.stats import calculate_response_time_percentile
+
+LOAD_SHAPES = ("none", "step", "ramp", "spike", "sine")
+
+
+class BenchmarkShape(LoadTestShape):
+    """
+    Base of the load shapes: a user count between 1 and ``users`` (--connections) as
+    a function of the run time, for ``duration`` seconds.
+
+    Locust applies the user count of every tick within a second, so the shape alone
+    defines the timing; --spawn-rate is not used.
+    """
+    abstract = True
+
+    def __init__(self, users, duration):
+        """
+        Args:
+            users (int): Peak number of users.
+            duration (float): Length of the test in seconds.
+        """
+        super().__init__()
+        self.users = max(1, int(users))
+        self.duration = float(duration)
+
+    @abc.abstractmethod
+    def users_at(self, run_time):
+        """
+        Args:
+            run_time (float): Seconds since the start of the test.
+
+        Returns:
+            float: User count at ``run_time``, clamped to [1, users] by ``tick``.
+        """
+
+    def tick(self):
+        run_time = self.get_run_time()
+        if run_time >= self.duration:
+            return None
+        return max(1, min(self.users, int(round(self.users_at(run_time))))), self.users
+
+
+class StepShape(BenchmarkShape):
+    """
+    Raises the users to ``users * k / steps`` at the start of step k of ``steps`` equal steps.
+    """
+
+    def __init__(self, users, duration, steps=5):
+        super().__init__(users, duration)
+        self.steps = max(1, int(steps))
+
+    def users_at(self, run_time):
+        step = min(int(run_time * self.steps // self.duration), self.steps - 1)
+        return math.ceil(self.users * (step + 1) / self.steps)
+
+
+class RampShape(BenchmarkShape):
+    """
+    Raises the users linearly from 1 to ``users`` over the test.
+    """
+
+    def users_at(self, run_time):
+        return math.ceil(self.users * run_time / self.duration)
+
+
+class SpikeShape(BenchmarkShape):
+    """
+    Holds ``base`` of the users, with all users between 40% and 60% of the test.
+    """
+
+    def __init__(self, users, duration, base=0.1):
+        super().__init__(users, duration)
+        self.base = float(base)
+
+    def users_at(self, run_time):
+        if 0.4 <= run_time / self.duration < 0.6:
+            return self.users
+        return self.users * self.base
+
+
+class SineShape(BenchmarkShape):
+    """
+    Oscillates between ``base`` of the users and all users, starting at the bottom,
+    with a period of ``period`` seconds.
+    """
+
+    def __init__(self, users, duration, base=0.1, period=60):
+        super().__init__(users, duration)
+        self.base = float(base)
+        self.period = max(float(period), 1.0)
+
+    def users_at(self, run_time):
+        low = self.users * self.base
+        return low + (self.users - low) * (1 - math.cos(2 * math.pi * run_time / self.period)) / 2
+
+
+class SaturationSearch(BenchmarkShape):
+    """
+    Finds the maximum sustainable throughput by raising the users in ``steps`` equal
+    steps until the p99 latency or the error rate of a step breaks the SLO.
+
+    Every step is measured after its first quarter, once the new users have settled,
+    from the cumulative Locust stats of the GET/SET requests. With --batch-size every
+    command counts with the latency of its whole pipeline, so the p99 is the one a
+    caller waits for. The test stops at the first step breaking the SLO; the best step
+    that met it is the maximum sustainable throughput.
+    """
+
+    def __init__(self, users, duration, steps=5, slo_p99=10.0, slo_error_rate=0.01):
+        """
+        Args:
+            users (int): Users of the last step.
+            duration (float): Length of the search if no step breaks the SLO.
+            steps (int): Number of steps.
+            slo_p99 (float): Highest acceptable p99 latency in milliseconds.
+            slo_error_rate (float): Highest acceptable ratio of failed requests.
+        """
+        super().__init__(users, duration)
+        self.steps = max(1, int(steps))
+        self.step_duration = self.duration / self.steps
+        self.slo_p99 = float(slo_p99)
+        self.slo_error_rate = float(slo_error_rate)
+        self.step = -1
+        self.snapshot = None
+        self.results = []
+        self.broken = False
+
+    def users_at(self, run_time):
+        return math.ceil(self.users * (self.step + 1) / self.steps)
+
+    def _measure(self):
+        """
+        Returns:
+            tuple: Run time, requests, failures and response time counts of the measured requests.
+        """
+        requests = failures = 0
+        response_times = Counter()
+        for (name, method), entry in self.runner.stats.entries.items():
+            # Pipelines are reported as "RedisBatch" besides their commands, so only the
+            # commands are counted, each with the latency of its whole pipeline.
+            if method != "Redis" or name.endswith("_corrected"):
+                continue
+            requests += entry.num_requests
+            failures += entry.num_failures
+            response_times.update(entry.response_times)
+        return self.get_run_time(), requests, failures, response_times
+
+    def _finish_step(self):
+        if self.snapshot is None:
+            return
+        start, requests, failures, response_times = self.snapshot
+        end, total_requests, total_failures, total_times = self._measure()
+        requests = total_requests - requests
+        failures = total_failures - failures
+        if requests <= 0:
+            return
+        p99 = calculate_response_time_percentile(total_times - response_times, requests, 0.99)
+        error_rate = failures / requests
+        result = {
+            "users": self.users_at(start),
+            "rps": round(requests / max(end - start, 1e-9), 1),
+            "p99_ms": p99,
+            "error_rate": round(error_rate, 5),
+            "within_slo": p99 <= self.slo_p99 and error_rate <= self.slo_error_rate,
+        }
+        self.results.append(result)
+        logging.info(f"Step {len(self.results)}/{self.steps}: {result['users']} users, {result['rps']:,} req/s, "
+                     f"p99 {p99} ms, errors {error_rate:.2%}{'' if result['within_slo'] else ' - SLO broken'}.")
+        self.broken = not result["within_slo"]
+
+    def tick(self):
+        run_time = self.get_run_time()
+        step = int(run_time // self.step_duration)
+        if step != self.step:
+            self._finish_step()
+            self.step = step
+            self.snapshot = None
+        if self.broken or step >= self.steps:
+            return None
+        if self.snapshot is None and run_time - step * self.step_duration >= self.step_duration / 4:
+            self.snapshot = self._measure()
+        return max(1, self.users_at(run_time)), self.users
+
+    def best(self):
+        """
+        Returns:
+            dict: Step with the highest throughput within the SLO, None if none met it.
+        """
+        passed = [result for result in self.results if result["within_slo"]]
+        return max(passed, key=lambda result: result["rps"]) if passed else None
+
+    def export(self, prefix, config):
+        """
+        Logs the maximum sustainable throughput and writes every step to <prefix>_find_max.json.
+
+        Args:
+            prefix (str): Path prefix of the result files.
+            config (BenchmarkConfig): Benchmark config, for the scenario it was measured with.
+        """
+        best = self.best()
+        if best is None:
+            logging.warning(f"No step met the SLO (p99 <= {self.slo_p99:g} ms, errors <= {self.slo_error_rate:.2%}).")
+        else:
+            logging.info(
+                f"Max sustainable throughput: {best['rps']:,} req/s with {best['users']} users "
+                f"(p99 {best['p99_ms']} ms, errors {best['error_rate']:.2%}) at hit rate {config.hit_rate} "
+                f"and value size {config.value_size} KB ({config.value_size_dist}).")
+        filename = f"{prefix}_find_max.json"
+        with open(filename, mode="w") as file:
+            json.dump({
+                "slo": {"p99_ms": self.slo_p99, "error_rate": self.slo_error_rate},
+                "hit_rate": config.hit_rate,
+                "value_size": config.value_size,
+                "value_size_dist": config.value_size_dist,
+                "max_sustainable": best,
+                "steps": self.results,
+            }, file, indent=2)
+        logging.info(f"Saturation search results saved to {filename}.")
+
+
+def get_load_shape(config, users, duration):
+    """
+    Returns the load shape of --shape, or the saturation search with --find-max.
+
+    Args:
+        config (BenchmarkConfig): Benchmark config.
+        users (int): Peak number of users, --connections.
+        duration (float): Length of the test in seconds, --duration.
+
+    Returns:
+        BenchmarkShape: Shape, None for a constant load.
+    """
+    if config.find_max:
+        return SaturationSearch(users, duration, config.shape_steps, config.slo_p99, config.slo_error_rate)
+    if config.shape == "step":
+        return StepShape(users, duration, config.shape_steps)
+    if config.shape == "ramp":
+        return RampShape(users, duration)
+    if config.shape == "spike":
+        return SpikeShape(users, duration, config.shape_base)
+    if config.shape == "sine":
+        return SineShape(users, duration, config.shape_base, config.shape_period)
+    return None
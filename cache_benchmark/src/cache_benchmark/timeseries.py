@@ -0,0 +1,164 @@
+import csv
+import json
+import time
+from locust.stats import calculate_response_time_percentile, diff_response_time_dicts
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+TIMESERIES_FORMATS = ("csv", "jsonl", "parquet")
+TIMESERIES_FIELDS = (
+    "timestamp", "elapsed", "type", "name", "requests", "failures", "rps", "failures_per_sec", "mb_per_sec",
+    "avg_ms", "min_ms", "max_ms", "p50_ms", "p90_ms", "p99_ms", "p999_ms",
+)
+PERCENTILES = ((0.5, "p50_ms"), (0.9, "p90_ms"), (0.99, "p99_ms"), (0.999, "p999_ms"))
+
+
+class IntervalStats:
+    """
+    Turns the cumulative Locust stats into per-interval rows.
+
+    Every call to ``rows`` returns, per operation, the requests, failures,
+    throughput and latency percentiles of the requests completed since the previous
+    call, and the bandwidth of the payload sizes the requests reported as response
+    length. Only the previous cumulative counters of each operation are kept, so the
+    memory used does not grow with the length of the run.
+    """
+
+    def __init__(self, stats):
+        """
+        Args:
+            stats (RequestStats): Locust stats, aggregated from the workers on a master.
+        """
+        self.stats = stats
+        self.previous = {}
+        self.last_time = time.time()
+        self.start_time = self.last_time
+
+    def rows(self):
+        """
+        Returns:
+            list: One dict with TIMESERIES_FIELDS per operation that had requests in the interval.
+        """
+        now = time.time()
+        elapsed = max(now - self.last_time, 1e-9)
+        self.last_time = now
+        rows = []
+        for (name, method), entry in sorted(self.stats.entries.items()):
+            num_requests, num_failures, total_time, content_length, response_times = self.previous.get(
+                (name, method), (0, 0, 0.0, 0, {}))
+            requests = entry.num_requests - num_requests
+            failures = entry.num_failures - num_failures
+            if requests <= 0 and failures <= 0:
+                continue
+            self.previous[(name, method)] = (
+                entry.num_requests, entry.num_failures, entry.total_response_time, entry.total_content_length,
+                dict(entry.response_times))
+            interval_times = diff_response_time_dicts(entry.response_times, response_times)
+            row = {
+                "timestamp": round(now, 3),
+                "elapsed": round(now - self.start_time, 3),
+                "type": method,
+                "name": name,
+                "requests": requests,
+                "failures": failures,
+                "rps": round(requests / elapsed, 2),
+                "failures_per_sec": round(failures / elapsed, 2),
+                "mb_per_sec": round((entry.total_content_length - content_length) / elapsed / 1e6, 3),
+                "avg_ms": round((entry.total_response_time - total_time) / requests, 3) if requests else None,
+                "min_ms": min(interval_times) if interval_times else None,
+                "max_ms": max(interval_times) if interval_times else None,
+            }
+            for percent, field in PERCENTILES:
+                row[field] = calculate_response_time_percentile(interval_times, requests, percent) if requests else None
+            rows.append(row)
+        return rows
+
+
+class CsvSink:
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, mode="w", newline="", buffering=1 << 16)
+        self.writer = csv.DictWriter(self.file, fieldnames=TIMESERIES_FIELDS)
+        self.writer.writeheader()
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class JsonLinesSink:
+    def __init__(self, filename):
+        self.filename = filename
+        self.file = open(filename, mode="w", buffering=1 << 16)
+
+    def write(self, rows):
+        self.file.write("".join(json.dumps(row) + "\n" for row in rows))
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetSink:
+    """
+    Buffers rows and writes them as Parquet row groups of ``batch_rows`` rows.
+    """
+
+    def __init__(self, filename, batch_rows=10000):
+        if pyarrow is None:
+            raise ValueError("The parquet format requires pyarrow (pip install pyarrow).")
+        self.filename = filename
+        self.batch_rows = batch_rows
+        self.buffer = []
+        self.writer = None
+
+    def write(self, rows):
+        self.buffer.extend(rows)
+        if len(self.buffer) >= self.batch_rows:
+            self._flush()
+
+    def _flush(self):
+        if not self.buffer:
+            return
+        if self.writer is None:
+            self.schema = pyarrow.schema([
+                (field, pyarrow.string() if field in ("type", "name") else
+                 pyarrow.int64() if field in ("requests", "failures") else pyarrow.float64())
+                for field in TIMESERIES_FIELDS
+            ])
+            self.writer = pyarrow.parquet.ParquetWriter(self.filename, self.schema)
+        table = pyarrow.Table.from_pylist(self.buffer, schema=self.schema)
+        self.writer.write_table(table)
+        self.buffer = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_timeseries_sink(fmt, prefix):
+    """
+    Opens the time-series sink of a format.
+
+    Args:
+        fmt (str): One of TIMESERIES_FORMATS.
+        prefix (str): Path prefix; the file is <prefix>_timeseries.<fmt>.
+
+    Returns:
+        CsvSink | JsonLinesSink | ParquetSink: Sink with ``write(rows)`` and ``close()``.
+    """
+    if fmt == "csv":
+        return CsvSink(f"{prefix}_timeseries.csv")
+    if fmt == "jsonl":
+        return JsonLinesSink(f"{prefix}_timeseries.jsonl")
+    if fmt == "parquet":
+        return ParquetSink(f"{prefix}_timeseries.parquet")
+    raise ValueError(f"Unknown time-series format: {fmt}")
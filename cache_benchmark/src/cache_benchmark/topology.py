@@ -0,0 +1,208 @@
+import logging
+import time
+import gevent
+from gevent.event import Event
+from redis.exceptions import AskError, MovedError
+from valkey.exceptions import AskError as ValkeyAskError, MovedError as ValkeyMovedError
+from cache_benchmark.cash_connect import CacheConnect
+
+MOVED_ERRORS = (MovedError, ValkeyMovedError)
+ASK_ERRORS = (AskError, ValkeyAskError)
+
+
+def node_client(conn, node):
+    """
+    Args:
+        conn (RedisCluster | ValkeyCluster): Cluster connection object.
+        node (ClusterNode): Cluster node.
+
+    Returns:
+        Redis | Valkey: Client of the node, created if needed.
+    """
+    if hasattr(conn, "get_valkey_connection"):
+        return conn.get_valkey_connection(node)
+    return conn.get_redis_connection(node)
+
+
+class ClusterConnectionManager:
+    """
+    Builds the connection shared by all users of a process and keeps client-side
+    topology handling from amplifying resharding and failovers.
+
+    - Every node gets a connection pool sized to the number of users, the most
+      connections the users of one process can hold on a node at the same time,
+      instead of the 1,000,000 connection default.
+    - ``warmup_connections`` connections per primary are opened before the load
+      starts, so the first seconds do not measure TCP and TLS handshakes.
+    - On clusters, topology refreshes are shared: while one greenlet reloads the slot map, the
+      others that hit MOVED, a connection error or CLUSTERDOWN wait for it instead
+      of reloading it again, and no refresh starts within ``refresh_interval``
+      seconds of the previous one.
+    - MOVED and ASK redirects, new connections and topology refreshes are reported
+      as requests of type "Cluster", so they show up per interval next to latency.
+      Redirects are counted where the node clients parse replies, which cluster
+      pipelines (--batch-size) read through as well. The asyncio engine does not use
+      this manager and reports no cluster events.
+    """
+
+    def __init__(self, environment, config):
+        """
+        Args:
+            environment (Environment): Locust environment the cluster events are fired on.
+            config (BenchmarkConfig): Benchmark config holding the connection settings.
+        """
+        self.environment = environment
+        self.config = config
+        self.refresh_interval = config.topology_refresh_interval
+        self.last_refresh = 0.0
+        self.refreshing = None
+        self.warming_up = False
+
+    def pool_size(self):
+        """
+        Returns:
+            int: Connections per node, --connections-pool capped at the number of users.
+        """
+        return max(1, min(int(self.config.connections_pool), int(self.config.users)))
+
+    def connect(self):
+        """
+        Connects to the target, installs the topology hooks on clusters and warms the
+        pools up.
+
+        Returns:
+            RedisCluster | ValkeyCluster | Redis | Valkey | ReplicaReadClient: Connection object, None on failure.
+        """
+        self.warming_up = True
+        try:
+            conn = CacheConnect(self.config).connect(self.pool_size(), self.on_connect)
+        finally:
+            self.warming_up = False
+        if conn is None:
+            return None
+        if self.config.target == "cluster":
+            self.attach(conn)
+        if self.config.warmup_connections:
+            self.warm_up(conn, self.config.warmup_connections)
+        return conn
+
+    def attach(self, conn):
+        """
+        Installs the shared refresh and the redirect counters on a cluster connection.
+
+        Args:
+            conn (RedisCluster | ValkeyCluster): Cluster connection object.
+        """
+        nodes_manager = conn.nodes_manager
+        initialize = nodes_manager.initialize
+        nodes_manager.initialize = lambda: self.refresh(initialize)
+        for method in ("create_redis_node", "create_valkey_node"):
+            create_node = getattr(nodes_manager, method, None)
+            if create_node is not None:
+                setattr(nodes_manager, method, self._instrumented(create_node))
+        for node in conn.get_nodes():
+            client = getattr(node, "redis_connection", None) or getattr(node, "valkey_connection", None)
+            if client is not None:
+                self._instrument(client)
+
+    def _instrumented(self, create_node):
+        def wrapper(*args, **kwargs):
+            return self._instrument(create_node(*args, **kwargs))
+        return wrapper
+
+    def _instrument(self, client):
+        parse_response = client.parse_response
+
+        def wrapper(*args, **kwargs):
+            try:
+                return parse_response(*args, **kwargs)
+            except MOVED_ERRORS:
+                self.fire("MOVED")
+                raise
+            except ASK_ERRORS:
+                self.fire("ASK")
+                raise
+
+        client.parse_response = wrapper
+        return client
+
+    def fire(self, name, response_time=0, exception=None):
+        self.environment.events.request.fire(
+            request_type="Cluster",
+            name=name,
+            response_time=response_time,
+            response_length=0,
+            context={},
+            exception=exception,
+        )
+
+    def on_connect(self, connection):
+        # Connections opened while connecting and warming up are not part of the run.
+        if not self.warming_up:
+            self.fire("connect")
+
+    def refresh(self, initialize):
+        """
+        Reloads the slot map, unless another greenlet is already doing it or the
+        previous reload is more recent than ``refresh_interval``.
+
+        Args:
+            initialize (callable): Original ``NodesManager.initialize``.
+        """
+        if self.refreshing is not None:
+            self.refreshing.wait()
+            self.fire("topology refresh (shared)")
+            return
+        if time.monotonic() - self.last_refresh < self.refresh_interval:
+            self.fire("topology refresh (skipped)")
+            return
+        self.refreshing = Event()
+        start_time = time.perf_counter()
+        exception = None
+        try:
+            initialize()
+        except Exception as e:
+            exception = e
+            raise
+        finally:
+            self.last_refresh = time.monotonic()
+            self.refreshing.set()
+            self.refreshing = None
+            self.fire("topology refresh", (time.perf_counter() - start_time) * 1000, exception)
+            if exception is not None:
+                logging.warning(f"Topology refresh failed: {exception}")
+
+    def warm_up(self, conn, connections):
+        """
+        Opens connections to every primary in parallel and returns them to the pools.
+
+        Args:
+            conn (RedisCluster | ValkeyCluster | Redis | Valkey | ReplicaReadClient): Connection object.
+            connections (int): Connections per node, capped at the pool size.
+        """
+        connections = min(int(connections), self.pool_size())
+        start_time = time.perf_counter()
+
+        def open_pool(pool):
+            opened = []
+            try:
+                for _ in range(connections):
+                    opened.append(pool.get_connection("PING"))
+            except Exception as e:
+                logging.warning(f"Warm-up stopped after {len(opened)} connections: {e}")
+            for connection in opened:
+                pool.release(connection)
+            return len(opened)
+
+        self.warming_up = True
+        try:
+            if self.config.target == "cluster":
+                pools = [node_client(conn, node).connection_pool for node in conn.get_primaries()]
+            else:
+                pools = [conn.connection_pool]
+            jobs = [gevent.spawn(open_pool, pool) for pool in pools]
+            gevent.joinall(jobs)
+        finally:
+            self.warming_up = False
+        opened = sum(job.value or 0 for job in jobs)
+        logging.info(f"Warmed up {opened} connections to {len(jobs)} nodes in {time.perf_counter() - start_time:.2f}s.")
@@ -1,12 +1,33 @@
+import argparse
+import asyncio
 import csv
 import os
+import signal
+import socket
 import logging
 import gevent
+from gevent.event import Event
+from gevent.pool import Pool
 from locust.env import Environment
 from locust.runners import LocalRunner , MasterRunner, WorkerRunner
 import locust
-from locust.stats import stats_printer
 import time
+from redis.crc import key_slot
+from cache_benchmark.async_engine import AsyncLoadEngine
+from cache_benchmark.cash_connect import CacheConnect
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.codec import get_value_codec, get_value_pool
+from cache_benchmark.histogram import HistogramRecorder, export_histograms
+from cache_benchmark.hitrate import HitRateController
+from cache_benchmark.memory import KeyspaceTracker
+from cache_benchmark.nodes import get_node_tagger
+from cache_benchmark.retry import RetryPolicy
+from cache_benchmark.server_metrics import ServerMetricsSampler
+from cache_benchmark.shapes import SaturationSearch, get_load_shape
+from cache_benchmark.reporting import PeriodicReporter, open_report_sinks, parse_report_sinks
+from cache_benchmark.timeseries import open_timeseries_sink
+from cache_benchmark.topology import ClusterConnectionManager
+from cache_benchmark.replay import ReplayEngine, open_trace
 
 logger = logging.getLogger(__name__)
 
@@ -24,26 +45,131 @@ def generate_string(size_in_kb):
     """
     return "A" * (int(size_in_kb) * 1024)
 
-def init_cache_set(cache_client, value, ttl):
+def preload_value(config):
+    """
+    Generates the value the keys are preloaded with, in the --payload content and
+    encoded with the --codec of the benchmark.
+
+    Args:
+        config (BenchmarkConfig): Benchmark config.
+
+    Returns:
+        str | bytes: Value to preload.
+    """
+    codec = get_value_codec(config.codec)
+    if codec is None and config.payload_content == "repeated":
+        return generate_string(config.value_size)
+    value = get_value_pool(codec, "fixed", config.value_size, content=config.payload_content).next()
+    return bytes(value) if codec is None else codec.encode(value)
+
+def iter_preload_batches(set_keys, batch_size, chunk_size=100000):
+    """
+    Yields batches of preload keys ordered by cluster hash slot.
+
+    Keys are generated chunk by chunk so that tens of millions of keys never have to
+    be held in memory at once. Inside a chunk the keys are sorted by slot, so every
+    batch covers a narrow slot range and is served by as few nodes as possible.
+
+    Args:
+        set_keys (int): Number of keys to preload (key_1 .. key_<set_keys>).
+        batch_size (int): Number of keys per pipelined batch.
+        chunk_size (int): Number of keys sorted by slot at a time.
+
+    Yields:
+        list: Keys belonging to one batch.
+    """
+    batch_size = max(1, int(batch_size))
+    chunk_size = max(batch_size, int(chunk_size))
+    for chunk_start in range(1, int(set_keys) + 1, chunk_size):
+        chunk_end = min(chunk_start + chunk_size, int(set_keys) + 1)
+        keys = sorted(
+            (f"key_{i}" for i in range(chunk_start, chunk_end)),
+            key=lambda key: key_slot(key.encode()),
+        )
+        for i in range(0, len(keys), batch_size):
+            yield keys[i:i + batch_size]
+
+def preload_batch(cache_client, keys, value, ttl):
+    """
+    Writes one batch of keys through a non-transactional cluster pipeline.
+
+    Keys that already exist are left untouched (SET NX), which keeps the behaviour of
+    the former GET-then-SET loop without paying an extra round trip per key.
+
+    Args:
+        cache_client (RedisCluster): Redis cluster connection object.
+        keys (list): Keys to write.
+        value (str): Value to set in Redis.
+        ttl (int): Time-to-live for the keys in seconds.
+
+    Returns:
+        int: Number of commands that failed.
+    """
+    pipe = cache_client.pipeline(transaction=False)
+    for key in keys:
+        pipe.set(key, value, ex=ttl, nx=True)
+    try:
+        results = pipe.execute(raise_on_error=False)
+    except Exception as e:
+        logging.error(f"Error during preload batch: {e}")
+        return len(keys)
+    return sum(1 for result in results if isinstance(result, Exception))
+
+def init_cache_set(cache_client, value, ttl, set_keys=1000, batch_size=1000, concurrency=8):
     """
     Initializes the Redis cache with a set of keys.
 
+    Keys are grouped by cluster slot and written in pipelined batches, with up to
+    ``concurrency`` batches in flight at the same time.
+
     Args:
         cache_client (RedisCluster): Redis cluster connection object.
         value (str): Value to set in Redis.
         ttl (int): Time-to-live for the keys in seconds.
+        set_keys (int): Number of keys to set in the cache.
+        batch_size (int): Number of keys sent per pipeline.
+        concurrency (int): Number of pipelines in flight at the same time.
+
+    Returns:
+        dict: Preload summary with keys, failures, bytes, elapsed, keys_per_sec and bytes_per_sec.
     """
-    if cache_client is not None:
-        logging.info("Redis client initialized successfully.")
-        logging.info("Populating cache with 1,000 keys...")
-        for i in range(1, 1000):
-            key = f"key_{i}"
-            if cache_client.get(key) is None:
-                cache_client.set(key, value, ex=int(ttl))
-        logging.info("Success")
-    else:
+    if cache_client is None:
         logging.error("Cache client initialization failed.")
         exit(1)
+    logging.info("Redis client initialized successfully.")
+    logging.info(f"Populating cache with {set_keys:,} keys (batch size {batch_size}, concurrency {concurrency})...")
+    ttl = int(ttl)
+    value_bytes = len(value)
+    pool = Pool(max(1, int(concurrency)))
+    failures = 0
+    total_keys = 0
+    total_bytes = 0
+
+    def run_batch(keys):
+        nonlocal failures
+        failures += preload_batch(cache_client, keys, value, ttl)
+
+    start_time = time.perf_counter()
+    for keys in iter_preload_batches(set_keys, batch_size):
+        total_keys += len(keys)
+        total_bytes += sum(len(key) for key in keys) + value_bytes * len(keys)
+        pool.spawn(run_batch, keys)
+    pool.join()
+    elapsed = max(time.perf_counter() - start_time, 1e-9)
+    summary = {
+        "keys": total_keys,
+        "failures": failures,
+        "bytes": total_bytes,
+        "elapsed": elapsed,
+        "keys_per_sec": total_keys / elapsed,
+        "bytes_per_sec": total_bytes / elapsed,
+    }
+    logging.info(
+        f"Preloaded {total_keys:,} keys in {elapsed:.2f}s "
+        f"({summary['keys_per_sec']:,.0f} keys/sec, {summary['bytes_per_sec'] / 1e6:,.2f} MB/sec, "
+        f"{failures} failures)"
+    )
+    return summary
 
 def save_results_to_csv(stats, filename="test_results.csv"):
     """
@@ -56,7 +182,8 @@ def save_results_to_csv(stats, filename="test_results.csv"):
     with open(filename, "w", newline="") as csvfile:
         writer = csv.writer(csvfile)
         writer.writerow(["Request Name", "Total Requests", "Failures", "Average Response Time",
-                         "Min Response Time", "Max Response Time", "RPS"])
+                         "Min Response Time", "Max Response Time", "RPS",
+                         "50% Response Time", "90% Response Time", "99% Response Time"])
         for name, entry in stats.entries.items():
             writer.writerow([
                 name,
@@ -65,81 +192,341 @@ def save_results_to_csv(stats, filename="test_results.csv"):
                 entry.avg_response_time,
                 entry.min_response_time,
                 entry.max_response_time,
-                entry.current_rps
+                entry.current_rps,
+                entry.get_response_time_percentile(0.5),
+                entry.get_response_time_percentile(0.9),
+                entry.get_response_time_percentile(0.99),
             ])
 
-def set_env_vars(args):
-    """
-    Sets the environment variables for the test.
-
-    Args:
-        args (Namespace): Command-line arguments.
-    """
-    os.environ["REDIS_HOST"] = args.fqdn
-    os.environ["REDIS_PORT"] = str(args.port)
-    os.environ["HIT_RATE"] = str(args.hit_rate)
-    os.environ["VALUE_SIZE"] = str(args.value_size)
-    os.environ["TTL"] = str(args.ttl)
-    os.environ["CONNECTIONS_POOL"] = str(args.connections_pool)
-    os.environ["SSL"] = str(args.ssl)
-def set_env_cache_retry(args):
-    """
-    Sets the environment variables for the cache.
-
-    Args:
-        args (Namespace): Command-line arguments.
-    """
-    # os.environ["cache_retry"] = str(args.cache_retry)
-# os.environ["cache_retry_delay"] = str(args.cache_retry_delay)
-
-def locust_runner_cash_benchmark(args,redisuser):
+def locust_runner_cash_benchmark(args, redisuser, config):
+    processes = min(args.processes or os.cpu_count() or 1, args.connections)
+    if processes > 1:
+        if hasattr(os, "fork"):
+            locust_multiprocess_runner_benchmark(args, redisuser, config, processes)
+            return
+        logging.warning("--processes requires os.fork; running in a single process.")
     env = Environment(user_classes=[redisuser])
-    env.events.request.add_listener(lambda **kwargs: stats_printer(env.stats))
+    env.benchmark_config = config
+    recorder = HistogramRecorder(env)
+    controller = HitRateController(env, config.hit_rate, config.hit_rate_mode == "closed")
     runner = LocalRunner(env)
-    redisuser.host = f"http://{args.fqdn}:{args.port}"
-    gevent.spawn(stats_printer(env.stats))
-    locust.events.init.fire(environment=env,cache_type="valkey_cluster")
-    runner.start(user_count=args.connections, spawn_rate=args.spawn_rate)
-    stats_printer(env.stats)
+    redisuser.host = f"http://{config.host}:{config.port}"
+    locust.events.init.fire(environment=env, cache_type=config.cache_type)
+    reporter = start_reporter(env, "redis_test_results")
+    tracker = start_keyspace_tracker(env, runner)
+    shape = start_load(env, runner, args)
+    controller.start(runner)
+    sampler = start_server_metrics(env, "redis_test_results")
     logging.info("Starting Locust load test...")
-    gevent.sleep(args.duration)
+    wait_for_load(runner, shape, args.duration)
     runner.quit()
+    controller.stop()
+    if tracker is not None:
+        tracker.stop()
+    if sampler is not None:
+        sampler.stop()
+    if reporter is not None:
+        reporter.stop()
     logging.info("Load test completed.")
     save_results_to_csv(env.stats, filename="redis_test_results.csv")
+    recorder.export("redis_test_results")
+    controller.export("redis_test_results")
+    if isinstance(shape, SaturationSearch):
+        shape.export("redis_test_results", config)
+    if tracker is not None:
+        tracker.export("redis_test_results", config)
 
-def locust_master_runner_benchmark(args, redisuser):
+def locust_master_runner_benchmark(args, redisuser, config, filename="redis_test_results_master.csv", abort=None):
     """
     Run Locust in Master mode.
+
+    Args:
+        abort (gevent.event.Event, optional): Stops the test early once set; the
+            results gathered so far are still written.
     """
     env = Environment(user_classes=[redisuser])
-    env.events.request.add_listener(lambda **kwargs: stats_printer(env.stats))
+    env.benchmark_config = config
+    recorder = HistogramRecorder(env)
+    controller = HitRateController(env, config.hit_rate, config.hit_rate_mode == "closed")
     runner = MasterRunner(env, master_bind_host=args.master_bind_host, master_bind_port=args.master_bind_port)
-    locust.events.init.fire(environment=env, cache_type="valkey_cluster")
+    locust.events.init.fire(environment=env, cache_type=config.cache_type)
     logging.info("Master is waiting for workers to connect...")
-    while len(runner.clients) < args.num_workers:
+    while len(runner.clients) < args.num_workers and not (abort is not None and abort.is_set()):
         logging.info(f"Waiting for workers... ({len(runner.clients)}/{args.num_workers} connected)")
         time.sleep(1)
-    gevent.spawn(stats_printer(env.stats))
     logging.info(f"All {args.num_workers} workers are connected. Starting the load test...")
-    runner.start(user_count=args.connections, spawn_rate=args.spawn_rate)
-    stats_printer(env.stats)
+    runner.send_message("benchmark_config", config.to_dict())
+    reporter = start_reporter(env, os.path.splitext(filename)[0])
+    tracker = start_keyspace_tracker(env, runner)
+    shape = start_load(env, runner, args)
+    controller.start(runner)
+    sampler = start_server_metrics(env, os.path.splitext(filename)[0])
     logging.info("Starting Locust load test in Master mode...")
-    gevent.sleep(args.duration)
+    wait_for_load(runner, shape, args.duration, abort)
     runner.quit()
-    logging.info("Load test completed.")
-    save_results_to_csv(env.stats, filename="redis_test_results_master.csv")
+    controller.stop()
+    if tracker is not None:
+        tracker.stop()
+    if sampler is not None:
+        sampler.stop()
+    if reporter is not None:
+        reporter.stop()
+    if abort is not None and abort.is_set():
+        logging.warning("Load test aborted, writing partial results.")
+    else:
+        logging.info("Load test completed.")
+    save_results_to_csv(env.stats, filename=filename)
+    recorder.export(os.path.splitext(filename)[0])
+    controller.export(os.path.splitext(filename)[0])
+    if isinstance(shape, SaturationSearch):
+        shape.export(os.path.splitext(filename)[0], config)
+    if tracker is not None:
+        tracker.export(os.path.splitext(filename)[0], config)
 
-def locust_worker_runner_benchmark(args, redisuser):
+def locust_worker_runner_benchmark(args, redisuser, config):
     """
     Run Locust in Worker mode.
     """
     env = Environment(user_classes=[redisuser])
-    locust.events.init.fire(environment=env, cache_type="valkey_cluster")
+    env.benchmark_config = config
+    HistogramRecorder(env)
+    controller = HitRateController(env, config.hit_rate, config.hit_rate_mode == "closed")
+    # Counts the written keys for the master when the shipped config enables --memory-report.
+    KeyspaceTracker(env)
+    locust.events.init.fire(environment=env, cache_type=config.cache_type)
 
     runner = WorkerRunner(env, master_host=args.master_bind_host, master_port=args.master_bind_port)
+    runner.register_message("benchmark_config", lambda msg, **kwargs: on_benchmark_config(env, msg))
+    runner.register_message("hit_rate_mix", controller.on_hit_rate_mix)
 
     logging.info(f"Worker connecting to Master at {args.master_bind_host}:{args.master_bind_port}...")
     runner.greenlet.join()
 
     logging.info("Worker load test completed.")
 
+def start_load(env, runner, args):
+    """
+    Starts the users: --connections users at --spawn-rate, or the load shape of
+    --shape / --find-max.
+
+    Returns:
+        BenchmarkShape: Running load shape, None for a constant load.
+    """
+    shape = get_load_shape(env.benchmark_config, args.connections, args.duration)
+    if shape is None:
+        runner.start(user_count=args.connections, spawn_rate=args.spawn_rate)
+        return None
+    env.shape_class = shape
+    shape.runner = runner
+    runner.start_shape()
+    return shape
+
+def wait_for_load(runner, shape, duration, abort=None):
+    """
+    Waits for --duration, or until the load shape has finished.
+
+    Args:
+        abort (gevent.event.Event, optional): Ends the wait early once set.
+    """
+    abort = abort or Event()
+    if shape is None:
+        abort.wait(duration)
+        return
+    deadline = time.monotonic() + duration + 5
+    while runner.shape_greenlet is not None and time.monotonic() < deadline and not abort.is_set():
+        abort.wait(1)
+
+def start_server_metrics(env, prefix):
+    """
+    Starts sampling server metrics into <prefix>_server_metrics.csv when --server-metrics-interval is set.
+
+    Returns:
+        ServerMetricsSampler: Running sampler, None when disabled or no node was found.
+    """
+    interval = env.benchmark_config.server_metrics_interval
+    if not interval:
+        return None
+    sampler = ServerMetricsSampler(env, interval, f"{prefix}_server_metrics.csv")
+    return sampler if sampler.start() else None
+
+def start_keyspace_tracker(env, runner):
+    """
+    Starts tracking the keyspace for the <prefix>_memory.json report when --memory-report is set.
+
+    Returns:
+        KeyspaceTracker: Running tracker, None when disabled.
+    """
+    if not env.benchmark_config.memory_report:
+        return None
+    tracker = KeyspaceTracker(env)
+    tracker.start(runner)
+    return tracker
+
+def start_reporter(env, prefix):
+    """
+    Starts the periodic stats reporter with the --report sinks and, when --timeseries
+    is set, the <prefix>_timeseries.<format> file.
+
+    Returns:
+        PeriodicReporter: Running reporter, None when no sink is enabled.
+    """
+    config = env.benchmark_config
+    try:
+        sinks = open_report_sinks(parse_report_sinks(config.report))
+        if config.timeseries_format != "none":
+            sinks.append(open_timeseries_sink(config.timeseries_format, prefix))
+    except (OSError, ValueError) as e:
+        logging.error(f"Cannot report stats: {e}")
+        exit(1)
+    if not sinks:
+        return None
+    reporter = PeriodicReporter(env, sinks, config.report_interval)
+    reporter.start()
+    return reporter
+
+def find_free_port(host="127.0.0.1"):
+    """
+    Returns a TCP port that is currently free on the given host.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+def locust_multiprocess_runner_benchmark(args, redisuser, config, processes):
+    """
+    Run Locust locally on several cores.
+
+    ``processes`` worker processes are forked before anything else is created and
+    connect to a master running in this process on a free loopback port. The master
+    drives the test for --duration, quits the workers and writes one merged result file.
+    If a worker fails, the test is stopped, the partial results are written and the
+    process exits with status 1.
+    """
+    local_args = argparse.Namespace(**vars(args))
+    local_args.master_bind_host = "127.0.0.1"
+    local_args.master_bind_port = find_free_port()
+    local_args.num_workers = processes
+    pids = []
+    for _ in range(processes):
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 0
+            try:
+                locust_worker_runner_benchmark(local_args, redisuser, config)
+            except BaseException as e:
+                logging.error(f"Worker process failed: {e}")
+                exit_code = 1
+            finally:
+                os._exit(exit_code)
+        pids.append(pid)
+    logging.info(f"Forked {processes} worker processes.")
+
+    abort = Event()
+
+    def watch_workers():
+        while pids:
+            for pid in list(pids):
+                reaped, status = os.waitpid(pid, os.WNOHANG)
+                if reaped != pid:
+                    continue
+                pids.remove(pid)
+                if os.waitstatus_to_exitcode(status) != 0:
+                    logging.error(f"Worker process {pid} failed, stopping the load test.")
+                    abort.set()
+                    return
+            gevent.sleep(1)
+
+    watchdog = gevent.spawn(watch_workers)
+    try:
+        locust_master_runner_benchmark(local_args, redisuser, config, filename="redis_test_results.csv", abort=abort)
+    finally:
+        watchdog.kill()
+        stop_workers(pids)
+    if abort.is_set():
+        exit(1)
+
+def stop_workers(pids, timeout=10):
+    """
+    Waits for forked worker processes to exit, killing the ones that outlive the timeout.
+    """
+    deadline = time.time() + timeout
+    for pid in list(pids):
+        while os.waitpid(pid, os.WNOHANG)[0] == 0:
+            if time.time() >= deadline:
+                logging.warning(f"Killing worker process {pid}.")
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+                break
+            gevent.sleep(0.1)
+        pids.remove(pid)
+
+def on_benchmark_config(env, msg):
+    """
+    Replaces the worker's config with the one shipped by the master.
+
+    The cache connection is rebuilt only when the connection settings differ.
+
+    Args:
+        env (Environment): Worker Locust environment.
+        msg (Message): Locust message carrying ``BenchmarkConfig.to_dict()``.
+    """
+    config = BenchmarkConfig.from_dict(msg.data)
+    previous = env.benchmark_config
+    env.benchmark_config = config
+    logging.info("Benchmark config received from master.")
+    controller = getattr(env, "hit_rate_controller", None)
+    if controller is not None:
+        controller.target = controller.mix = config.hit_rate
+        controller.closed_loop = config.hit_rate_mode == "closed"
+    env.node_tagger = get_node_tagger(env, config.node_breakdown)
+    env.retry_policy = RetryPolicy.from_config(config)
+    if (config.cache_type, config.host, config.port, config.ssl, config.connections_pool, config.users,
+            config.warmup_connections, config.topology_refresh_interval) != \
+            (previous.cache_type, previous.host, previous.port, previous.ssl, previous.connections_pool, previous.users,
+             previous.warmup_connections, previous.topology_refresh_interval):
+        env.cache_conn = ClusterConnectionManager(env, config).connect()
+
+def async_runner_cash_benchmark(args, config):
+    """
+    Run the load test with the asyncio engine instead of Locust users.
+    """
+    cache_conn = CacheConnect(config).async_connect()
+    if cache_conn is None:
+        logging.error("Cache client initialization failed.")
+        exit(1)
+    if config.batch_size > 1:
+        logging.warning("--batch-size is not supported by the asyncio engine and is ignored.")
+    if config.workload:
+        logging.warning("--workload is not supported by the asyncio engine and is ignored.")
+    if config.hit_rate_mode == "closed":
+        logging.warning("--hit-rate-mode closed is not supported by the asyncio engine and is ignored.")
+    if config.shape != "none" or config.find_max:
+        logging.warning("--shape and --find-max are not supported by the asyncio engine and are ignored.")
+    if config.codec != "raw":
+        logging.warning("--codec is not supported by the asyncio engine and is ignored.")
+    if config.memory_report:
+        logging.warning("--memory-report is not supported by the asyncio engine and is ignored.")
+    engine = AsyncLoadEngine(config, cache_conn, args.connections, args.inflight)
+    start_time = time.time()
+    stats = asyncio.run(engine.run(args.duration))
+    save_results_to_csv(stats, filename="redis_test_results_asyncio.csv")
+    export_histograms(engine.histograms, "redis_test_results_asyncio", start_time)
+
+def replay_runner_cash_benchmark(args, config):
+    """
+    Replay a captured command trace, or this worker's shard of it, through the cache connection.
+    """
+    cache_conn = CacheConnect(config).connect()
+    if cache_conn is None:
+        logging.error("Cache client initialization failed.")
+        exit(1)
+    try:
+        trace = open_trace(args.trace, args.shard_index, args.shard_count)
+    except (OSError, ValueError) as e:
+        logging.error(f"Cannot open trace: {e}")
+        exit(1)
+    engine = ReplayEngine(cache_conn, trace, args.speed, args.connections)
+    start_time = time.time()
+    stats = engine.run(args.duration)
+    save_results_to_csv(stats, filename="redis_test_results_replay.csv")
+    export_histograms(engine.histograms, "redis_test_results_replay", start_time)
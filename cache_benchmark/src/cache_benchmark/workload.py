@@ -0,0 +1,252 @@
+import hashlib
+import json
+import logging
+import random
+import time
+import yaml
+from cache_benchmark.keygen import AliasTable, get_key_chooser, get_miss_key_generator
+from cache_benchmark.locust_cache import LocustCache, value_length
+from cache_benchmark.codec import get_value_codec, get_value_pool
+
+WORKLOAD_COMMANDS = ("get", "set", "mget", "hgetall", "hset", "incr", "expire", "del", "zadd", "zrange", "evalsha")
+
+
+def load_workload_file(path):
+    """
+    Loads a workload definition from a YAML or JSON file.
+
+    Example::
+
+        operations:
+          - name: read_profile
+            command: get
+            weight: 80
+            keys: {distribution: zipfian, keyspace: 100000, prefix: "key_"}
+          - name: write_profile
+            command: set
+            weight: 15
+            keys: {miss: true}
+            value_size: {distribution: lognormal, size: 4, sigma: 0.8}
+            ttl: 300
+          - name: feed
+            command: zrange
+            weight: 5
+            count: 20
+
+    Args:
+        path (str): Path to a .yaml, .yml or .json file.
+
+    Returns:
+        dict: Workload definition.
+    """
+    with open(path) as f:
+        if path.endswith(".json"):
+            workload = json.load(f)
+        else:
+            workload = yaml.safe_load(f)
+    validate_workload(workload)
+    return workload
+
+
+def validate_workload(workload):
+    """
+    Checks a workload definition, raising ValueError on the first problem.
+
+    Args:
+        workload (dict): Workload definition.
+    """
+    if not isinstance(workload, dict) or not isinstance(workload.get("operations"), list) or not workload["operations"]:
+        raise ValueError("A workload must define a non-empty 'operations' list.")
+    for position, operation in enumerate(workload["operations"], 1):
+        if not isinstance(operation, dict):
+            raise ValueError(f"Operation {position}: expected a mapping with a 'command', got {operation!r}.")
+        command = str(operation.get("command", "")).lower()
+        if command not in WORKLOAD_COMMANDS:
+            raise ValueError(f"Operation {position}: unknown command {operation.get('command')!r}, "
+                             f"expected one of {', '.join(WORKLOAD_COMMANDS)}.")
+        if float(operation.get("weight", 1)) < 0:
+            raise ValueError(f"Operation {position}: weight must not be negative.")
+        if command == "evalsha" and not operation.get("script"):
+            raise ValueError(f"Operation {position}: evalsha requires a 'script'.")
+    if sum(float(operation.get("weight", 1)) for operation in workload["operations"]) <= 0:
+        raise ValueError("At least one operation must have a positive weight.")
+
+
+class WorkloadOperation:
+    """
+    One weighted operation of a workload, with its key generator, payloads and TTL
+    resolved at compile time so that ``run`` only picks keys and sends the command.
+    """
+
+    def __init__(self, spec, config, environment):
+        """
+        Args:
+            spec (dict): Operation definition.
+            config (BenchmarkConfig): Benchmark config, providing the defaults.
+            environment (Environment): Locust environment, used for the worker id.
+        """
+        self.command = spec["command"].lower()
+        self.name = spec.get("name") or self.command
+        self.ttl = int(spec.get("ttl", config.ttl))
+        self.count = int(spec.get("count", 10))
+        self.fields = int(spec.get("fields", 1))
+        keys = spec.get("keys", {})
+        self.prefix = keys.get("prefix", "key_")
+        self.key_format = self.prefix.replace("%", "%%") + "%d"
+        if config.bytes_mode:
+            self.key_format = self.key_format.encode()
+        if keys.get("miss"):
+            self.miss_keys = get_miss_key_generator(keys.get("length", config.key_length), environment,
+                                                    config.bytes_mode)
+            self.keys = None
+        else:
+            self.miss_keys = None
+            self.keys = get_key_chooser(
+                keys.get("distribution", config.key_distribution),
+                int(keys.get("keyspace", config.set_keys)),
+                float(keys.get("theta", config.zipf_theta)),
+                float(keys.get("hot_fraction", config.hotspot_fraction)),
+                float(keys.get("hot_op_fraction", config.hotspot_op_fraction)),
+            )
+        value_size = spec.get("value_size", {})
+        self.codec = get_value_codec(config.codec)
+        self.payloads = get_value_pool(
+            self.codec,
+            value_size.get("distribution", config.value_size_dist),
+            float(value_size.get("size", config.value_size)),
+            float(value_size.get("min", config.value_size_min)),
+            value_size.get("max", config.value_size_max),
+            float(value_size.get("sigma", config.value_size_sigma)),
+            value_size.get("file", config.value_size_file),
+            config.payload_content,
+        )
+        self.script = spec.get("script")
+        self.script_sha = hashlib.sha1(self.script.encode()).hexdigest() if self.script else None
+        self.script_args = [str(arg) for arg in spec.get("args", [])]
+        self.run = getattr(self, f"_run_{self.command}")
+
+    def next_key(self):
+        if self.miss_keys is not None:
+            return self.miss_keys.next_key()
+        return self.key_format % (self.keys.next_index() + 1)
+
+    def next_value(self, task):
+        if self.codec is None:
+            return self.payloads.next()
+        return self.codec.timed_encode(task, self.payloads.next())
+
+    def _run_get(self, task, conn, queue_delay):
+        result = LocustCache.locust_redis_command(task, self.name, conn.get, self.next_key(), queue_delay=queue_delay)
+        if result is not None and self.codec is not None:
+            self.codec.timed_decode(task, result)
+        return result
+
+    def _run_set(self, task, conn, queue_delay):
+        key = self.next_key()
+        value = self.next_value(task)
+        result = LocustCache.locust_redis_command(task, self.name, conn.set, key, value, ex=self.ttl,
+                                                  queue_delay=queue_delay, payload_length=value_length(value))
+        tracker = getattr(task, "keyspace_tracker", None)
+        if result and tracker is not None:
+            tracker.record(key, self.ttl, value_length(value))
+        return result
+
+    def _run_mget(self, task, conn, queue_delay):
+        keys = [self.next_key() for _ in range(self.count)]
+        mget = getattr(conn, "mget_nonatomic", conn.mget)
+        return LocustCache.locust_redis_command(task, self.name, mget, keys, queue_delay=queue_delay)
+
+    def _run_hgetall(self, task, conn, queue_delay):
+        return LocustCache.locust_redis_command(task, self.name, conn.hgetall, self.next_key(), queue_delay=queue_delay)
+
+    def _run_hset(self, task, conn, queue_delay):
+        mapping = {f"field_{i}": self.payloads.next() for i in range(self.fields)}
+        return LocustCache.locust_redis_command(task, self.name, conn.hset, self.next_key(), mapping=mapping,
+                                                queue_delay=queue_delay,
+                                                payload_length=value_length(list(mapping.values())))
+
+    def _run_incr(self, task, conn, queue_delay):
+        return LocustCache.locust_redis_command(task, self.name, conn.incr, self.next_key(), queue_delay=queue_delay)
+
+    def _run_expire(self, task, conn, queue_delay):
+        return LocustCache.locust_redis_command(task, self.name, conn.expire, self.next_key(), self.ttl,
+                                                queue_delay=queue_delay)
+
+    def _run_del(self, task, conn, queue_delay):
+        return LocustCache.locust_redis_command(task, self.name, conn.delete, self.next_key(), queue_delay=queue_delay)
+
+    def _run_zadd(self, task, conn, queue_delay):
+        member = f"member_{random.randrange(self.count * 100)}"
+        return LocustCache.locust_redis_command(task, self.name, conn.zadd, self.next_key(), {member: time.time()},
+                                                queue_delay=queue_delay)
+
+    def _run_zrange(self, task, conn, queue_delay):
+        return LocustCache.locust_redis_command(task, self.name, conn.zrange, self.next_key(), 0, self.count - 1,
+                                                queue_delay=queue_delay)
+
+    def _run_evalsha(self, task, conn, queue_delay):
+        return LocustCache.locust_redis_command(task, self.name, self._evalsha, conn, self.next_key(),
+                                                queue_delay=queue_delay)
+
+    def _evalsha(self, conn, key):
+        try:
+            return conn.evalsha(self.script_sha, 1, key, *self.script_args)
+        except Exception as e:
+            if "NOSCRIPT" not in str(e):
+                raise
+            # SCRIPT LOAD is routed to every primary, so this happens once per cluster.
+            conn.script_load(self.script)
+            return conn.evalsha(self.script_sha, 1, key, *self.script_args)
+
+
+class CompiledWorkload:
+    """
+    Workload compiled into an O(1) dispatch table: an alias table over the operation
+    weights picks the operation, whose pre-bound ``run`` sends the command.
+    """
+
+    def __init__(self, workload, config, environment=None):
+        """
+        Args:
+            workload (dict): Validated workload definition.
+            config (BenchmarkConfig): Benchmark config.
+            environment (Environment): Locust environment.
+        """
+        operations = [spec for spec in workload["operations"] if float(spec.get("weight", 1)) > 0]
+        self.operations = [WorkloadOperation(spec, config, environment) for spec in operations]
+        self.table = AliasTable([float(spec.get("weight", 1)) for spec in operations])
+        logging.info("Workload compiled: " + ", ".join(
+            f"{operation.name}={float(spec.get('weight', 1)):g}" for operation, spec in zip(self.operations, operations)))
+
+    def run(self, task, cache_conn, queue_delay=None):
+        """
+        Runs one randomly chosen operation.
+
+        Args:
+            task: Locust task instance.
+            cache_conn: Cache connection.
+            queue_delay (float): Open-loop queue delay in milliseconds.
+        """
+        operation = self.operations[self.table.sample()]
+        return operation.run(task, cache_conn, queue_delay)
+
+
+_compiled_workloads = {}
+
+
+def get_compiled_workload(config, environment=None):
+    """
+    Returns the process-wide compiled workload of the config, compiling it on first use.
+
+    Args:
+        config (BenchmarkConfig): Benchmark config carrying the workload definition as JSON text.
+        environment (Environment): Locust environment.
+
+    Returns:
+        CompiledWorkload: Compiled workload.
+    """
+    workload = _compiled_workloads.get(config.workload)
+    if workload is None:
+        workload = CompiledWorkload(json.loads(config.workload), config, environment)
+        _compiled_workloads[config.workload] = workload
+    return workload
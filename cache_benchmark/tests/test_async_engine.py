@@ -0,0 +1,110 @@
+import asyncio
+import unittest
+from unittest.mock import Mock
+from cache_benchmark.async_engine import AsyncLoadEngine
+from cache_benchmark.config import BenchmarkConfig
+
+
+class FakePipeline:
+    def __init__(self, cluster):
+        self.cluster = cluster
+        self.commands = []
+
+    def get(self, key):
+        self.commands.append(("get", key))
+
+    def set(self, key, value, ex=None):
+        self.commands.append(("set", key, value))
+
+    async def execute(self, raise_on_error=True):
+        await asyncio.sleep(0)
+        self.cluster.pipelines.append(len(self.commands))
+        results = []
+        for command in self.commands:
+            if command[0] == "get":
+                results.append(self.cluster.data.get(command[1]))
+            elif self.cluster.readonly:
+                results.append(ConnectionError("READONLY"))
+            else:
+                self.cluster.data[command[1]] = command[2]
+                results.append(True)
+        return results
+
+
+class FakeAsyncCluster:
+    def __init__(self):
+        self.data = {}
+        self.closed = False
+        self.readonly = False
+        self.pipelines = []
+
+    def pipeline(self, transaction=False):
+        return FakePipeline(self)
+
+    async def get(self, key):
+        await asyncio.sleep(0)
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        await asyncio.sleep(0)
+        if self.readonly:
+            raise ConnectionError("READONLY")
+        self.data[key] = value
+        return True
+
+    async def aclose(self):
+        self.closed = True
+
+
+class TestAsyncLoadEngine(unittest.TestCase):
+    def test_run_records_stats_and_histograms(self):
+        cache_conn = FakeAsyncCluster()
+        engine = AsyncLoadEngine(BenchmarkConfig(hit_rate=0.5), cache_conn, connections=2, inflight=4)
+        stats = asyncio.run(engine.run(0.2))
+        self.assertEqual(engine.concurrency, 8)
+        self.assertTrue(cache_conn.closed)
+        self.assertTrue(cache_conn.pipelines)
+        self.assertEqual(max(cache_conn.pipelines), 4)
+        names = {name for name, _ in stats.entries}
+        self.assertTrue({"get_value_default", "get_value_dummy", "set_value_dummy"} <= names)
+        for (name, method), entry in stats.entries.items():
+            self.assertEqual(method, "RedisBatch" if name.endswith("_batch") else "Redis")
+            self.assertEqual(engine.histograms[name].total_count, entry.num_requests)
+        batches = [stats.entries[(f"{command}_batch", "RedisBatch")] for command in ("get", "set")]
+        self.assertEqual(sum(entry.num_requests for entry in batches), len(cache_conn.pipelines))
+        self.assertEqual(batches[0].max_response_time, max(stats.entries[("get_value_default", "Redis")].max_response_time,
+                                                           stats.entries[("get_value_dummy", "Redis")].max_response_time))
+
+    def test_single_inflight_sends_commands_directly(self):
+        cache_conn = FakeAsyncCluster()
+        stats = asyncio.run(AsyncLoadEngine(BenchmarkConfig(hit_rate=0.5), cache_conn, connections=2).run(0.05))
+        self.assertEqual(cache_conn.pipelines, [])
+        self.assertGreater(stats.entries[("get_value_dummy", "Redis")].num_requests, 0)
+
+    def test_errors_are_logged_as_failures(self):
+        class FailingCluster(FakeAsyncCluster):
+            async def get(self, key):
+                raise ConnectionError("connection refused")
+
+        engine = AsyncLoadEngine(BenchmarkConfig(hit_rate=1.0), FailingCluster())
+        stats = asyncio.run(engine.run(0.05))
+        entry = stats.entries[("get_value_default", "Redis")]
+        self.assertGreater(entry.num_failures, 0)
+        self.assertEqual(entry.num_failures, entry.num_requests)
+
+    def test_only_refilled_keys_are_inserted(self):
+        for inflight in (1, 4):
+            cache_conn = FakeAsyncCluster()
+            cache_conn.readonly = True
+            engine = AsyncLoadEngine(BenchmarkConfig(hit_rate=1.0), cache_conn, inflight=inflight)
+            engine.keys = Mock(next_index=Mock(return_value=0))
+            asyncio.run(engine.run(0.05))
+            engine.keys.inserted.assert_not_called()
+            engine = AsyncLoadEngine(BenchmarkConfig(hit_rate=1.0), FakeAsyncCluster(), inflight=inflight)
+            engine.keys = Mock(next_index=Mock(return_value=0))
+            asyncio.run(engine.run(0.05))
+            engine.keys.inserted.assert_called_with(0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,9 @@
-import os
 from unittest.mock import patch, Mock
 import unittest
-from cache_benchmark.cash_connect import CacheConnect
+from redis import BlockingConnectionPool
+from redis._parsers import _RESP3Parser
+from cache_benchmark.cash_connect import CacheConnect, ReplicaReadClient
+from cache_benchmark.config import BenchmarkConfig
 from redis.exceptions import TimeoutError, ConnectionError
 from redis.cluster import ClusterDownError
 from valkey.cluster import ClusterDownError as ValkeyClusterDownError
@@ -9,60 +11,111 @@ from valkey.exceptions import ConnectionError as ValkeyConnectionError, TimeoutE
 
 class TestCashConnect(unittest.TestCase):
     def setUp(self):
-        os.environ.clear()
-        os.environ["REDIS_HOST"] = "localhost"
-        os.environ["REDIS_PORT"] = "6379"
-        os.environ["CONNECTIONS_POOL"] = "10"
+        self.config = BenchmarkConfig(host="localhost", port=6379, connections_pool=10)
 
-    def tearDown(self):
-        os.environ.clear()
-
-    def test_redis_connect_missing_env_vars(self):
-        self.tearDown()
-        conn = CacheConnect.redis_connect(self)
+    def test_redis_connect_missing_host(self):
+        conn = CacheConnect(BenchmarkConfig(host=None)).redis_connect()
         self.assertIsNone(conn)
 
     def test_redis_connect_cluster_down_error(self):
         with patch("redis.cluster.RedisCluster", side_effect=ClusterDownError):
-            conn = CacheConnect.redis_connect(self)
+            conn = CacheConnect(self.config).redis_connect()
             self.assertIsNone(conn)
 
     def test_redis_connect_timeout_error(self):
         with patch("redis.cluster.RedisCluster", side_effect=TimeoutError):
-            conn = CacheConnect.redis_connect(self)
+            conn = CacheConnect(self.config).redis_connect()
             self.assertIsNone(conn)
 
     def test_redis_connect_connection_error(self):
         with patch("redis.cluster.RedisCluster", side_effect=ConnectionError):
-            conn = CacheConnect.redis_connect(self)
+            conn = CacheConnect(self.config).redis_connect()
             self.assertIsNone(conn)
 
     def test_redis_connect_unexpected_error(self):
         with patch("redis.cluster.RedisCluster", side_effect=Exception):
-            conn = CacheConnect.redis_connect(self)
+            conn = CacheConnect(self.config).redis_connect()
             self.assertIsNone(conn)
 
-    def test_valkey_connect_missing_env_vars(self):
-        self.tearDown()
-        conn = CacheConnect.valkey_connect(self)
+    def test_valkey_connect_missing_host(self):
+        conn = CacheConnect(BenchmarkConfig(host=None)).valkey_connect()
         self.assertIsNone(conn)
 
+    def test_connect_dispatches_on_cache_type(self):
+        with patch.object(CacheConnect, "valkey_connect", return_value="valkey") as valkey_connect:
+            conn = CacheConnect(BenchmarkConfig(cache_type="valkey_cluster")).connect()
+        valkey_connect.assert_called_once()
+        self.assertEqual(conn, "valkey")
+
+    def test_bytes_mode_keeps_responses_as_bytes(self):
+        self.assertTrue(CacheConnect(BenchmarkConfig()).decode_responses())
+        self.assertFalse(CacheConnect(BenchmarkConfig(bytes_mode=True)).decode_responses())
+        self.assertFalse(CacheConnect(BenchmarkConfig(codec="zlib")).decode_responses())
+
+    @patch("cache_benchmark.cash_connect.Redis")
+    def test_standalone_connect_uses_a_blocking_pool(self, mock_redis):
+        config = BenchmarkConfig(target="standalone", protocol=3, parser="python")
+        conn = CacheConnect(config).standalone_connect(max_connections=50)
+        self.assertEqual(conn, mock_redis.return_value)
+        pool = mock_redis.call_args.kwargs["connection_pool"]
+        self.assertIsInstance(pool, BlockingConnectionPool)
+        self.assertEqual(pool.max_connections, 50)
+        self.assertEqual(pool.connection_kwargs["protocol"], 3)
+        self.assertEqual(pool.connection_kwargs["parser_class"], _RESP3Parser)
+        conn.ping.assert_called_once()
+
+    @patch("cache_benchmark.cash_connect.Redis")
+    def test_standalone_connect_failure(self, mock_redis):
+        mock_redis.return_value.ping.side_effect = ConnectionError
+        self.assertIsNone(CacheConnect(BenchmarkConfig(target="standalone")).connect())
+
+    @patch("cache_benchmark.cash_connect.HIREDIS_AVAILABLE", False)
+    def test_hiredis_parser_requires_hiredis(self):
+        with self.assertRaises(ValueError):
+            CacheConnect(BenchmarkConfig(target="standalone", parser="hiredis")).parser_class()
+
+    @patch("cache_benchmark.cash_connect.Sentinel")
+    def test_sentinel_connect_reads_from_replicas(self, mock_sentinel):
+        config = BenchmarkConfig(target="sentinel", sentinel_service="cache", read_from_replicas=True)
+        conn = CacheConnect(config).connect()
+        sentinel = mock_sentinel.return_value
+        self.assertEqual(mock_sentinel.call_args.args[0], [("localhost", 6379)])
+        self.assertEqual(sentinel.master_for.call_args.args[0], "cache")
+        self.assertIsInstance(conn, ReplicaReadClient)
+        self.assertEqual(conn.replica, sentinel.slave_for.return_value)
+
+    def test_replica_read_client_routes_reads(self):
+        primary, replica = Mock(), Mock()
+        client = ReplicaReadClient(primary, replica)
+        client.get("key_1")
+        client.set("key_1", "value")
+        replica.get.assert_called_once_with("key_1")
+        primary.set.assert_called_once_with("key_1", "value")
+        pipe = client.pipeline(transaction=False)
+        pipe.get("key_1")
+        pipe.get("key_2")
+        pipe.execute()
+        replica.pipeline.return_value.execute.assert_called_once()
+        pipe.set("key_1", "value")
+        pipe.execute()
+        primary.pipeline.return_value.set.assert_called_once_with("key_1", "value")
+
     def test_valkey_connect_cluster_down_error(self):
         with patch("valkey.cluster.ValkeyCluster", side_effect=ValkeyClusterDownError):
-            conn = CacheConnect.valkey_connect(self)
+            conn = CacheConnect(self.config).valkey_connect()
             self.assertIsNone(conn)
 
     def test_valkey_connect_timeout_error(self):
         with patch("valkey.cluster.ValkeyCluster", side_effect=ValkeyTimeoutError):
-            conn = CacheConnect.valkey_connect(self)
+            conn = CacheConnect(self.config).valkey_connect()
             self.assertIsNone(conn)
 
     def test_valkey_connect_connection_error(self):
         with patch("valkey.cluster.ValkeyCluster", side_effect=ValkeyConnectionError):
-            conn = CacheConnect.valkey_connect(self)
+            conn = CacheConnect(self.config).valkey_connect()
             self.assertIsNone(conn)
 
     def test_valkey_connect_unexpected_error(self):
         with patch("valkey.cluster.ValkeyCluster", side_effect=Exception):
-            conn = CacheConnect.valkey_connect(self)
+            conn = CacheConnect(self.config).valkey_connect()
             self.assertIsNone(conn)
@@ -0,0 +1,62 @@
+import unittest
+import zlib
+from unittest.mock import Mock, patch
+from cache_benchmark.codec import ObjectPool, ValueCodec, format_codec, get_value_codec, parse_codec
+from cache_benchmark.payload import PayloadPool, generate_content
+
+
+class TestCodec(unittest.TestCase):
+    def setUp(self):
+        self.task = Mock()
+        self.fire = self.task.user.environment.events.request.fire
+
+    def test_parse_and_format(self):
+        self.assertEqual(parse_codec("raw"), (None, None))
+        self.assertEqual(parse_codec("zlib+msgpack"), ("msgpack", "zlib"))
+        self.assertEqual(format_codec(" Pickle + ZLIB "), "pickle+zlib")
+        self.assertEqual(format_codec(None), "raw")
+        self.assertIsNone(get_value_codec("raw"))
+        for value in ("gzip", "zlib+zstd", "msgpack+pickle"):
+            with self.assertRaises(ValueError):
+                parse_codec(value)
+
+    def test_missing_optional_dependency(self):
+        with patch.dict("cache_benchmark.codec.OPTIONAL_MODULES", {"lz4": None}):
+            with self.assertRaisesRegex(ValueError, "pip install lz4"):
+                parse_codec("lz4")
+
+    def test_round_trips(self):
+        payload = PayloadPool([4096], "text").next()
+        self.assertEqual(ValueCodec("zlib").decode(ValueCodec("zlib").encode(payload)), payload)
+        records = ObjectPool([4096]).next()
+        for name in ("msgpack", "pickle+zlib"):
+            codec = ValueCodec(name)
+            self.assertEqual(codec.decode(codec.encode(records)), records)
+
+    def test_timed_codec_fires_codec_events(self):
+        codec = ValueCodec("zlib")
+        data = codec.timed_encode(self.task, b"A" * 1024)
+        kwargs = self.fire.call_args.kwargs
+        self.assertEqual((kwargs["request_type"], kwargs["name"]), ("Codec", "encode_zlib"))
+        self.assertEqual(kwargs["response_length"], len(data))
+        self.assertEqual(codec.timed_decode(self.task, data), b"A" * 1024)
+        self.assertEqual(self.fire.call_args.kwargs["name"], "decode_zlib")
+
+    def test_decode_failure_is_reported(self):
+        self.assertIsNone(ValueCodec("zlib").timed_decode(self.task, b"not compressed"))
+        self.assertIsNotNone(self.fire.call_args.kwargs["exception"])
+
+    def test_object_pool_sizes(self):
+        small, large = ObjectPool([512, 8192])._table
+        self.assertLess(len(small), len(large))
+
+    def test_payload_content_compressibility(self):
+        ratio = {content: 4096 / len(zlib.compress(generate_content(content, 4096)))
+                 for content in ("repeated", "text", "random")}
+        self.assertGreater(ratio["repeated"], 50)
+        self.assertTrue(1.5 < ratio["text"] < 5)
+        self.assertLess(ratio["random"], 1.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
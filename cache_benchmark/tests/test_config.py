@@ -0,0 +1,44 @@
+import argparse
+import dataclasses
+import unittest
+from cache_benchmark.args import add_common_arguments
+from cache_benchmark.config import BenchmarkConfig
+
+
+class TestConfig(unittest.TestCase):
+    def parse(self, *argv):
+        parser = argparse.ArgumentParser()
+        add_common_arguments(parser)
+        return parser.parse_args(list(argv))
+
+    def test_from_args(self):
+        args = self.parse("-f", "redis.local", "-p", "7000", "-r", "0.9", "-k", "4", "-t", "30", "--ssl", "True")
+        config = BenchmarkConfig.from_args(args, "valkey_cluster")
+        self.assertEqual(config.cache_type, "valkey_cluster")
+        self.assertEqual(config.host, "redis.local")
+        self.assertEqual(config.port, 7000)
+        self.assertEqual(config.hit_rate, 0.9)
+        self.assertEqual(config.value_size, 4)
+        self.assertEqual(config.ttl, 30)
+        self.assertIs(config.ssl, True)
+
+    def test_target_rps_rejects_load_shapes(self):
+        for option in (["--shape", "ramp"], ["--find-max", "True"]):
+            with self.assertRaisesRegex(ValueError, "--target-rps"):
+                BenchmarkConfig.from_args(self.parse("--target-rps", "1000", *option))
+        self.assertEqual(BenchmarkConfig.from_args(self.parse("--target-rps", "1000")).target_rps, 1000)
+
+    def test_config_is_immutable(self):
+        config = BenchmarkConfig()
+        with self.assertRaises(dataclasses.FrozenInstanceError):
+            config.hit_rate = 1.0
+
+    def test_dict_round_trip(self):
+        config = BenchmarkConfig.from_args(self.parse("-r", "0.25"))
+        data = config.to_dict()
+        data["unknown_option"] = 1
+        self.assertEqual(BenchmarkConfig.from_dict(data), config)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from cache_benchmark.histogram import HistogramRecorder, LatencyHistogram, export_histograms
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_precision(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 100001):
+            histogram.record(value)
+        self.assertEqual(histogram.total_count, 100000)
+        for percentile, expected in ((50, 50000), (90, 90000), (99, 99000), (99.9, 99900)):
+            self.assertAlmostEqual(histogram.percentile(percentile), expected, delta=expected * 0.001)
+        self.assertEqual(histogram.percentile(100), 100000)
+        self.assertEqual(histogram.percentile(0), 1)
+        self.assertAlmostEqual(histogram.mean(), 50000.5)
+
+    def test_values_are_clamped_to_highest(self):
+        histogram = LatencyHistogram(highest=1000)
+        histogram.record(5000)
+        self.assertEqual(histogram.max_value, 1000)
+
+    def test_record_ms(self):
+        histogram = LatencyHistogram()
+        histogram.record_ms(1.5)
+        self.assertEqual(histogram.percentile(50), 1500)
+
+    def test_merge(self):
+        first = LatencyHistogram()
+        second = LatencyHistogram()
+        first.record(100)
+        second.record(200, count=3)
+        first.merge(second)
+        self.assertEqual(first.total_count, 4)
+        self.assertEqual(first.min_value, 100)
+        self.assertEqual(first.max_value, 200)
+        self.assertEqual(first.percentile(50), 200)
+
+    def test_merge_rejects_different_settings(self):
+        with self.assertRaises(ValueError):
+            LatencyHistogram().merge(LatencyHistogram(significant_figures=2))
+
+    def test_encode_decode_round_trip(self):
+        histogram = LatencyHistogram()
+        for value in (1, 5, 5, 1500, 3000000):
+            histogram.record(value)
+        encoded = histogram.encode()
+        self.assertTrue(encoded.startswith("HISTF"))
+        decoded = LatencyHistogram.decode(encoded)
+        self.assertEqual(decoded.counts, histogram.counts)
+        self.assertEqual(decoded.total_count, 5)
+        self.assertEqual(decoded.percentile(50), 5)
+
+    def test_export_histograms(self):
+        histogram = LatencyHistogram()
+        histogram.record_ms(2.0)
+        with tempfile.TemporaryDirectory() as directory:
+            prefix = os.path.join(directory, "results")
+            export_histograms({"get_value_default": histogram}, prefix)
+            with open(f"{prefix}_percentiles.csv") as f:
+                rows = list(csv.reader(f))
+            with open(f"{prefix}_histograms.json") as f:
+                data = json.load(f)
+            with open(f"{prefix}.hlog") as f:
+                hlog = f.read().splitlines()
+        self.assertEqual(rows[0][:5], ["Request Name", "Count", "Min", "Mean", "p50"])
+        self.assertEqual(rows[1][4], "2.000")
+        self.assertEqual(data["get_value_default"]["total_count"], 1)
+        self.assertTrue(hlog[-1].startswith("Tag=get_value_default,0.000,"))
+
+
+class TestHistogramRecorder(unittest.TestCase):
+    def test_worker_reports_merge_on_master(self):
+        worker_env = Mock()
+        master_env = Mock()
+        worker = HistogramRecorder(worker_env)
+        master = HistogramRecorder(master_env)
+        worker.on_request(name="get_value_default", response_time=1.0)
+        worker.on_request(name="get_value_default", response_time=3.0)
+        data = {}
+        worker.on_report_to_master(client_id="worker-1", data=data)
+        self.assertEqual(worker.histograms, {})
+        master.on_worker_report(client_id="worker-1", data=data)
+        merged = master.histograms["get_value_default"]
+        self.assertEqual(merged.total_count, 2)
+        self.assertEqual(merged.max_value, 3000)
+        self.assertAlmostEqual(merged.mean(), 2000)
+        self.assertIs(master_env.histograms, master)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import csv
+import os
+import random
+import tempfile
+import unittest
+from unittest.mock import Mock
+from cache_benchmark.hitrate import HitRateController
+
+
+class TestHitRateController(unittest.TestCase):
+    def simulate(self, controller, hit_key_hit_rate, steps=60, lookups=2000):
+        """Runs the controller against a cache where hit keys hit with the given probability."""
+        rng = random.Random(1)
+        for _ in range(steps):
+            hits = sum(1 for _ in range(lookups) if rng.random() < controller.mix and rng.random() < hit_key_hit_rate)
+            controller.record(hits, lookups)
+            controller.last_step -= 1.0
+            controller.step()
+
+    def test_open_loop_only_measures(self):
+        controller = HitRateController(Mock(), 0.5)
+        controller.record(3, 4)
+        self.assertEqual(controller.step(), 0.75)
+        self.assertEqual(controller.mix, 0.5)
+        self.assertIsNone(controller.step())
+
+    def test_closed_loop_tracks_target(self):
+        controller = HitRateController(Mock(), 0.5, closed_loop=True)
+        self.simulate(controller, hit_key_hit_rate=0.6)
+        self.assertAlmostEqual(controller.mix, 0.5 / 0.6, delta=0.05)
+        recent = [row[3] for row in controller.timeline[-20:]]
+        self.assertAlmostEqual(sum(recent) / len(recent), 0.5, delta=0.02)
+
+    def test_saturated_mix_does_not_wind_up(self):
+        controller = HitRateController(Mock(), 0.9, closed_loop=True)
+        self.simulate(controller, hit_key_hit_rate=0.5, steps=30)
+        self.assertEqual(controller.mix, 1.0)
+        self.assertLess(controller.integral, 1.0)
+
+    def test_worker_reports_are_merged(self):
+        worker = HitRateController(Mock(), 0.5)
+        master = HitRateController(Mock(), 0.5)
+        worker.record(1, 2)
+        data = {}
+        worker.on_report_to_master("worker", data)
+        master.on_worker_report("worker", data)
+        self.assertEqual((worker.hits, worker.lookups), (0, 0))
+        self.assertEqual((master.hits, master.lookups), (1, 2))
+
+    def test_export(self):
+        controller = HitRateController(Mock(), 0.5)
+        controller.record(1, 4)
+        controller.step()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        prefix = os.path.join(directory.name, "results")
+        controller.export(prefix)
+        with open(f"{prefix}_hit_rate.csv") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0][3], "Hit Rate")
+        self.assertEqual(float(rows[1][3]), 0.25)
+
+
+if __name__ == "__main__":
+    unittest.main()
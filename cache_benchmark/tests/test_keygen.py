@@ -0,0 +1,106 @@
+import unittest
+import zlib
+from collections import Counter
+from unittest.mock import Mock, patch
+from redis.crc import key_slot
+from cache_benchmark.keygen import (
+    AliasTable, HotspotKeyChooser, KeyChooser, LatestKeyChooser, MissKeyGenerator, ScrambledZipfianKeyChooser,
+    SequentialKeyChooser, ZipfianKeyChooser, get_key_chooser, get_miss_key_generator, key_bytes, key_name,
+    slot_hash_tags,
+    zeta,
+)
+
+
+class TestKeygen(unittest.TestCase):
+    def test_key_name_matches_init_keys(self):
+        self.assertEqual(key_name(0), "key_1")
+
+    def test_alias_table_follows_weights(self):
+        table = AliasTable([1, 0, 3])
+        counts = Counter(table.sample() for _ in range(20000))
+        self.assertEqual(counts[1], 0)
+        self.assertAlmostEqual(counts[2] / counts[0], 3, delta=0.3)
+
+    def test_zeta_approximation(self):
+        exact = sum(i ** -0.99 for i in range(1, 200001))
+        self.assertAlmostEqual(zeta(200000, 0.99), exact, delta=exact * 1e-6)
+
+    def test_zipfian_is_skewed(self):
+        chooser = ZipfianKeyChooser(1000)
+        counts = Counter(chooser.next_index() for _ in range(20000))
+        self.assertEqual(counts.most_common(1)[0][0], 0)
+        self.assertTrue(all(0 <= index < 1000 for index in counts))
+
+    def test_large_zipfian_uses_closed_form(self):
+        with patch("cache_benchmark.keygen.ALIAS_TABLE_MAX_KEYS", 100):
+            chooser = ZipfianKeyChooser(10_000_000)
+        self.assertIsNone(chooser.table)
+        counts = Counter(chooser.next_index() for _ in range(20000))
+        self.assertEqual(counts.most_common(1)[0][0], 0)
+        self.assertTrue(all(0 <= index < 10_000_000 for index in counts))
+
+    def test_scrambled_zipfian_moves_hot_key(self):
+        chooser = ScrambledZipfianKeyChooser(1000)
+        counts = Counter(chooser.next_index() for _ in range(20000))
+        self.assertGreater(counts.most_common(1)[0][1], 1000)
+        self.assertTrue(all(0 <= index < 1000 for index in counts))
+
+    def test_hotspot(self):
+        chooser = HotspotKeyChooser(1000, hot_fraction=0.1, hot_op_fraction=0.9)
+        hot = sum(chooser.next_index() < 100 for _ in range(10000))
+        self.assertAlmostEqual(hot / 10000, 0.9, delta=0.03)
+
+    def test_latest_follows_inserts(self):
+        chooser = LatestKeyChooser(1000)
+        self.assertEqual(Counter(chooser.next_index() for _ in range(5000)).most_common(1)[0][0], 999)
+        chooser.inserted(10)
+        self.assertEqual(Counter(chooser.next_index() for _ in range(5000)).most_common(1)[0][0], 10)
+
+    def test_sequential_wraps(self):
+        chooser = SequentialKeyChooser(3)
+        self.assertEqual([chooser.next_index() for _ in range(4)], [0, 1, 2, 0])
+
+    def test_get_key_chooser(self):
+        self.assertIs(get_key_chooser("uniform", 10), get_key_chooser("uniform", 10))
+        with self.assertRaises(ValueError):
+            get_key_chooser("pareto", 10)
+        with self.assertRaises(TypeError):
+            type("NoNextIndex", (KeyChooser,), {})(10)
+
+    def test_slot_hash_tags_cover_every_slot(self):
+        tags = slot_hash_tags()
+        self.assertEqual(len(tags), 16384)
+        self.assertEqual([key_slot(tag.encode()) for tag in tags[:100]], list(range(100)))
+
+    def test_miss_keys_are_unique_and_spread_over_slots(self):
+        generator = MissKeyGenerator("worker-1")
+        keys = [generator.next_key() for _ in range(16384 * 2)]
+        self.assertEqual(len(set(keys)), len(keys))
+        self.assertEqual(len({key_slot(key.encode()) for key in keys}), 16384)
+
+    def test_miss_keys_differ_between_workers(self):
+        first = MissKeyGenerator("worker-1").next_key()
+        second = MissKeyGenerator("worker-2").next_key()
+        self.assertNotEqual(first, second)
+
+    def test_miss_keys_are_padded(self):
+        generator = MissKeyGenerator("worker-1", key_length=64)
+        self.assertEqual({len(generator.next_key()) for _ in range(100)}, {64})
+
+    def test_bytes_keys(self):
+        self.assertEqual(key_bytes(0), key_name(0).encode())
+        generator = MissKeyGenerator("worker-1", key_length=64, binary=True)
+        key = generator.next_key()
+        self.assertIsInstance(key, bytes)
+        self.assertEqual(key, MissKeyGenerator("worker-1", key_length=64).next_key().encode())
+
+    def test_get_miss_key_generator_uses_locust_client_id(self):
+        environment = Mock()
+        environment.runner.client_id = "host_abc"
+        generator = get_miss_key_generator(32, environment)
+        self.assertIs(generator, get_miss_key_generator(32))
+        self.assertIn(f"{zlib.crc32(b'host_abc'):08x}", generator.next_key())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+from unittest.mock import Mock
+from cache_benchmark.locust_cache import LocustCache
+
+
+class TestLocustCache(unittest.TestCase):
+    def setUp(self):
+        self.task = Mock()
+        self.task.user.environment.node_tagger = None
+        self.task.user.environment.retry_policy = None
+        self.fire = self.task.user.environment.events.request.fire
+        self.cache_connection = Mock()
+        self.pipe = self.cache_connection.pipeline.return_value
+
+    def test_locust_redis_pipeline_get(self):
+        error = Exception("MOVED")
+        self.pipe.execute.return_value = ["value", None, error]
+        results = LocustCache.locust_redis_pipeline_get(
+            self.task, self.cache_connection, ["key_1", "key_2", "miss"], ["default", "default", "dummy"]
+        )
+        self.assertEqual(results, ["value", None, None])
+        self.assertEqual(self.pipe.get.call_count, 3)
+        self.assertEqual(self.fire.call_count, 4)
+        batch_event = self.fire.call_args_list[0].kwargs
+        self.assertEqual((batch_event["request_type"], batch_event["name"]), ("RedisBatch", "get_batch"))
+        command_events = [call.kwargs for call in self.fire.call_args_list[1:]]
+        self.assertEqual([event["name"] for event in command_events],
+                         ["get_value_default", "get_value_default", "get_value_dummy"])
+        self.assertIs(command_events[2]["exception"], error)
+        self.assertEqual({event["request_type"] for event in command_events}, {"Redis"})
+        self.assertEqual({event["response_time"] for event in command_events}, {batch_event["response_time"]})
+
+    def test_locust_redis_pipeline_set_connection_error(self):
+        self.pipe.execute.side_effect = Exception("connection refused")
+        results = LocustCache.locust_redis_pipeline_set(
+            self.task, self.cache_connection, [("key_1", "v"), ("key_2", "v")], ["default", "default"], 60
+        )
+        self.assertEqual(results, [None, None])
+        self.pipe.set.assert_called_with("key_2", "v", ex=60)
+        self.assertTrue(all(call.kwargs["exception"] is not None for call in self.fire.call_args_list))
+
+    def test_locust_redis_get_fires_corrected_event(self):
+        self.cache_connection.get.return_value = "value"
+        LocustCache.locust_redis_get(self.task, self.cache_connection, "key_1", "default", queue_delay=25.0)
+        uncorrected, corrected = [call.kwargs for call in self.fire.call_args_list]
+        self.assertEqual(corrected["name"], "get_value_default_corrected")
+        self.assertAlmostEqual(corrected["response_time"], uncorrected["response_time"] + 25.0)
+
+    def test_response_length_is_the_payload_size(self):
+        self.cache_connection.get.return_value = b"x" * 300
+        LocustCache.locust_redis_get(self.task, self.cache_connection, b"key_1", "default")
+        self.assertEqual(self.fire.call_args.kwargs["response_length"], 300)
+        LocustCache.locust_redis_set(self.task, self.cache_connection, b"key_1", memoryview(b"y" * 200), "default", 60)
+        self.assertEqual(self.fire.call_args.kwargs["response_length"], 200)
+        self.pipe.execute.return_value = [True, True]
+        LocustCache.locust_redis_pipeline_set(
+            self.task, self.cache_connection, [(b"key_1", b"v" * 10), (b"key_2", b"v" * 30)], ["default", "default"], 60
+        )
+        self.assertEqual([call.kwargs["response_length"] for call in self.fire.call_args_list[-3:]], [40, 10, 30])
+
+    def test_locust_redis_set_without_queue_delay(self):
+        LocustCache.locust_redis_set(self.task, self.cache_connection, "key_1", "value", "default", 60)
+        self.assertEqual(self.fire.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
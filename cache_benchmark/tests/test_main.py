@@ -2,95 +2,98 @@ import unittest
 from unittest.mock import patch, MagicMock
 import sys
 from cache_benchmark.main import main, redis_load_test, valkey_load_test, init_redis_load_test, init_valkey_load_test
+from cache_benchmark.config import BenchmarkConfig
 from cache_benchmark.scenario import RedisUser
 
 class TestMain(unittest.TestCase):
 
-    @patch('cache_benchmark.main.set_env_vars')
+    @patch('cache_benchmark.main.BenchmarkConfig.from_args')
     @patch('cache_benchmark.main.locust_runner_cash_benchmark')
-    def test_redis_load_test(self, mock_locust_runner, mock_set_env_vars):
+    def test_redis_load_test(self, mock_locust_runner, mock_from_args):
         '''
         Test redis_load_test function
 
-        This test case will check if the redis_load_test function calls set_env_vars and locust_runner_cash_benchmark functions with the correct arguments.
+        This test case will check if the redis_load_test function builds the benchmark config and calls locust_runner_cash_benchmark with the correct arguments.
 
         Parameters:
         mock_locust_runner (MagicMock): Mock object for locust_runner_cash_benchmark function
-        mock_set_env_vars (MagicMock): Mock object for set_env_vars function
+        mock_from_args (MagicMock): Mock object for BenchmarkConfig.from_args
         '''
         args = MagicMock()
+        mock_from_args.return_value = BenchmarkConfig()
         redis_load_test(args)
-        mock_set_env_vars.assert_called_once_with(args)
-        mock_locust_runner.assert_called_once_with(args, RedisUser)
+        mock_from_args.assert_called_once_with(args, "redis_cluster")
+        mock_locust_runner.assert_called_once_with(args, RedisUser, mock_from_args.return_value)
 
-    @patch('cache_benchmark.main.set_env_vars')
+    @patch('cache_benchmark.main.BenchmarkConfig.from_args')
     @patch('cache_benchmark.main.locust_runner_cash_benchmark')
-    def test_valkey_load_test(self, mock_locust_runner, mock_set_env_vars):
+    def test_valkey_load_test(self, mock_locust_runner, mock_from_args):
         '''
         Test valkey_load_test function
 
-        This test case will check if the valkey_load_test function calls set_env_vars and locust_runner_cash_benchmark functions with the correct arguments.
+        This test case will check if the valkey_load_test function builds the benchmark config and calls locust_runner_cash_benchmark with the correct arguments.
 
         Parameters:
         mock_locust_runner (MagicMock): Mock object for locust_runner_cash_benchmark function
-        mock_set_env_vars (MagicMock): Mock object for set_env_vars function
+        mock_from_args (MagicMock): Mock object for BenchmarkConfig.from_args
         '''
         args = MagicMock()
+        mock_from_args.return_value = BenchmarkConfig()
         valkey_load_test(args)
-        mock_set_env_vars.assert_called_once_with(args)
-        mock_locust_runner.assert_called_once_with(args, RedisUser)
+        mock_from_args.assert_called_once_with(args, "valkey_cluster")
+        mock_locust_runner.assert_called_once_with(args, RedisUser, mock_from_args.return_value)
 
-    @patch('cache_benchmark.main.set_env_vars')
+    @patch('cache_benchmark.main.BenchmarkConfig.from_args')
     @patch('cache_benchmark.main.CacheConnect.valkey_connect')
-    @patch('cache_benchmark.main.generate_string')
+    @patch('cache_benchmark.main.preload_value')
     @patch('cache_benchmark.main.init_cache_set')
-    @patch.dict('os.environ', {'TTL': '60'})
-    def test_init_valkey_load_test_success(self, mock_init_cache_set, mock_generate_string, mock_valkey_connect, mock_set_env_vars):
+    def test_init_valkey_load_test_success(self, mock_init_cache_set, mock_preload_value, mock_valkey_connect, mock_from_args):
         '''
         Test init_valkey_load_test function
 
-        This test case will check if the init_valkey_load_test function calls set_env_vars, valkey_connect, generate_string, and init_cache_set functions with the correct arguments.
+        This test case will check if the init_valkey_load_test function builds the benchmark config and calls valkey_connect, preload_value, and init_cache_set functions with the correct arguments.
 
         Parameters:
         mock_init_cache_set (MagicMock): Mock object for init_cache_set function
-        mock_generate_string (MagicMock): Mock object for generate_string function
+        mock_preload_value (MagicMock): Mock object for preload_value function
         mock_valkey_connect (MagicMock): Mock object for valkey_connect function
-        mock_set_env_vars (MagicMock): Mock object for set_env_vars function
+        mock_from_args (MagicMock): Mock object for BenchmarkConfig.from_args
         '''
         args = MagicMock()
+        mock_from_args.return_value = BenchmarkConfig(cache_type="valkey_cluster", ttl=60, set_keys=1000)
         mock_valkey_connect.return_value = MagicMock()
-        mock_generate_string.return_value = "test_value"
+        mock_preload_value.return_value = "test_value"
         init_valkey_load_test(args)
-        mock_set_env_vars.assert_called_once_with(args)
+        mock_from_args.assert_called_once_with(args, "valkey_cluster")
         mock_valkey_connect.assert_called_once()
-        mock_generate_string.assert_called_once_with(args.value_size)
-        mock_init_cache_set.assert_called_once_with(mock_valkey_connect.return_value, "test_value", 60)
+        mock_preload_value.assert_called_once_with(mock_from_args.return_value)
+        mock_init_cache_set.assert_called_once_with(mock_valkey_connect.return_value, "test_value", 60, 1000, args.preload_batch_size, args.preload_concurrency)
 
-    @patch('cache_benchmark.main.set_env_vars')
+    @patch('cache_benchmark.main.BenchmarkConfig.from_args')
     @patch('cache_benchmark.main.CacheConnect.redis_connect')
-    @patch('cache_benchmark.main.generate_string')
+    @patch('cache_benchmark.main.preload_value')
     @patch('cache_benchmark.main.init_cache_set')
-    @patch.dict('os.environ', {'TTL': '60'})
-    def test_init_redis_load_test_success(self, mock_init_cache_set, mock_generate_string, mock_redis_connect, mock_set_env_vars):
+    def test_init_redis_load_test_success(self, mock_init_cache_set, mock_preload_value, mock_redis_connect, mock_from_args):
         '''
         Test init_redis_load_test function
 
-        This test case will check if the init_redis_load_test function calls set_env_vars, redis_connect, generate_string, and init_cache_set functions with the correct arguments.
+        This test case will check if the init_redis_load_test function builds the benchmark config and calls redis_connect, preload_value, and init_cache_set functions with the correct arguments.
 
         Parameters:
         mock_init_cache_set (MagicMock): Mock object for init_cache_set function
-        mock_generate_string (MagicMock): Mock object for generate_string function
+        mock_preload_value (MagicMock): Mock object for preload_value function
         mock_redis_connect (MagicMock): Mock object for redis_connect function
-        mock_set_env_vars (MagicMock): Mock object for set_env_vars function
+        mock_from_args (MagicMock): Mock object for BenchmarkConfig.from_args
         '''
         args = MagicMock()
+        mock_from_args.return_value = BenchmarkConfig(ttl=60, set_keys=1000)
         mock_redis_connect.return_value = MagicMock()
-        mock_generate_string.return_value = "test_value"
+        mock_preload_value.return_value = "test_value"
         init_redis_load_test(args)
-        mock_set_env_vars.assert_called_once_with(args)
+        mock_from_args.assert_called_once_with(args, "redis_cluster")
         mock_redis_connect.assert_called_once()
-        mock_generate_string.assert_called_once_with(args.value_size)
-        mock_init_cache_set.assert_called_once_with(mock_redis_connect.return_value, "test_value", 60)
+        mock_preload_value.assert_called_once_with(mock_from_args.return_value)
+        mock_init_cache_set.assert_called_once_with(mock_redis_connect.return_value, "test_value", 60, 1000, args.preload_batch_size, args.preload_concurrency)
 
     @patch('argparse.ArgumentParser.parse_args')
     @patch('cache_benchmark.main.sys.exit')
@@ -0,0 +1,91 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.memory import ESTIMATED_KEY_OVERHEAD, KeyspaceTracker
+
+
+class TestKeyspaceTracker(unittest.TestCase):
+    def setUp(self):
+        self.environment = Mock()
+        self.environment.benchmark_config = BenchmarkConfig()
+        self.tracker = KeyspaceTracker(self.environment)
+
+    def test_writes_expire_after_their_ttl(self):
+        for _ in range(100):
+            self.tracker.record("key_1", 10, 995)
+        self.tracker.record("key_2", 60, 995)
+        self.tracker.step(now=0)
+        self.tracker.step(now=9)
+        self.assertEqual(self.tracker.buckets[10].live_keys, 100)
+        self.tracker.step(now=10)
+        self.assertEqual((self.tracker.buckets[10].live_keys, self.tracker.buckets[10].expired), (0, 100))
+        self.assertEqual(self.tracker.buckets[60].live_keys, 1)
+        self.assertEqual(self.tracker.buckets[10].bytes_per_key(), 1000 + ESTIMATED_KEY_OVERHEAD)
+
+    def test_worker_counts_are_merged(self):
+        worker = KeyspaceTracker(Mock())
+        worker.record(b"key_1", 30, 100)
+        worker.record(b"key_2", 30, 100)
+        data = {}
+        worker.on_report_to_master("worker", data)
+        self.assertEqual(worker.pending, {})
+        self.tracker.on_worker_report("worker", data)
+        self.tracker.step()
+        bucket = self.tracker.buckets[30]
+        self.assertEqual((bucket.writes, bucket.bytes), (2, 210))
+        self.assertEqual(list(bucket.sample_keys), [b"key_1", b"key_2"])
+
+    def test_projection_and_eviction_pressure(self):
+        self.tracker.start_time = time.monotonic() - 100
+        for _ in range(1000):
+            self.tracker.record("key_1", 60, 995)
+        self.tracker.step()
+        self.tracker.buckets[60].memory_usage = [1200]
+        self.tracker.samples = [
+            {"elapsed": 0, "used_memory": 10_000_000, "used_memory_startup": 1_000_000, "maxmemory": 60_000_000,
+             "maxmemory_policy": "allkeys-lru", "evicted_keys": 0, "expired_keys": 0},
+            {"elapsed": 100, "used_memory": 20_000_000, "used_memory_startup": 1_000_000, "maxmemory": 60_000_000,
+             "maxmemory_policy": "allkeys-lru", "evicted_keys": 5, "expired_keys": 70},
+        ]
+        projection = self.tracker.projection(request_rate=20, target_rps=40)
+        bucket, = projection["buckets"]
+        self.assertAlmostEqual(bucket["write_rate"], 10, delta=0.1)
+        self.assertAlmostEqual(projection["steady_keys"], 600, delta=5)
+        self.assertAlmostEqual(projection["steady_memory"], 1_000_000 + 600 * 1200, delta=10_000)
+        self.assertAlmostEqual(projection["eviction_pressure"], 0.029, delta=0.001)
+        self.assertAlmostEqual(projection["time_to_maxmemory"], 400, delta=1)
+        self.assertEqual((projection["observed_evicted_keys"], projection["observed_expired_keys"]), (5, 70))
+        self.assertAlmostEqual(projection["target_steady_memory"], 1_000_000 + 1200 * 1200, delta=20_000)
+
+    @patch("cache_benchmark.memory.discover_nodes")
+    def test_sample_and_export(self, mock_discover_nodes):
+        primary, replica = Mock(), Mock()
+        primary.info.return_value = {
+            "used_memory": 5000, "used_memory_startup": 1000, "maxmemory": 0, "evicted_keys": 0, "db0": {"keys": 3}}
+        self.tracker.clients = {"10.0.0.1:6379": ("primary", primary), "10.0.0.2:6379": ("replica", replica)}
+        self.environment.cache_conn.memory_usage.return_value = 1100
+        self.environment.stats.entries = {}
+        self.tracker.record("key_1", 60, 1000)
+        self.tracker.step()
+        self.tracker.sample()
+        sample, = self.tracker.samples
+        self.assertEqual((sample["nodes"], sample["used_memory"], sample["keys"]), (1, 5000, 3))
+        replica.info.assert_not_called()
+        self.assertEqual(self.tracker.buckets[60].memory_usage, [1100])
+        self.tracker.stop()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        prefix = os.path.join(directory.name, "results")
+        self.tracker.export(prefix, BenchmarkConfig())
+        with open(f"{prefix}_memory.json") as f:
+            report = json.load(f)
+        self.assertIsNone(report["projection"]["eviction_pressure"])
+        self.assertEqual(report["projection"]["buckets"][0]["bytes_per_key"], 1100)
+
+
+if __name__ == "__main__":
+    unittest.main()
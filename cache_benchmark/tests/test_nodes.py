@@ -0,0 +1,50 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock
+from redis.crc import key_slot
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.locust_cache import LocustCache
+from cache_benchmark.nodes import NodeTagger, get_node_tagger
+
+
+class TestNodeTagger(unittest.TestCase):
+    def setUp(self):
+        self.environment = Mock()
+        nodes_manager = self.environment.cache_conn.nodes_manager
+        nodes_manager.get_node_from_slot.side_effect = lambda slot: SimpleNamespace(
+            name="10.0.0.1:6379" if slot < 8192 else "10.0.0.2:6379")
+
+    def test_tags_keys_with_their_node(self):
+        tagger = NodeTagger(self.environment)
+        self.assertEqual(tagger.tag("key_1"), "10.0.0.2:6379" if key_slot(b"key_1") >= 8192 else "10.0.0.1:6379")
+        tagger.tag("key_1")
+        self.assertEqual(self.environment.cache_conn.nodes_manager.get_node_from_slot.call_count, 1)
+
+    def test_slot_mode_adds_slot_range(self):
+        tagger = NodeTagger(self.environment, "slot")
+        slot = key_slot(b"{a}x")
+        start = slot - slot % 1024
+        self.assertTrue(tagger.tag("{a}x").endswith(f"[{start}-{start + 1023}]"))
+
+    def test_off_mode_has_no_tagger(self):
+        self.assertIsNone(get_node_tagger(self.environment, "off"))
+
+    def test_replica_reads_are_tagged_with_the_slot_owner(self):
+        self.environment.benchmark_config = BenchmarkConfig(read_from_replicas=True)
+        with self.assertLogs(level="WARNING"):
+            tagger = get_node_tagger(self.environment, "node")
+        tagger.tag("key_1")
+        self.environment.cache_conn.nodes_manager.get_node_from_slot.assert_called_once_with(key_slot(b"key_1"))
+
+    def test_get_fires_node_event(self):
+        task = Mock()
+        task.user.environment.node_tagger = NodeTagger(self.environment)
+        task.user.environment.retry_policy = None
+        LocustCache.locust_redis_get(task, Mock(), "{a}x", "default")
+        node_event = task.user.environment.events.request.fire.call_args_list[-1].kwargs
+        self.assertEqual(node_event["request_type"], "RedisNode")
+        self.assertTrue(node_event["name"].startswith("get_value_default@10.0.0."))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+from cache_benchmark.payload import PayloadPool, get_payload_pool, sample_sizes
+
+
+class TestPayload(unittest.TestCase):
+    def test_fixed_pool_returns_shared_payload(self):
+        pool = PayloadPool(sample_sizes("fixed", 2))
+        first = pool.next()
+        self.assertEqual(len(first), 2048)
+        self.assertIs(first, pool.next())
+        self.assertTrue(first.readonly)
+
+    def test_uniform_sizes_within_bounds(self):
+        sizes = sample_sizes("uniform", 4, value_size_min=1)
+        self.assertTrue(all(1024 <= size <= 4096 for size in sizes))
+        self.assertGreater(len(set(sizes)), 1)
+
+    def test_lognormal_sizes_are_clamped(self):
+        sizes = sample_sizes("lognormal", 1, value_size_max=2, sigma=2.0)
+        self.assertTrue(all(0 <= size <= 2048 for size in sizes))
+
+    def test_histogram_sizes_come_from_file(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as f:
+            f.write("# size,weight\n100,1\n5000,3\n")
+        try:
+            sizes = sample_sizes("histogram", 1, histogram_file=f.name)
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(set(sizes), {100, 5000})
+        self.assertGreater(sizes.count(5000), sizes.count(100))
+
+    def test_payloads_share_one_buffer(self):
+        pool = PayloadPool([10, 20, 30])
+        self.assertEqual({len(pool.next()) for _ in range(200)}, {10, 20, 30})
+        self.assertEqual(pool.mean_size, 20)
+
+    def test_get_payload_pool_is_cached(self):
+        self.assertIs(get_payload_pool("fixed", 1), get_payload_pool("fixed", 1))
+
+    def test_unknown_distribution(self):
+        with self.assertRaises(ValueError):
+            sample_sizes("pareto", 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
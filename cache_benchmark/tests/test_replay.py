@@ -0,0 +1,71 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import Mock, patch
+from cache_benchmark.replay import BinaryTrace, ReplayEngine, convert_trace, open_trace, parse_monitor_line
+
+MONITOR_OUTPUT = b"OK\n" + b"".join(
+    b'%d.000000 [0 10.0.0.1:5000] "SET" "key_%d" "v\\"al\\x00ue"\n' % (1700000000 + i, i) for i in range(50)
+) + b'1700000050.000000 [0 lua] "GET" "key_1"\n1700000051.000000 [0 10.0.0.1:5000] "MONITOR"\n'
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".log")
+        with os.fdopen(fd, "wb") as f:
+            f.write(MONITOR_OUTPUT)
+        self.addCleanup(os.remove, self.path)
+
+    def convert(self):
+        destination = self.path + ".bin"
+        self.addCleanup(os.remove, destination)
+        with patch("cache_benchmark.replay.INDEX_INTERVAL", 4):
+            convert_trace(self.path, destination)
+        return destination
+
+    def test_parse_monitor_line(self):
+        timestamp, args = parse_monitor_line(b'1700000000.500000 [0 unix:/tmp/r.sock] "SET" "a b" "\\xff\\n"')
+        self.assertEqual(timestamp, 1700000000.5)
+        self.assertEqual(args, [b"SET", b"a b", b"\xff\n"])
+        self.assertIsNone(parse_monitor_line(b'1700000000.500000 [0 lua] "GET" "a"'))
+        self.assertIsNone(parse_monitor_line(b"OK"))
+
+    def test_shards_cover_the_trace_once(self):
+        for path in (self.path, self.convert()):
+            full = list(open_trace(path))
+            self.assertEqual(len(full), 51)
+            self.assertEqual(full[0][1], [b"SET", b"key_0", b'v"al\x00ue'])
+            shards = [list(open_trace(path, index, 3)) for index in range(3)]
+            self.assertTrue(all(shards))
+            self.assertEqual([record for shard in shards for record in shard], full)
+
+    def test_binary_trace_is_detected(self):
+        self.assertIsInstance(open_trace(self.convert()), BinaryTrace)
+        with self.assertRaises(ValueError):
+            open_trace(self.path, 2, 2)
+
+    def test_replay_as_fast_as_possible(self):
+        cache_conn = Mock()
+        engine = ReplayEngine(cache_conn, open_trace(self.path), speed=0, concurrency=4)
+        stats = engine.run()
+        self.assertEqual(cache_conn.execute_command.call_count, 50)
+        cache_conn.execute_command.assert_any_call("SET", b"key_3", b'v"al\x00ue')
+        self.assertEqual(engine.skipped, 1)
+        self.assertEqual(stats.get("set", "Redis").num_requests, 50)
+        self.assertNotIn("set_corrected", engine.histograms)
+
+    def test_replay_keeps_scaled_timing(self):
+        trace = open_trace(self.path, 0, 5)
+        records = list(trace)
+        engine = ReplayEngine(Mock(), trace, speed=100)
+        start_time = time.perf_counter()
+        engine.run()
+        # Commands were recorded one second apart, so at 100x the shard takes about 10ms per command.
+        expected = (records[-1][0] - trace.first_timestamp()) / 100
+        self.assertGreaterEqual(time.perf_counter() - start_time, expected * 0.9)
+        self.assertEqual(engine.histograms["set_corrected"].total_count, len(records))
+
+
+if __name__ == "__main__":
+    unittest.main()
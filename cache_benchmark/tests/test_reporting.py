@@ -0,0 +1,51 @@
+import io
+import json
+import unittest
+from unittest.mock import Mock, patch
+from locust.stats import RequestStats
+from cache_benchmark.reporting import ConsoleSink, PeriodicReporter, StdoutJsonLinesSink, open_report_sinks, parse_report_sinks
+
+
+class TestReporting(unittest.TestCase):
+    def setUp(self):
+        self.stats = RequestStats()
+
+    def test_parse_report_sinks(self):
+        self.assertEqual(parse_report_sinks("console, jsonl"), ["console", "jsonl"])
+        self.assertEqual(parse_report_sinks("none"), [])
+        with self.assertRaises(ValueError):
+            parse_report_sinks("console,graphite")
+
+    def test_reporter_feeds_every_sink_once_per_interval(self):
+        sinks = [Mock(filename=None), Mock(filename="results_timeseries.csv")]
+        reporter = PeriodicReporter(Mock(stats=self.stats), sinks)
+        self.stats.log_request("Redis", "get_value_default", 3, 0)
+        reporter.report()
+        reporter.report()
+        self.stats.log_request("Redis", "get_value_default", 4, 0)
+        reporter.stop()
+        for sink in sinks:
+            self.assertEqual([call.args[0][0]["requests"] for call in sink.write.call_args_list], [1, 1])
+            sink.close.assert_called_once()
+
+    def test_failing_sink_does_not_stop_the_others(self):
+        broken, working = Mock(filename=None), Mock(filename=None)
+        broken.write.side_effect = OSError("disk full")
+        reporter = PeriodicReporter(Mock(stats=self.stats), [broken, working])
+        self.stats.log_request("Redis", "get_value_default", 3, 0)
+        reporter.report()
+        working.write.assert_called_once()
+
+    def test_console_and_jsonl_sinks(self):
+        self.stats.log_request("Redis", "get_value_default", 3, 0)
+        reporter = PeriodicReporter(Mock(stats=self.stats), open_report_sinks(["console", "jsonl"]))
+        self.assertIsInstance(reporter.sinks[0], ConsoleSink)
+        self.assertIsInstance(reporter.sinks[1], StdoutJsonLinesSink)
+        with patch("sys.stdout", new_callable=io.StringIO) as stdout, self.assertLogs(level="INFO") as logs:
+            reporter.report()
+        self.assertEqual(json.loads(stdout.getvalue())["name"], "get_value_default")
+        self.assertIn("get_value_default", logs.output[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
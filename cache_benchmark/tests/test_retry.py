@@ -0,0 +1,84 @@
+import time
+import unittest
+from unittest.mock import Mock, patch
+from redis.exceptions import ConnectionError as RedisConnectionError, ResponseError
+from cache_benchmark.locust_cache import LocustCache
+from cache_benchmark.retry import CircuitOpenError, RetryPolicy
+
+real_sleep = time.sleep
+
+
+@patch("cache_benchmark.retry.time.sleep")
+class TestRetryPolicy(unittest.TestCase):
+    def setUp(self):
+        self.task = Mock()
+        self.task.user.environment.node_tagger = None
+        self.fire = self.task.user.environment.events.request.fire
+        self.cache_connection = Mock()
+
+    def events(self, request_type):
+        return [call.kwargs for call in self.fire.call_args_list if call.kwargs["request_type"] == request_type]
+
+    def test_success_does_not_touch_the_policy(self, mock_sleep):
+        policy = self.task.user.environment.retry_policy = Mock(open_until=0.0)
+        self.cache_connection.get.return_value = "value"
+        self.assertEqual(LocustCache.locust_redis_get(self.task, self.cache_connection, "key_1", "default"), "value")
+        policy.retry.assert_not_called()
+
+    def test_retries_connection_errors_with_backoff(self, mock_sleep):
+        self.task.user.environment.retry_policy = RetryPolicy(retry_count=3, retry_wait=0.1)
+        self.cache_connection.get.side_effect = [RedisConnectionError("reset"), RedisConnectionError("reset"), "value"]
+        result = LocustCache.locust_redis_get(self.task, self.cache_connection, "key_1", "default")
+        self.assertEqual(result, "value")
+        retries = self.events("Retry")
+        self.assertEqual([event["name"] for event in retries], ["get_value_default_retry"] * 2)
+        self.assertIsNotNone(retries[0]["exception"])
+        self.assertIsNone(retries[1]["exception"])
+        self.assertIsNone(self.events("Redis")[0]["exception"])
+        waits = [call.args[0] for call in mock_sleep.call_args_list]
+        self.assertTrue(0 <= waits[0] <= 0.1 and 0 <= waits[1] <= 0.2)
+
+    def test_latency_spans_the_retries(self, mock_sleep):
+        mock_sleep.side_effect = lambda seconds: real_sleep(0.2)
+        self.task.user.environment.retry_policy = RetryPolicy(retry_count=1, retry_wait=1)
+        self.cache_connection.get.side_effect = [RedisConnectionError("reset"), "value"]
+        LocustCache.locust_redis_get(self.task, self.cache_connection, "key_1", "default")
+        mock_sleep.assert_called_once()
+        event, = self.events("Redis")
+        self.assertIsNone(event["exception"])
+        self.assertGreaterEqual(event["response_time"], 200)
+        self.assertLess(self.events("Retry")[0]["response_time"], 100)
+
+    def test_other_errors_are_not_retried(self, mock_sleep):
+        self.task.user.environment.retry_policy = RetryPolicy(retry_count=3, retry_wait=0.1)
+        self.cache_connection.get.side_effect = ResponseError("WRONGTYPE")
+        self.assertIsNone(LocustCache.locust_redis_get(self.task, self.cache_connection, "key_1", "default"))
+        self.assertEqual(self.cache_connection.get.call_count, 1)
+        self.assertEqual(self.events("Retry"), [])
+
+    def test_budget_limits_retries(self, mock_sleep):
+        policy = RetryPolicy(retry_count=5, retry_wait=0, budget=2)
+        self.task.user.environment.retry_policy = policy
+        self.cache_connection.get.side_effect = TimeoutError("timeout")
+        LocustCache.locust_redis_get(self.task, self.cache_connection, "key_1", "default")
+        self.assertEqual(self.cache_connection.get.call_count, 3)
+
+    def test_breaker_fails_fast(self, mock_sleep):
+        self.task.user.environment.retry_policy = RetryPolicy(retry_count=0, breaker_threshold=2)
+        self.cache_connection.get.side_effect = TimeoutError("timeout")
+        for _ in range(3):
+            LocustCache.locust_redis_get(self.task, self.cache_connection, "key_1", "default")
+        self.assertEqual(self.cache_connection.get.call_count, 2)
+        self.assertIsInstance(self.events("Redis")[-1]["exception"], CircuitOpenError)
+
+    def test_breaker_closes_after_cooldown(self, mock_sleep):
+        policy = RetryPolicy(retry_count=0, breaker_threshold=1)
+        policy.record_failure()
+        self.assertIsInstance(policy.reject(), CircuitOpenError)
+        policy.open_until = 1.0
+        self.assertIsNone(policy.reject())
+        self.assertEqual(policy.open_until, 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
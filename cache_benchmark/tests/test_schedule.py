@@ -0,0 +1,29 @@
+import time
+import unittest
+from unittest.mock import patch
+from cache_benchmark.schedule import OpenLoopSchedule
+
+
+class TestOpenLoopSchedule(unittest.TestCase):
+    def test_interval_shares_target_between_users(self):
+        schedule = OpenLoopSchedule(target_rps=1000, users=10, requests_per_task=2)
+        self.assertAlmostEqual(schedule.interval, 0.02)
+
+    def test_wait_until_intended_time(self):
+        with patch("cache_benchmark.schedule.random.random", return_value=0.5):
+            schedule = OpenLoopSchedule(target_rps=1, users=1)
+        self.assertGreater(schedule.wait(), 0.4)
+
+    def test_late_requests_accumulate_queue_delay(self):
+        with patch("cache_benchmark.schedule.random.random", return_value=0.0):
+            schedule = OpenLoopSchedule(target_rps=100, users=1)
+        time.sleep(0.05)
+        first_delay = schedule.advance()
+        second_delay = schedule.advance()
+        self.assertGreaterEqual(first_delay, 50)
+        self.assertAlmostEqual(first_delay - second_delay, 10, delta=1)
+        self.assertEqual(schedule.wait(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,43 @@
+import dataclasses
+import json
+import os
+import tempfile
+import unittest
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.selfbench import StubConnection, report_selfbench, run_selfbench
+
+
+class TestSelfbench(unittest.TestCase):
+    def test_stub_connection(self):
+        stub = StubConnection(keys=2)
+        self.assertEqual(stub.get("key_2"), "x")
+        stub.set("miss", "v")
+        self.assertIsNone(stub.get("miss"))
+        pipe = stub.pipeline()
+        pipe.get("key_1")
+        pipe.get("key_3")
+        self.assertEqual(pipe.execute(), ["x", None])
+
+    def test_workload_commands(self):
+        operations = [{"command": command} for command in
+                      ("get", "set", "mget", "hgetall", "hset", "incr", "expire", "del", "zadd", "zrange")]
+        operations.append({"command": "evalsha", "script": "return redis.call('GET', KEYS[1])"})
+        config = dataclasses.replace(BenchmarkConfig(), workload=json.dumps({"operations": operations}))
+        results = run_selfbench(config, iterations=200, greenlets=10)
+        self.assertGreater(results["ops_per_sec_per_core"], 0)
+
+    def test_run_and_report(self):
+        results = run_selfbench(BenchmarkConfig(), iterations=200, greenlets=10)
+        self.assertGreater(results["ops_per_sec_per_core"], 0)
+        for stage in ("stub get", "event fire", "retry check", "get wrapper", "scenario", "gevent switch"):
+            self.assertGreaterEqual(results["stages"][stage], 0)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        filename = os.path.join(directory.name, "selfbench.json")
+        report_selfbench(results, filename)
+        with open(filename) as f:
+            self.assertEqual(json.load(f)["iterations"], 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
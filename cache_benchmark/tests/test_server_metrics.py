@@ -0,0 +1,61 @@
+import csv
+import os
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.server_metrics import HEADER, ServerMetricsSampler
+
+
+class TestServerMetricsSampler(unittest.TestCase):
+    def setUp(self):
+        self.environment = Mock()
+        self.environment.benchmark_config = BenchmarkConfig()
+        self.environment.cache_conn.get_nodes.return_value = [
+            SimpleNamespace(name="10.0.0.1:6379", host="10.0.0.1", port=6379, server_type="primary"),
+            SimpleNamespace(name="10.0.0.2:6379", host="10.0.0.2", port=6379, server_type="replica"),
+        ]
+        total = self.environment.stats.total
+        total.current_rps = 1000.0
+        total.current_fail_per_sec = 0.0
+        total.get_current_response_time_percentile.return_value = 2
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.filename = os.path.join(directory.name, "results_server_metrics.csv")
+
+    @patch("cache_benchmark.server_metrics.CacheConnect.node_connect")
+    def test_samples_every_node(self, mock_node_connect):
+        node = mock_node_connect.return_value
+        node.info.return_value = {"instantaneous_ops_per_sec": 500, "used_memory": 1024, "db0": {"keys": 10}}
+        sampler = ServerMetricsSampler(self.environment, 60, self.filename)
+        self.assertTrue(sampler.start())
+        sampler.sample()
+        sampler.stop()
+        self.assertEqual(mock_node_connect.call_count, 2)
+        with open(self.filename) as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual(list(rows[0]), HEADER)
+        self.assertEqual({row["Node"] for row in rows}, {"10.0.0.1:6379", "10.0.0.2:6379"})
+        self.assertEqual(rows[-1]["instantaneous_ops_per_sec"], "500")
+        self.assertEqual(rows[-1]["keys"], "10")
+        self.assertEqual(rows[-1]["Client Requests/s"], "1000.0")
+        node.close.assert_called()
+
+    @patch("cache_benchmark.server_metrics.CacheConnect.node_connect")
+    def test_failed_node_is_skipped(self, mock_node_connect):
+        mock_node_connect.return_value.info.side_effect = ConnectionError("down")
+        sampler = ServerMetricsSampler(self.environment, 60, self.filename)
+        sampler.start()
+        sampler.sample()
+        sampler.stop()
+        with open(self.filename) as f:
+            self.assertEqual(len(list(csv.reader(f))), 1)
+
+    def test_no_connection(self):
+        self.environment.cache_conn = None
+        self.assertFalse(ServerMetricsSampler(self.environment, 1, self.filename).start())
+
+
+if __name__ == "__main__":
+    unittest.main()
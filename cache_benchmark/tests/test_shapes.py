@@ -0,0 +1,96 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import Mock
+from locust.stats import RequestStats
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.shapes import BenchmarkShape, RampShape, SaturationSearch, SineShape, SpikeShape, StepShape, get_load_shape
+
+
+def users_at(shape, run_time):
+    shape.get_run_time = lambda: run_time
+    tick = shape.tick()
+    return tick and tick[0]
+
+
+class TestLoadShapes(unittest.TestCase):
+    def test_step(self):
+        shape = StepShape(100, 50, steps=5)
+        self.assertEqual([users_at(shape, t) for t in (0, 9, 10, 45, 50)], [20, 20, 40, 100, None])
+
+    def test_ramp(self):
+        shape = RampShape(100, 100)
+        self.assertEqual([users_at(shape, t) for t in (0, 50, 99)], [1, 50, 99])
+
+    def test_spike(self):
+        shape = SpikeShape(100, 100, base=0.2)
+        self.assertEqual([users_at(shape, t) for t in (10, 40, 59, 60)], [20, 100, 100, 20])
+
+    def test_sine(self):
+        shape = SineShape(100, 300, base=0.1, period=60)
+        self.assertEqual([users_at(shape, t) for t in (0, 30, 60)], [10, 100, 10])
+
+    def test_get_load_shape(self):
+        self.assertIsNone(get_load_shape(BenchmarkConfig(), 10, 60))
+        self.assertIsInstance(get_load_shape(BenchmarkConfig(shape="spike"), 10, 60), SpikeShape)
+        self.assertIsInstance(get_load_shape(BenchmarkConfig(shape="spike", find_max=True), 10, 60), SaturationSearch)
+
+    def test_users_at_must_be_overridden(self):
+        with self.assertRaises(TypeError):
+            type("NoUsersAt", (BenchmarkShape,), {})(10, 60)
+
+
+class TestSaturationSearch(unittest.TestCase):
+    def setUp(self):
+        self.stats = RequestStats()
+        self.search = SaturationSearch(40, 40, steps=4, slo_p99=10, slo_error_rate=0.01)
+        self.search.runner = Mock(stats=self.stats)
+
+    def run_step(self, step, response_time, failures=0, requests=100):
+        users_at(self.search, step * 10 + 3)
+        for _ in range(requests):
+            self.stats.log_request("Redis", "get_value_default", response_time, 0)
+            self.stats.log_request("Retry", "get_value_default_retry", 500, 0)
+        for _ in range(failures):
+            self.stats.log_error("Redis", "get_value_default", "timeout")
+        return users_at(self.search, step * 10 + 10)
+
+    def test_stops_at_the_first_step_breaking_the_slo(self):
+        self.assertEqual(self.run_step(0, 2), 20)
+        self.assertEqual(self.run_step(1, 5, requests=200), 30)
+        self.assertIsNone(self.run_step(2, 50))
+        self.assertEqual([result["users"] for result in self.search.results], [10, 20, 30])
+        self.assertEqual([result["within_slo"] for result in self.search.results], [True, True, False])
+        self.assertEqual(self.search.best()["p99_ms"], 5)
+
+    def test_batches_are_measured_per_command(self):
+        users_at(self.search, 3)
+        for latency in (4, 40):
+            self.stats.log_request("RedisBatch", "get_batch", latency, 0)
+            for _ in range(10):
+                self.stats.log_request("Redis", "get_value_default", latency, 0)
+        users_at(self.search, 10)
+        result, = self.search.results
+        self.assertEqual(result["p99_ms"], 40)
+        self.assertAlmostEqual(result["rps"], 20 / 7, places=0)
+        self.assertFalse(result["within_slo"])
+
+    def test_error_rate_breaks_the_slo(self):
+        self.assertIsNone(self.run_step(0, 2, failures=5))
+        self.assertIsNone(self.search.best())
+
+    def test_export(self):
+        self.run_step(0, 2)
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        prefix = os.path.join(directory.name, "results")
+        self.search.export(prefix, BenchmarkConfig(hit_rate=0.8))
+        with open(f"{prefix}_find_max.json") as file:
+            result = json.load(file)
+        self.assertEqual(result["hit_rate"], 0.8)
+        self.assertEqual(result["max_sustainable"]["users"], 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
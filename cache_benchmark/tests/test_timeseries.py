@@ -0,0 +1,66 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from locust.stats import RequestStats
+from cache_benchmark.timeseries import IntervalStats, open_timeseries_sink
+
+
+class TestTimeSeries(unittest.TestCase):
+    def setUp(self):
+        self.stats = RequestStats()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.prefix = os.path.join(directory.name, "results")
+
+    def log(self, name, response_times, failures=0):
+        for response_time in response_times:
+            self.stats.log_request("Redis", name, response_time, 0)
+        for _ in range(failures):
+            self.stats.log_error("Redis", name, Exception("timeout"))
+
+    def test_rows_cover_only_the_interval(self):
+        interval_stats = IntervalStats(self.stats)
+        self.log("get_value_default", [1] * 99 + [100], failures=1)
+        row, = interval_stats.rows()
+        self.assertEqual((row["name"], row["requests"], row["failures"]), ("get_value_default", 100, 1))
+        self.assertEqual((row["p50_ms"], row["p999_ms"], row["max_ms"]), (1, 100, 100))
+        self.log("get_value_default", [5] * 10)
+        row, = interval_stats.rows()
+        self.assertEqual((row["requests"], row["failures"], row["p99_ms"], row["avg_ms"]), (10, 0, 5, 5))
+        self.assertEqual(interval_stats.rows(), [])
+
+    def test_rows_report_bandwidth(self):
+        interval_stats = IntervalStats(self.stats)
+        interval_stats.last_time -= 1
+        for _ in range(10):
+            self.stats.log_request("Redis", "get_value_default", 1, 100000)
+        row, = interval_stats.rows()
+        self.assertAlmostEqual(row["mb_per_sec"], 1.0, delta=0.01)
+
+    def test_csv_sink(self):
+        sink = open_timeseries_sink("csv", self.prefix)
+        sink.write([{"name": "set_value_dummy", "requests": 2}])
+        sink.write([{"name": "set_value_dummy", "requests": 1}])
+        sink.close()
+        with open(f"{self.prefix}_timeseries.csv") as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row["requests"] for row in rows], ["2", "1"])
+
+    def test_jsonl_sink(self):
+        sink = open_timeseries_sink("jsonl", self.prefix)
+        sink.write([{"name": "get_value_default", "requests": 1}])
+        sink.close()
+        with open(f"{self.prefix}_timeseries.jsonl") as f:
+            self.assertEqual(json.loads(f.readline())["requests"], 1)
+
+    def test_parquet_requires_pyarrow(self):
+        with patch("cache_benchmark.timeseries.pyarrow", None):
+            with self.assertRaises(ValueError):
+                open_timeseries_sink("parquet", self.prefix)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+import gevent
+from redis.cluster import PRIMARY, ClusterNode, NodesManager, RedisCluster
+from redis.crc import key_slot
+from redis.exceptions import AskError, MovedError
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.topology import ClusterConnectionManager
+
+
+class TestClusterConnectionManager(unittest.TestCase):
+    def setUp(self):
+        self.environment = Mock()
+        self.fire = self.environment.events.request.fire
+        self.manager = ClusterConnectionManager(self.environment, BenchmarkConfig(users=50, topology_refresh_interval=10))
+        self.node = SimpleNamespace(name="10.0.0.1:6379", redis_connection=None)
+        self.conn = Mock()
+        self.conn.get_nodes.return_value = [self.node]
+        self.conn.get_primaries.return_value = [self.node]
+        del self.conn.get_valkey_connection
+
+    def names(self):
+        return [call.kwargs["name"] for call in self.fire.call_args_list]
+
+    def test_pool_size_is_capped_at_users(self):
+        self.assertEqual(self.manager.pool_size(), 50)
+        self.assertEqual(ClusterConnectionManager(self.environment, BenchmarkConfig(users=50, connections_pool=8)).pool_size(), 8)
+
+    def test_concurrent_refreshes_are_shared_and_rate_limited(self):
+        initialize = Mock(side_effect=lambda: gevent.sleep(0.01))
+        self.conn.nodes_manager.initialize = initialize
+        self.manager.attach(self.conn)
+        gevent.joinall([gevent.spawn(self.conn.nodes_manager.initialize) for _ in range(5)])
+        self.conn.nodes_manager.initialize()
+        self.assertEqual(initialize.call_count, 1)
+        self.assertEqual(sorted(self.names()), ["topology refresh"] + ["topology refresh (shared)"] * 4 + ["topology refresh (skipped)"])
+
+    def test_redirects_are_counted(self):
+        client = SimpleNamespace(parse_response=Mock(side_effect=[MovedError("3999 10.0.0.2:6379"), AskError("3999 10.0.0.2:6379"), "OK"]))
+        self.conn.nodes_manager.create_redis_node.return_value = client
+        self.manager.attach(self.conn)
+        client = self.conn.nodes_manager.create_redis_node("10.0.0.2", 6379)
+        with self.assertRaises(MovedError):
+            client.parse_response(None, "GET")
+        with self.assertRaises(AskError):
+            client.parse_response(None, "GET")
+        self.assertEqual(client.parse_response(None, "GET"), "OK")
+        self.assertEqual(self.names(), ["MOVED", "ASK"])
+
+    def test_pipeline_redirects_are_counted(self):
+        with patch.object(NodesManager, "initialize"), patch("redis.cluster.CommandsParser"):
+            cluster = RedisCluster(startup_nodes=[ClusterNode("10.0.0.1", 6379)])
+        cluster.commands_parser.get_keys = lambda connection, *args: [args[1]]
+        old, new = ClusterNode("10.0.0.1", 6379, PRIMARY), ClusterNode("10.0.0.2", 6379, PRIMARY)
+        nodes_manager = cluster.nodes_manager
+        nodes_manager.initialize = Mock()
+        nodes_manager.nodes_cache = {old.name: old, new.name: new}
+        nodes_manager.slots_cache = {slot: [old] for slot in range(16384)}
+        nodes_manager.default_node = old
+        self.manager.attach(cluster)
+        replies = {old.name: MovedError(f"{key_slot(b'key_1')} {new.name}"), new.name: b"value"}
+        for node in (old, new):
+            pool = cluster.get_redis_connection(node).connection_pool
+            reply = replies[node.name]
+            read_response = Mock(side_effect=reply) if isinstance(reply, Exception) else Mock(return_value=reply)
+            pool.get_connection = Mock(return_value=Mock(read_response=read_response))
+            pool.release = Mock()
+        pipe = cluster.pipeline()
+        pipe.get("key_1")
+        self.assertEqual(pipe.execute(raise_on_error=False), [b"value"])
+        # One MOVED read by the pipeline, one by the client resending the command before following it.
+        self.assertEqual(self.names(), ["MOVED", "MOVED"])
+
+    def test_warm_up_opens_connections_without_reporting_them(self):
+        pool = Mock()
+        pool.get_connection.side_effect = lambda command: self.manager.on_connect(Mock())
+        self.conn.get_redis_connection.return_value.connection_pool = pool
+        self.manager.warm_up(self.conn, 100)
+        self.assertEqual(pool.get_connection.call_count, 50)
+        self.assertEqual(pool.release.call_count, 50)
+        self.manager.on_connect(Mock())
+        self.assertEqual(self.names(), ["connect"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,11 @@
-import os
+import socket
+import time
 import unittest
-from unittest.mock import Mock
-from cache_benchmark.utils import generate_string, init_cache_set, set_env_vars
+from unittest.mock import ANY, Mock, patch
+from redis.crc import key_slot
+from gevent.event import Event
+from cache_benchmark.utils import (find_free_port, generate_string, init_cache_set, iter_preload_batches,
+                                   locust_runner_cash_benchmark, wait_for_load)
 
 
 class TestUtils(unittest.TestCase):
@@ -9,35 +13,60 @@ class TestUtils(unittest.TestCase):
         result = generate_string(1)
         self.assertIsInstance(result, str)
 
-    def test_set_env_vars(self):
-        args = Mock()
-        args.fqdn = "localhost"
-        args.port = 6379
-        args.hit_rate = 0.9
-        args.value_size = 1024
-        args.ttl = 60
-        args.connections_pool = 10
-        args.ssl = "False"
-
-        set_env_vars(args)
-
-        self.assertEqual(os.environ["REDIS_HOST"], "localhost")
-        self.assertEqual(os.environ["REDIS_PORT"], "6379")
-        self.assertEqual(os.environ["HIT_RATE"], "0.9")
-        self.assertEqual(os.environ["VALUE_SIZE"], "1024")
-        self.assertEqual(os.environ["TTL"], "60")
-        self.assertEqual(os.environ["CONNECTIONS_POOL"], "10")
-        self.assertEqual(os.environ["SSL"] , "False")
-
     def test_init_cache_set(self):
         cache_client = Mock()
+        pipe = cache_client.pipeline.return_value
+        pipe.execute.side_effect = lambda raise_on_error: [True] * 100
         value = "test_value"
         ttl = 60
-        cache_client.get.return_value = None
-        cache_client.set.return_value = True
-        init_cache_set(cache_client, value, ttl)
-        self.assertEqual(cache_client.set.call_count, 999)
-        self.assertEqual(cache_client.get.call_count, 999)
+        summary = init_cache_set(cache_client, value, ttl, set_keys=1000, batch_size=100, concurrency=4)
+        self.assertEqual(pipe.set.call_count, 1000)
+        self.assertEqual(pipe.execute.call_count, 10)
+        cache_client.get.assert_not_called()
+        self.assertEqual(summary["keys"], 1000)
+        self.assertEqual(summary["failures"], 0)
+        self.assertGreater(summary["bytes_per_sec"], 0)
+
+    def test_init_cache_set_counts_failures(self):
+        cache_client = Mock()
+        pipe = cache_client.pipeline.return_value
+        pipe.execute.side_effect = lambda raise_on_error: [True, Exception("MOVED")] * 5
+        summary = init_cache_set(cache_client, "test_value", 60, set_keys=20, batch_size=10, concurrency=2)
+        self.assertEqual(summary["failures"], 10)
+
+    def test_init_cache_set_reports_decimal_megabytes(self):
+        cache_client = Mock()
+        cache_client.pipeline.return_value.execute.side_effect = lambda raise_on_error: [True] * 10
+        with self.assertLogs(level="INFO") as logs:
+            summary = init_cache_set(cache_client, "A" * 100_000, 60, set_keys=10, batch_size=10, concurrency=1)
+        self.assertIn(f"{summary['bytes_per_sec'] / 1e6:,.2f} MB/sec", logs.output[-1])
+
+    def test_iter_preload_batches(self):
+        batches = list(iter_preload_batches(2500, 1000, chunk_size=1000))
+        self.assertEqual([len(batch) for batch in batches], [1000, 1000, 500])
+        keys = [key for batch in batches for key in batch]
+        self.assertEqual(set(keys), {f"key_{i}" for i in range(1, 2501)})
+        slots = [key_slot(key.encode()) for key in batches[0]]
+        self.assertEqual(slots, sorted(slots))
+
+    @patch("cache_benchmark.utils.locust_multiprocess_runner_benchmark")
+    def test_local_runner_forks_up_to_connections(self, mock_multiprocess):
+        args = Mock(processes=8, connections=3)
+        locust_runner_cash_benchmark(args, Mock(), Mock())
+        mock_multiprocess.assert_called_once_with(args, ANY, ANY, 3)
+
+    def test_abort_ends_the_wait_early(self):
+        abort = Event()
+        abort.set()
+        start = time.monotonic()
+        wait_for_load(Mock(), None, 30, abort)
+        wait_for_load(Mock(shape_greenlet=Mock()), Mock(), 30, abort)
+        self.assertLess(time.monotonic() - start, 1)
+
+    def test_find_free_port(self):
+        port = find_free_port()
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(("127.0.0.1", port))
 
 
 if __name__ == "__main__":
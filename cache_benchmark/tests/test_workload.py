@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import unittest
+from collections import Counter
+from unittest.mock import Mock, patch
+from cache_benchmark.config import BenchmarkConfig
+from cache_benchmark.main import load_config
+from cache_benchmark.workload import CompiledWorkload, get_compiled_workload, load_workload_file, validate_workload
+
+WORKLOAD_YAML = """
+operations:
+  - name: read
+    command: get
+    weight: 3
+    keys: {distribution: zipfian, keyspace: 100, prefix: "user_"}
+  - name: write
+    command: set
+    weight: 1
+    keys: {miss: true}
+    ttl: 30
+"""
+
+
+class TestWorkload(unittest.TestCase):
+    def setUp(self):
+        self.task = Mock()
+        self.task.user.environment.retry_policy = None
+        self.fire = self.task.user.environment.events.request.fire
+        self.cache_connection = Mock()
+        self.config = BenchmarkConfig()
+
+    def write_file(self, suffix, content):
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_load_yaml_and_json(self):
+        workload = load_workload_file(self.write_file(".yaml", WORKLOAD_YAML))
+        self.assertEqual([op["command"] for op in workload["operations"]], ["get", "set"])
+        self.assertEqual(load_workload_file(self.write_file(".json", json.dumps(workload))), workload)
+
+    @patch("cache_benchmark.main.BenchmarkConfig.from_args")
+    def test_load_config_ships_the_workload_as_json(self, mock_from_args):
+        mock_from_args.return_value = BenchmarkConfig(workload_file=self.write_file(".yaml", WORKLOAD_YAML))
+        config = load_config(Mock(), "redis_cluster")
+        self.assertEqual(json.loads(config.workload)["operations"][0]["name"], "read")
+        rebuilt = BenchmarkConfig.from_dict(config.to_dict())
+        self.assertIs(get_compiled_workload(rebuilt), get_compiled_workload(config))
+
+    @patch("cache_benchmark.main.BenchmarkConfig.from_args")
+    def test_load_config_rejects_malformed_files(self, mock_from_args):
+        for content in ("operations: [get", "operations:\n  - get\n"):
+            mock_from_args.return_value = BenchmarkConfig(workload_file=self.write_file(".yaml", content))
+            with self.assertLogs("cache_benchmark.main", "ERROR"), self.assertRaises(SystemExit):
+                load_config(Mock(), "redis_cluster")
+
+    def test_validate_rejects_bad_workloads(self):
+        for workload in ({}, {"operations": "get"}, {"operations": ["get"]}, {"operations": [{"command": "flushall"}]},
+                         {"operations": [{"command": "evalsha"}]},
+                         {"operations": [{"command": "get", "weight": 0}]}):
+            with self.assertRaises(ValueError):
+                validate_workload(workload)
+
+    def test_mix_follows_weights(self):
+        workload = CompiledWorkload(load_workload_file(self.write_file(".yaml", WORKLOAD_YAML)), self.config)
+        for _ in range(4000):
+            workload.run(self.task, self.cache_connection)
+        counts = Counter(call.kwargs["name"] for call in self.fire.call_args_list)
+        self.assertAlmostEqual(counts["read"] / counts["write"], 3, delta=0.4)
+        self.assertTrue(self.cache_connection.get.call_args.args[0].startswith("user_"))
+        self.assertEqual(self.cache_connection.set.call_args.kwargs["ex"], 30)
+
+    def test_commands_are_dispatched(self):
+        operations = [{"command": command, "count": 3} for command in ("mget", "hset", "zrange", "del")]
+        workload = CompiledWorkload({"operations": operations}, self.config)
+        for operation in workload.operations:
+            operation.run(self.task, self.cache_connection, None)
+        self.assertEqual(len(self.cache_connection.mget_nonatomic.call_args.args[0]), 3)
+        self.assertIn("mapping", self.cache_connection.hset.call_args.kwargs)
+        self.assertEqual(self.cache_connection.zrange.call_args.args[1:], (0, 2))
+        self.cache_connection.delete.assert_called_once()
+
+    def test_evalsha_loads_missing_script(self):
+        script = "return redis.call('GET', KEYS[1])"
+        workload = CompiledWorkload({"operations": [{"command": "evalsha", "script": script}]}, self.config)
+        self.cache_connection.evalsha.side_effect = [Exception("NOSCRIPT No matching script"), "value"]
+        result = workload.run(self.task, self.cache_connection)
+        self.assertEqual(result, "value")
+        self.cache_connection.script_load.assert_called_once_with(script)
+        self.assertIsNone(self.fire.call_args.kwargs["exception"])
+
+
+if __name__ == "__main__":
+    unittest.main()